@@ -1,6 +1,7 @@
 """BoTTube CLI — command-line interface for the BoTTube Video Platform."""
 
 import argparse
+import functools
 import json
 import os
 import sys
@@ -10,6 +11,11 @@ from typing import Any, Dict, Optional
 
 from bottube.client import BoTTubeClient, DEFAULT_BASE_URL
 
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is the fallback
+    orjson = None
+
 
 CONFIG_DIR = Path.home() / ".bottube"
 CONFIG_PATH = CONFIG_DIR / "config.json"
@@ -24,6 +30,16 @@ def _load_config() -> Dict[str, Any]:
         return {}
 
 
+def _dumps_pretty(obj: Any) -> str:
+    """Indented JSON for terminal output, via orjson when installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            pass
+    return json.dumps(obj, indent=2, ensure_ascii=False)
+
+
 def _save_config(cfg: Dict[str, Any]) -> None:
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
     CONFIG_PATH.write_text(json.dumps(cfg, indent=2, sort_keys=True) + "\n", encoding="utf-8")
@@ -44,9 +60,9 @@ def _resolve_base_url(cli_url: str, cfg: Dict[str, Any]) -> str:
     return str(cfg.get("base_url") or cli_url or DEFAULT_BASE_URL)
 
 
-def main():
-    cfg = _load_config()
-
+@functools.lru_cache(maxsize=None)
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the CLI parser once; parse_args() does not mutate it, so it is reused."""
     parser = argparse.ArgumentParser(
         prog="bottube",
         description="BoTTube — the video platform for AI agents",
@@ -203,7 +219,13 @@ def main():
     tips_cmd.add_argument("video_id", help="Video ID")
 
     sub.add_parser("tip-leaderboard", help="Show top tipped creators")
+    return parser
+
+
+def main():
+    cfg = _load_config()
 
+    parser = _build_parser()
     args = parser.parse_args()
 
     # Allow --json to be specified after the subcommand too (e.g. `bottube upload ... --json`).
@@ -214,10 +236,10 @@ def main():
 
     def out(obj: Any) -> None:
         if args.json:
-            print(json.dumps(obj, indent=2, ensure_ascii=False))
+            print(_dumps_pretty(obj))
         else:
             if isinstance(obj, (dict, list)):
-                print(json.dumps(obj, indent=2, ensure_ascii=False))
+                print(_dumps_pretty(obj))
             else:
                 print(obj)
 
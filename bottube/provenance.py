@@ -7,10 +7,13 @@ lineage, enabling attribution and discovery of derivative works.
 
 from __future__ import annotations
 
+import functools
 import json
+import sys
+from collections import deque
 from dataclasses import dataclass, asdict
 from datetime import datetime
-from typing import Dict, List, Optional, Set, Any
+from typing import Dict, List, Optional, Set, Any, Tuple
 from enum import Enum
 
 
@@ -34,9 +37,16 @@ class VideoNotFoundError(LineageError):
     pass
 
 
-@dataclass
+# slots=True needs Python 3.10; older interpreters get a plain frozen dataclass.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **_SLOTS)
 class ProvenanceNode:
-    """A node in the provenance tree representing a video."""
+    """A node in the provenance tree representing a video.
+
+    Immutable, since cached lineage walks hand the same nodes to every caller.
+    """
     video_id: str
     title: str
     author: str
@@ -84,7 +94,8 @@ class LineageValidator:
         cls,
         video_id: str,
         parent_id: str,
-        lineage_store: Dict[str, Optional[str]]
+        lineage_store: Dict[str, Optional[str]],
+        max_depth: Optional[int] = None,
     ) -> None:
         """
         Check if adding parent_id as parent of video_id would create a cycle.
@@ -93,6 +104,7 @@ class LineageValidator:
             video_id: The video being created/modified
             parent_id: The proposed parent video
             lineage_store: Mapping of video_id -> parent_id
+            max_depth: Most ancestors allowed (default MAX_LINEAGE_DEPTH)
             
         Raises:
             SelfReferentialError: If video references itself
@@ -103,26 +115,28 @@ class LineageValidator:
                 f"Video {video_id} cannot reference itself as parent"
             )
         
-        # Walk up the parent chain
-        current = parent_id
+        if max_depth is None:
+            max_depth = cls.MAX_LINEAGE_DEPTH
+
+        # Walk up the parent chain; the loop bound caps the work at max_depth
+        # lookups whatever the store contains.
+        current: Optional[str] = parent_id
         visited: Set[str] = {video_id}
-        depth = 0
-        
-        while current is not None:
+
+        for _ in range(max_depth):
+            if current is None:
+                return
             if current in visited:
                 raise CircularReferenceError(
                     f"Circular reference detected: {video_id} -> {parent_id} ... -> {current}"
                 )
-            
             visited.add(current)
-            depth += 1
-            
-            if depth > cls.MAX_LINEAGE_DEPTH:
-                raise CircularReferenceError(
-                    f"Lineage depth exceeds maximum ({cls.MAX_LINEAGE_DEPTH})"
-                )
-            
             current = lineage_store.get(current)
+
+        if current is not None:
+            raise CircularReferenceError(
+                f"Lineage depth exceeds maximum ({max_depth})"
+            )
     
     @classmethod
     def validate_lineage(
@@ -164,8 +178,14 @@ class LineageValidator:
 
 
 class LineageService:
-    """Service for building and querying lineage trees."""
-    
+    """Service for building and querying lineage trees.
+
+    Traversals are memoized per instance, so the stores are treated as a
+    snapshot: build a new service after they change.
+    """
+
+    CACHE_SIZE = 4096
+
     def __init__(
         self,
         video_store: Dict[str, Dict],
@@ -180,7 +200,74 @@ class LineageService:
         """
         self.video_store = video_store
         self.lineage_store = lineage_store
-    
+        # Per-instance caches (a class-level lru_cache would pin every service).
+        self._ancestors_cached = functools.lru_cache(maxsize=self.CACHE_SIZE)(self._walk_ancestors)
+        self._descendants_cached = functools.lru_cache(maxsize=self.CACHE_SIZE)(self._walk_descendants)
+        self._children_index: Optional[Dict[str, List[str]]] = None
+
+    @property
+    def _children(self) -> Dict[str, List[str]]:
+        """parent_id -> child ids in lineage_store order, built on first use."""
+        if self._children_index is None:
+            children: Dict[str, List[str]] = {}
+            for child, parent in self.lineage_store.items():
+                if parent is not None:
+                    children.setdefault(parent, []).append(child)
+            self._children_index = children
+        return self._children_index
+
+    @staticmethod
+    def _node(video_id: str, video: Dict, revision_of: Optional[str]) -> ProvenanceNode:
+        return ProvenanceNode(
+            video_id=video_id,
+            title=video.get("title", "Unknown"),
+            author=video.get("author", "Unknown"),
+            created_at=video.get("created_at", ""),
+            revision_of=revision_of,
+        )
+
+    def _walk_ancestors(self, video_id: str, max_depth: int) -> Tuple[ProvenanceNode, ...]:
+        ancestors = []
+        current = self.lineage_store.get(video_id)
+        depth = 0
+
+        while current is not None and depth < max_depth:
+            # A parent missing from video_store is skipped, not treated as the root
+            video = self.video_store.get(current)
+            if video is not None:
+                ancestors.append(self._node(current, video, video.get("revision_of")))
+
+            current = self.lineage_store.get(current)
+            depth += 1
+
+        # Reverse to get oldest first
+        ancestors.reverse()
+        return tuple(ancestors)
+
+    def _walk_descendants(self, video_id: str, max_depth: int) -> Tuple[ProvenanceNode, ...]:
+        descendants = []
+        children = self._children
+        to_process = deque([(video_id, 0)])
+        processed: Set[str] = set()
+
+        # BFS over the reverse index: cost follows the subtree, not the store
+        while to_process:
+            current_id, depth = to_process.popleft()
+
+            if current_id in processed or depth >= max_depth:
+                continue
+
+            processed.add(current_id)
+
+            for vid in children.get(current_id, ()):
+                if vid != video_id:
+                    video = self.video_store.get(vid)
+                    if video:
+                        descendants.append(self._node(vid, video, vid))
+                        to_process.append((vid, depth + 1))
+
+        return tuple(descendants)
+
     def get_ancestors(
         self,
         video_id: str,
@@ -196,29 +283,7 @@ class LineageService:
         Returns:
             List of ancestor nodes
         """
-        ancestors = []
-        current = self.lineage_store.get(video_id)
-        depth = 0
-        
-        while current is not None and depth < max_depth:
-            video = self.video_store.get(current)
-            if video is None:
-                break
-            
-            ancestors.append(ProvenanceNode(
-                video_id=current,
-                title=video.get("title", "Unknown"),
-                author=video.get("author", "Unknown"),
-                created_at=video.get("created_at", ""),
-                revision_of=video.get("revision_of"),
-            ))
-            
-            current = self.lineage_store.get(current)
-            depth += 1
-        
-        # Reverse to get oldest first
-        ancestors.reverse()
-        return ancestors
+        return list(self._ancestors_cached(video_id, max_depth))
     
     def get_descendants(
         self,
@@ -235,33 +300,7 @@ class LineageService:
         Returns:
             List of descendant nodes
         """
-        descendants = []
-        to_process = [(video_id, 0)]
-        processed: Set[str] = set()
-        
-        while to_process:
-            current_id, depth = to_process.pop(0)
-            
-            if current_id in processed or depth >= max_depth:
-                continue
-            
-            processed.add(current_id)
-            
-            # Find all videos that have current_id as parent
-            for vid, parent_id in self.lineage_store.items():
-                if parent_id == current_id and vid != video_id:
-                    video = self.video_store.get(vid)
-                    if video:
-                        descendants.append(ProvenanceNode(
-                            video_id=vid,
-                            title=video.get("title", "Unknown"),
-                            author=video.get("author", "Unknown"),
-                            created_at=video.get("created_at", ""),
-                            revision_of=vid,
-                        ))
-                        to_process.append((vid, depth + 1))
-        
-        return descendants
+        return list(self._descendants_cached(video_id, max_depth))
     
     def get_siblings(self, video_id: str) -> List[ProvenanceNode]:
         """
@@ -278,17 +317,11 @@ class LineageService:
             return []
         
         siblings = []
-        for vid, parent in self.lineage_store.items():
-            if parent == parent_id and vid != video_id:
+        for vid in self._children.get(parent_id, ()):
+            if vid != video_id:
                 video = self.video_store.get(vid)
                 if video:
-                    siblings.append(ProvenanceNode(
-                        video_id=vid,
-                        title=video.get("title", "Unknown"),
-                        author=video.get("author", "Unknown"),
-                        created_at=video.get("created_at", ""),
-                        revision_of=vid,
-                    ))
+                    siblings.append(self._node(vid, video, vid))
         
         return siblings
     
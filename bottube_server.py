@@ -309,6 +309,14 @@ _RL_EXEMPT_PATHS = {
     "/api/bt-proof",
     "/api/footer-counters",
 }
+# Scraper dashboard polling still goes through the blocklist and rate limits,
+# but is not fed to the detective: recording it would change the detective
+# state on every poll and defeat the endpoint's ETag.
+_DETECTIVE_SKIP_PATHS = {
+    "/api/admin/scrapers",
+    "/api/admin/scrapers.ndjson",
+    "/api/admin/scrapers/stream",
+}
 
 
 def _rate_limit(key: str, max_requests: int, window_secs: int) -> bool:
@@ -804,7 +812,7 @@ def track_visitors():
     ip = _get_client_ip()
     if SCRAPER_DETECTIVE_ENABLED and scraper_detective_inst.is_blocked(ip):
         return Response("Forbidden", status=403)
-    if SCRAPER_DETECTIVE_ENABLED:
+    if SCRAPER_DETECTIVE_ENABLED and path not in _DETECTIVE_SKIP_PATHS:
         scraper_detective_inst.record_request(
             ip, request.headers.get("User-Agent", ""), path,
             getattr(g, "visitor_id", ""), getattr(g, "is_new_visitor", False),
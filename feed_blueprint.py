@@ -2,14 +2,39 @@
 # Author: @AUTHENSOR
 # BCOS-Tier: L1
 import datetime
+import functools
 import os
+from itertools import islice
 from email.utils import format_datetime
 
 import requests
 from flask import Blueprint, Response, request
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 feed_bp = Blueprint("feed", __name__)
 
+# Ceiling for the clamped limit, which is sent upstream as per_page and
+# applied to the response.
+_MAX_LIMIT = 100
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504)),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Feed readers poll often; keep connections to the API host alive between
+# requests instead of handshaking on every fetch.
+_SESSION = _build_session()
+
 
 def _base_api_url() -> str:
     """Prefer local API by default; allow explicit override for external deployments."""
@@ -30,73 +55,82 @@ def escape_xml(text):
     )
 
 
-def _to_rfc2822(value):
-    """Convert various timestamp formats to RFC 2822 for RSS pubDate."""
-    if value is None or value == "":
-        dt = datetime.datetime.now(datetime.timezone.utc)
-        return format_datetime(dt)
+def _now_utc():
+    return datetime.datetime.now(datetime.timezone.utc)
 
+
+@functools.lru_cache(maxsize=1024)
+def _parse_timestamp(value):
+    """Parse an epoch number/string or ISO 8601 string to aware UTC; None if unusable.
+
+    Feeds re-render the same created_at values on every poll, so results are
+    memoized. Unparseable input returns None rather than "now" so the cache
+    never pins a stale current time.
+    """
     if isinstance(value, (int, float)):
-        dt = datetime.datetime.fromtimestamp(float(value), tz=datetime.timezone.utc)
-        return format_datetime(dt)
+        return datetime.datetime.fromtimestamp(float(value), tz=datetime.timezone.utc)
 
     s = str(value).strip()
     if not s:
-        dt = datetime.datetime.now(datetime.timezone.utc)
-        return format_datetime(dt)
+        return None
 
     if s.replace(".", "", 1).isdigit():
-        dt = datetime.datetime.fromtimestamp(float(s), tz=datetime.timezone.utc)
-        return format_datetime(dt)
+        return datetime.datetime.fromtimestamp(float(s), tz=datetime.timezone.utc)
 
     try:
         dt = datetime.datetime.fromisoformat(s.replace("Z", "+00:00"))
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=datetime.timezone.utc)
-        return format_datetime(dt.astimezone(datetime.timezone.utc))
     except Exception:
-        dt = datetime.datetime.now(datetime.timezone.utc)
-        return format_datetime(dt)
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt.astimezone(datetime.timezone.utc)
 
 
-def _to_iso8601(value):
-    """Convert various timestamp formats to ISO 8601 for Atom feed."""
-    if value is None or value == "":
-        return datetime.datetime.now(datetime.timezone.utc).isoformat()
+@functools.lru_cache(maxsize=1024)
+def _rfc2822_of(value):
+    dt = _parse_timestamp(value)
+    return None if dt is None else format_datetime(dt)
 
-    if isinstance(value, (int, float)):
-        return datetime.datetime.fromtimestamp(
-            float(value), tz=datetime.timezone.utc
-        ).isoformat()
 
-    s = str(value).strip()
-    if not s:
-        return datetime.datetime.now(datetime.timezone.utc).isoformat()
+def _to_rfc2822(value):
+    """Convert various timestamp formats to RFC 2822 for RSS pubDate."""
+    if value is None or value == "":
+        return format_datetime(_now_utc())
+    try:
+        out = _rfc2822_of(value)
+    except TypeError:  # unhashable input
+        out = None
+    return out if out is not None else format_datetime(_now_utc())
 
-    if s.replace(".", "", 1).isdigit():
-        return datetime.datetime.fromtimestamp(
-            float(s), tz=datetime.timezone.utc
-        ).isoformat()
 
+def _to_iso8601(value):
+    """Convert various timestamp formats to ISO 8601 for Atom feed."""
+    if value is None or value == "":
+        return _now_utc().isoformat()
     try:
-        dt = datetime.datetime.fromisoformat(s.replace("Z", "+00:00"))
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=datetime.timezone.utc)
-        return dt.astimezone(datetime.timezone.utc).isoformat()
-    except Exception:
-        return datetime.datetime.now(datetime.timezone.utc).isoformat()
+        dt = _parse_timestamp(value)
+    except TypeError:  # unhashable input
+        dt = None
+    return (dt or _now_utc()).isoformat()
+
 
+def _normalize_videos(payload, limit=None):
+    """Extract a list of video dicts from various API response shapes.
 
-def _normalize_videos(payload):
-    """Extract a list of video dicts from various API response shapes."""
-    if isinstance(payload, list):
-        return [v for v in payload if isinstance(v, dict)]
+    At most ``limit`` videos are kept, so an upstream that ignores per_page
+    cannot make the feed render an unbounded number of items.
+    """
     if isinstance(payload, dict):
         for key in ("videos", "items", "data"):
             val = payload.get(key)
             if isinstance(val, list):
-                return [v for v in val if isinstance(v, dict)]
-    return []
+                payload = val
+                break
+        else:
+            return []
+    if not isinstance(payload, list):
+        return []
+    return list(islice((v for v in payload if isinstance(v, dict)), limit))
 
 
 def _fetch_videos(agent=None, category=None, limit=20):
@@ -109,9 +143,9 @@ def _fetch_videos(agent=None, category=None, limit=20):
 
     try:
         api_url = f"{_base_api_url()}/api/videos"
-        res = requests.get(api_url, params=params, timeout=10)
+        res = _SESSION.get(api_url, params=params, timeout=10)
         res.raise_for_status()
-        return _normalize_videos(res.json())
+        return _normalize_videos(res.json(), limit)
     except Exception:
         return []
 
@@ -122,7 +156,7 @@ def _parse_limit():
         limit = int(request.args.get("limit", 20))
     except Exception:
         limit = 20
-    return max(1, min(limit, 100))
+    return max(1, min(limit, _MAX_LIMIT))
 
 
 def _vid_fields(vid):
@@ -143,6 +177,76 @@ def _vid_fields(vid):
     }
 
 
+# Per-item markup, formatted once per video with format_map().
+_RSS_HEADER = "\n".join([
+    '<?xml version="1.0" encoding="UTF-8" ?>',
+    '<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/" xmlns:dc="http://purl.org/dc/elements/1.1/">',
+    "<channel>",
+    "  <title>BoTTube - {feed_title}</title>",
+    "  <link>https://bottube.ai</link>",
+    "  <description>Latest AI-generated videos on BoTTube</description>",
+    "  <lastBuildDate>{now}</lastBuildDate>",
+])
+_RSS_ITEM = "\n".join([
+    "  <item>",
+    "    <title>{title}</title>",
+    "    <link>{watch}</link>",
+    '    <guid isPermaLink="false">{id}</guid>',
+    '    <description><![CDATA[<img src="{thumb}" /><p>{desc}</p>]]></description>',
+    "    <pubDate>{date}</pubDate>",
+    "    <dc:creator>{author}</dc:creator>",
+    "    <category>{category}</category>",
+    '    <media:content url="{stream}" type="video/mp4" medium="video" />',
+    '    <media:thumbnail url="{thumb}" />',
+    "  </item>",
+])
+_RSS_FOOTER = "</channel>\n</rss>"
+
+_ATOM_HEADER = "\n".join([
+    '<?xml version="1.0" encoding="UTF-8" ?>',
+    '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:media="http://search.yahoo.com/mrss/">',
+    "  <title>BoTTube - {feed_title}</title>",
+    '  <link href="https://bottube.ai" rel="alternate" />',
+    '  <link href="{self_href}" rel="self" />',
+    "  <id>https://bottube.ai/feed/atom</id>",
+    "  <updated>{now}</updated>",
+    "  <subtitle>Latest AI-generated videos on BoTTube</subtitle>",
+    '  <generator uri="https://bottube.ai" version="1.0">BoTTube</generator>',
+])
+_ATOM_ENTRY = "\n".join([
+    "  <entry>",
+    "    <title>{title}</title>",
+    '    <link href="{watch}" rel="alternate" />',
+    "    <id>urn:bottube:video:{id}</id>",
+    "    <updated>{date}</updated>",
+    "    <published>{date}</published>",
+    "    <author><name>{author}</name></author>",
+    '    <category term="{category}" />',
+    "    <summary>{desc}</summary>",
+    '    <content type="html"><![CDATA[<img src="{thumb}" /><p>{desc}</p>]]></content>',
+    '    <media:content url="{stream}" type="video/mp4" medium="video" />',
+    '    <media:thumbnail url="{thumb}" />',
+    "  </entry>",
+])
+_ATOM_FOOTER = "</feed>"
+
+
+def _item_fields(vid, date_fn):
+    """Template fields for one video: user text escaped, URLs as-is."""
+    f = _vid_fields(vid)
+    return {
+        "title": escape_xml(f["title"]),
+        "watch": f["watch"],
+        "id": escape_xml(f["id"]),
+        "thumb": f["thumb"],
+        "desc": escape_xml(f["desc"]),
+        "date": date_fn(f["created_at"]),
+        "author": escape_xml(f["author"]),
+        "category": escape_xml(f["category"]),
+        "stream": f["stream"],
+    }
+
+
 @feed_bp.route("/feed/rss")
 def rss_feed():
     """RSS 2.0 feed with global, per-agent, and per-category filtering."""
@@ -151,37 +255,13 @@ def rss_feed():
     limit = _parse_limit()
     videos = _fetch_videos(agent=agent, category=category, limit=limit)
 
-    now_rfc = format_datetime(datetime.datetime.now(datetime.timezone.utc))
-    feed_title = escape_xml(agent or category or "Global Feed")
-
-    lines = [
-        '<?xml version="1.0" encoding="UTF-8" ?>',
-        '<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/" xmlns:dc="http://purl.org/dc/elements/1.1/">',
-        "<channel>",
-        f"  <title>BoTTube - {feed_title}</title>",
-        "  <link>https://bottube.ai</link>",
-        "  <description>Latest AI-generated videos on BoTTube</description>",
-        f"  <lastBuildDate>{now_rfc}</lastBuildDate>",
-    ]
-
-    for vid in videos:
-        f = _vid_fields(vid)
-        lines += [
-            "  <item>",
-            f"    <title>{escape_xml(f['title'])}</title>",
-            f"    <link>{f['watch']}</link>",
-            f'    <guid isPermaLink="false">{escape_xml(f["id"])}</guid>',
-            f'    <description><![CDATA[<img src="{f["thumb"]}" /><p>{escape_xml(f["desc"])}</p>]]></description>',
-            f"    <pubDate>{_to_rfc2822(f['created_at'])}</pubDate>",
-            f"    <dc:creator>{escape_xml(f['author'])}</dc:creator>",
-            f"    <category>{escape_xml(f['category'])}</category>",
-            f'    <media:content url="{f["stream"]}" type="video/mp4" medium="video" />',
-            f'    <media:thumbnail url="{f["thumb"]}" />',
-            "  </item>",
-        ]
-
-    lines += ["</channel>", "</rss>"]
-    return Response("\n".join(lines), mimetype="application/rss+xml")
+    parts = [_RSS_HEADER.format(
+        feed_title=escape_xml(agent or category or "Global Feed"),
+        now=format_datetime(_now_utc()),
+    )]
+    parts.extend(_RSS_ITEM.format_map(_item_fields(vid, _to_rfc2822)) for vid in videos)
+    parts.append(_RSS_FOOTER)
+    return Response("\n".join(parts), mimetype="application/rss+xml")
 
 
 @feed_bp.route("/feed/atom")
@@ -192,9 +272,6 @@ def atom_feed():
     limit = _parse_limit()
     videos = _fetch_videos(agent=agent, category=category, limit=limit)
 
-    now_iso = datetime.datetime.now(datetime.timezone.utc).isoformat()
-    feed_title = escape_xml(agent or category or "Global Feed")
-
     # Build self-link with current query params
     self_params = []
     if agent:
@@ -204,36 +281,11 @@ def atom_feed():
     self_qs = f"?{'&amp;'.join(self_params)}" if self_params else ""
     self_href = f"https://bottube.ai/feed/atom{self_qs}"
 
-    lines = [
-        '<?xml version="1.0" encoding="UTF-8" ?>',
-        '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:media="http://search.yahoo.com/mrss/">',
-        f"  <title>BoTTube - {feed_title}</title>",
-        f'  <link href="https://bottube.ai" rel="alternate" />',
-        f'  <link href="{self_href}" rel="self" />',
-        f"  <id>https://bottube.ai/feed/atom</id>",
-        f"  <updated>{now_iso}</updated>",
-        "  <subtitle>Latest AI-generated videos on BoTTube</subtitle>",
-        '  <generator uri="https://bottube.ai" version="1.0">BoTTube</generator>',
-    ]
-
-    for vid in videos:
-        f = _vid_fields(vid)
-        updated = _to_iso8601(f["created_at"])
-        lines += [
-            "  <entry>",
-            f"    <title>{escape_xml(f['title'])}</title>",
-            f'    <link href="{f["watch"]}" rel="alternate" />',
-            f"    <id>urn:bottube:video:{escape_xml(f['id'])}</id>",
-            f"    <updated>{updated}</updated>",
-            f"    <published>{updated}</published>",
-            f"    <author><name>{escape_xml(f['author'])}</name></author>",
-            f"    <category term=\"{escape_xml(f['category'])}\" />",
-            f"    <summary>{escape_xml(f['desc'])}</summary>",
-            f'    <content type="html"><![CDATA[<img src="{f["thumb"]}" /><p>{escape_xml(f["desc"])}</p>]]></content>',
-            f'    <media:content url="{f["stream"]}" type="video/mp4" medium="video" />',
-            f'    <media:thumbnail url="{f["thumb"]}" />',
-            "  </entry>",
-        ]
-
-    lines.append("</feed>")
-    return Response("\n".join(lines), mimetype="application/atom+xml")
+    parts = [_ATOM_HEADER.format(
+        feed_title=escape_xml(agent or category or "Global Feed"),
+        self_href=self_href,
+        now=_now_utc().isoformat(),
+    )]
+    parts.extend(_ATOM_ENTRY.format_map(_item_fields(vid, _to_iso8601)) for vid in videos)
+    parts.append(_ATOM_FOOTER)
+    return Response("\n".join(parts), mimetype="application/atom+xml")
@@ -1,11 +1,13 @@
 """Provider adapters for external AI video generation services."""
 
 from providers.base import GeneratedVideo, VideoGenProvider
-from providers.router import choose_provider, generate_video
+from providers.router import choose_provider, generate_video, generate_video_grok, generate_video_runway
 
 __all__ = [
     "GeneratedVideo",
     "VideoGenProvider",
     "choose_provider",
     "generate_video",
+    "generate_video_grok",
+    "generate_video_runway",
 ]
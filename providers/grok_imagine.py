@@ -1,13 +1,40 @@
 from __future__ import annotations
 
+import json
 import os
 import time
 from typing import Any, Dict
 
-import requests
-
 from providers.base import GeneratedVideo, VideoGenProvider
-from providers.utils import download_file
+from providers.utils import _SESSION, CANCEL, download_file
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is the fallback
+    orjson = None
+
+# Any poll body worth parsing contains one of these (compared lowercased): a
+# result URL, an error, or a terminal status. Pending bodies skip the parse.
+_FINAL_MARKERS = (b'url"', b'"error', b'"failed"', b'"cancelled"')
+
+
+def _json_loads(body: bytes) -> Any:
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def _json_bytes(obj: Any) -> bytes:
+    """Compact UTF-8 JSON, via orjson when installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:  # e.g. lone surrogates; let stdlib handle it
+            pass
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _may_be_final(body: bytes) -> bool:
+    lowered = body.lower()
+    return any(marker in lowered for marker in _FINAL_MARKERS)
 
 
 class GrokImagineProvider(VideoGenProvider):
@@ -19,12 +46,14 @@ class GrokImagineProvider(VideoGenProvider):
         self,
         api_key: str | None = None,
         api_base: str | None = None,
-        poll_interval: int = 5,
+        poll_interval: float = 1.0,
         max_wait_seconds: int = 300,
+        max_poll_interval: float = 10.0,
     ) -> None:
         self.api_key = api_key or os.environ.get("GROK_API_KEY", "")
         self.api_base = (api_base or os.environ.get("GROK_API_BASE", "https://api.x.ai/v1")).rstrip("/")
         self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
         self.max_wait_seconds = max_wait_seconds
 
     def _headers(self) -> Dict[str, str]:
@@ -49,9 +78,12 @@ class GrokImagineProvider(VideoGenProvider):
             "resolution": resolution,
         }
 
-        create_resp = requests.post(
+        # Submit, poll and download share one keep-alive pool, so the poll
+        # loop reuses its TLS connection instead of handshaking every few seconds.
+        # The body is serialized once, compactly; _headers() sets the JSON type.
+        create_resp = _SESSION.post(
             f"{self.api_base}/videos/generations",
-            json=payload,
+            data=_json_bytes(payload),
             headers=self._headers(),
             timeout=30,
         )
@@ -65,15 +97,32 @@ class GrokImagineProvider(VideoGenProvider):
         if not request_id:
             raise RuntimeError(f"Missing request_id from Grok response: {create_data}")
 
-        started = time.time()
-        while time.time() - started < self.max_wait_seconds:
-            poll_resp = requests.get(
+        # Poll soon, then back off (x1.5 up to max_poll_interval), so short
+        # jobs are noticed quickly and long ones are not hammered. The ETag
+        # lets an unchanged job answer 304 with no body.
+        poll_headers = {"Authorization": f"Bearer {self.api_key}"}
+        delay = self.poll_interval
+        deadline = time.monotonic() + self.max_wait_seconds
+        while time.monotonic() < deadline:
+            if CANCEL.is_set():
+                raise RuntimeError(f"Grok generation {request_id} cancelled")
+            poll_resp = _SESSION.get(
                 f"{self.api_base}/videos/{request_id}",
-                headers={"Authorization": f"Bearer {self.api_key}"},
+                headers=poll_headers,
                 timeout=30,
             )
-            poll_resp.raise_for_status()
-            poll_data = poll_resp.json()
+            body = None
+            if poll_resp.status_code != 304:
+                poll_resp.raise_for_status()
+                etag = poll_resp.headers.get("ETag")
+                if etag:
+                    poll_headers["If-None-Match"] = etag
+                body = poll_resp.content
+            if body is None or not _may_be_final(body):
+                self._backoff(delay, deadline)
+                delay = min(delay * 1.5, self.max_poll_interval)
+                continue
+            poll_data = _json_loads(body)
 
             if poll_data.get("error"):
                 raise RuntimeError(f"Grok generation failed: {poll_data['error']}")
@@ -104,6 +153,12 @@ class GrokImagineProvider(VideoGenProvider):
             if status in {"failed", "error", "cancelled"}:
                 raise RuntimeError(f"Grok generation ended with status '{status}': {poll_data}")
 
-            time.sleep(self.poll_interval)
+            self._backoff(delay, deadline)
+            delay = min(delay * 1.5, self.max_poll_interval)
 
         raise RuntimeError(f"Grok generation timed out after {self.max_wait_seconds}s")
+
+    @staticmethod
+    def _backoff(delay: float, deadline: float) -> None:
+        """Sleep for delay, but never past the deadline; wakes early on CANCEL."""
+        CANCEL.wait(max(0.0, min(delay, deadline - time.monotonic())))
@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from typing import Any, Callable, Dict, List, Tuple
+import functools
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from providers.base import GeneratedVideo
 from providers.grok_imagine import GrokImagineProvider
@@ -14,6 +18,18 @@ _PROVIDER_FACTORIES: Dict[str, ProviderFactory] = {
     "runway": RunwayProvider,
 }
 
+# Provider instances are reused across calls so SDK clients keep their HTTP
+# connection pools. Keyed by factory too, so swapping a factory takes effect.
+_PROVIDER_CACHE: Dict[Tuple[str, ProviderFactory], Any] = {}
+_PROVIDER_CACHE_LOCK = threading.Lock()
+
+_ERROR_SNIPPET_CHARS = 200
+
+# Provider name -> monotonic time of its last failure. While a failure is
+# younger than the cooldown, fallback runs try that provider last.
+_PROVIDER_HEALTH: Dict[str, float] = {}
+_HEALTH_COOLDOWN_SECONDS = 60.0
+
 RUNWAY_HINTS = (
     "runway",
     "cinematic",
@@ -29,6 +45,22 @@ RUNWAY_HINTS = (
     "professional",
 )
 
+# Single C-level scan per prompt instead of one `in` check per hint. Matching
+# stays substring-based (no word boundaries) to keep the original semantics.
+# Prompts are lowercased before matching, so no IGNORECASE is needed.
+_GROK_RE = re.compile(r"grok")
+_HINT_RE = re.compile("|".join(re.escape(hint) for hint in RUNWAY_HINTS))
+
+
+@functools.lru_cache(maxsize=2048)
+def _classify_prompt(prompt_lower: str) -> str:
+    """Pick a provider from a lowercased prompt; memoized for repeated prompts."""
+    if _GROK_RE.search(prompt_lower):
+        return "grok"
+    if _HINT_RE.search(prompt_lower):
+        return "runway"
+    return "grok"
+
 
 def choose_provider(prompt: str, prefer: str = "auto") -> str:
     """Choose provider name from explicit preference or prompt hints."""
@@ -37,46 +69,104 @@ def choose_provider(prompt: str, prefer: str = "auto") -> str:
     if normalized in {"grok", "runway"}:
         return normalized
 
-    lowered = (prompt or "").lower()
+    return _classify_prompt((prompt or "").lower())
 
-    if "grok" in lowered:
-        return "grok"
 
-    if any(hint in lowered for hint in RUNWAY_HINTS):
-        return "runway"
+def get_provider(name: str) -> Any:
+    """Return a cached provider instance for name."""
+    factory = _PROVIDER_FACTORIES[name]
+    key = (name, factory)
+    provider = _PROVIDER_CACHE.get(key)
+    if provider is None:
+        with _PROVIDER_CACHE_LOCK:
+            provider = _PROVIDER_CACHE.get(key)
+            if provider is None:
+                provider = factory()
+                _PROVIDER_CACHE[key] = provider
+    return provider
 
-    return "grok"
 
+def clear_provider_cache() -> None:
+    """Drop cached provider instances (e.g. after rotating API keys)."""
+    with _PROVIDER_CACHE_LOCK:
+        _PROVIDER_CACHE.clear()
 
-def generate_video(
+
+def clear_provider_health() -> None:
+    """Forget recent provider failures so attempts follow the default order."""
+    _PROVIDER_HEALTH.clear()
+
+
+def _order_by_health(attempts: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Move providers that failed within the cooldown to the back, oldest failure first."""
+    if not _PROVIDER_HEALTH:
+        return attempts
+    cutoff = time.monotonic() - _HEALTH_COOLDOWN_SECONDS
+
+    def last_failure(name: str) -> float:
+        failed_at = _PROVIDER_HEALTH.get(name, 0.0)
+        return failed_at if failed_at > cutoff else 0.0
+
+    return tuple(sorted(attempts, key=last_failure))
+
+
+# Primary provider -> full attempt order when fallback is enabled.
+_ATTEMPT_ORDER: Dict[str, Tuple[str, ...]] = {
+    "grok": ("grok", "runway"),
+    "runway": ("runway", "grok"),
+}
+
+
+def _run_attempts(
     prompt: str,
-    *,
-    prefer: str = "auto",
-    fallback: bool = True,
-    duration: int = 8,
-    **kwargs: Any,
+    primary: str,
+    fallback: bool,
+    duration: int,
+    kwargs: Dict[str, Any],
 ) -> GeneratedVideo:
-    """Generate with selected provider and optional fallback."""
-    primary = choose_provider(prompt, prefer=prefer)
-    attempts = [primary]
+    attempts = _order_by_health(_ATTEMPT_ORDER[primary]) if fallback else (primary,)
 
-    if fallback:
-        secondary = "runway" if primary == "grok" else "grok"
-        attempts.append(secondary)
-
-    errors: List[Tuple[str, str]] = []
+    errors: List[Tuple[str, str, str]] = []
+    last_exc: Optional[BaseException] = None
 
     for provider_name in attempts:
         try:
-            provider = _PROVIDER_FACTORIES[provider_name]()
+            provider = get_provider(provider_name)
             result = provider.generate(prompt=prompt, duration=duration, **kwargs)
+            _PROVIDER_HEALTH.pop(provider_name, None)
             result.metadata.setdefault("router_primary", primary)
             result.metadata.setdefault("router_provider", provider_name)
             if provider_name != primary:
                 result.metadata["router_fallback_used"] = True
             return result
         except Exception as exc:
-            errors.append((provider_name, str(exc)))
+            # SDK errors can carry whole response bodies; keep a bounded summary.
+            errors.append((provider_name, type(exc).__name__, str(exc)[:_ERROR_SNIPPET_CHARS]))
+            last_exc = exc
+            _PROVIDER_HEALTH[provider_name] = time.monotonic()
+
+    error_text = "; ".join(f"{name}[{kind}]: {message}" for name, kind, message in errors)
+    raise RuntimeError(f"All provider attempts failed ({error_text})") from last_exc
+
+
+def generate_video(
+    prompt: str,
+    *,
+    prefer: str = "auto",
+    fallback: bool = True,
+    duration: int = 8,
+    **kwargs: Any,
+) -> GeneratedVideo:
+    """Generate with selected provider and optional fallback."""
+    primary = choose_provider(prompt, prefer=prefer)
+    return _run_attempts(prompt, primary, fallback, duration, kwargs)
+
+
+def generate_video_grok(prompt: str, *, fallback: bool = True, duration: int = 8, **kwargs: Any) -> GeneratedVideo:
+    """Generate with Grok first, skipping provider selection."""
+    return _run_attempts(prompt, "grok", fallback, duration, kwargs)
+
 
-    error_text = "; ".join(f"{name}: {message}" for name, message in errors)
-    raise RuntimeError(f"All provider attempts failed ({error_text})")
+def generate_video_runway(prompt: str, *, fallback: bool = True, duration: int = 8, **kwargs: Any) -> GeneratedVideo:
+    """Generate with Runway first, skipping provider selection."""
+    return _run_attempts(prompt, "runway", fallback, duration, kwargs)
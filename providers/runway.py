@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import os
+import threading
 import time
-from typing import Any, Iterable
+from typing import Any, Dict, Iterable, Optional, Tuple
 
 from providers.base import GeneratedVideo, VideoGenProvider
 from providers.utils import download_file
@@ -27,6 +30,8 @@ class RunwayProvider(VideoGenProvider):
         self.poll_interval = poll_interval
         self.max_wait_seconds = max_wait_seconds
         self._client = None
+        self._async_client = None
+        self._client_lock = threading.Lock()
 
     @staticmethod
     def _nearest_allowed(value: int, allowed: Iterable[int]) -> int:
@@ -36,6 +41,12 @@ class RunwayProvider(VideoGenProvider):
         if self._client is not None:
             return self._client
 
+        with self._client_lock:
+            if self._client is None:
+                self._client = self._new_client()
+        return self._client
+
+    def _new_client(self):
         if not self.api_key:
             raise RuntimeError("RUNWAYML_API_SECRET is not set")
 
@@ -46,17 +57,31 @@ class RunwayProvider(VideoGenProvider):
                 "runwayml package is not installed. Install with: pip install runwayml"
             ) from exc
 
-        self._client = RunwayML(api_key=self.api_key)
-        return self._client
+        return RunwayML(api_key=self.api_key)
 
-    def generate(self, prompt: str, duration: int = 8, **kwargs: Any) -> GeneratedVideo:
-        client = self._client_or_raise()
+    def _async_client_or_raise(self):
+        if self._async_client is not None:
+            return self._async_client
 
+        if not self.api_key:
+            raise RuntimeError("RUNWAYML_API_SECRET is not set")
+
+        try:
+            from runwayml import AsyncRunwayML
+        except Exception as exc:  # pragma: no cover
+            raise RuntimeError(
+                "runwayml package is not installed. Install with: pip install runwayml"
+            ) from exc
+
+        self._async_client = AsyncRunwayML(api_key=self.api_key)
+        return self._async_client
+
+    def _prepare(self, prompt: str, duration: int, kwargs: Dict[str, Any]) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+        """Resolve options into (endpoint, create kwargs, result metadata)."""
         model = kwargs.get("runway_model") or kwargs.get("model") or os.environ.get("RUNWAY_MODEL", "gen4.5")
         ratio = kwargs.get("ratio") or kwargs.get("runway_ratio") or os.environ.get("RUNWAY_RATIO", "1280:720")
         audio = bool(kwargs.get("audio", False))
         prompt_image = kwargs.get("prompt_image") or kwargs.get("runway_image")
-        output_path = kwargs.get("output_path")
 
         use_image_to_video = bool(prompt_image) or model in {"gen4_turbo", "gen3a_turbo"}
 
@@ -66,66 +91,117 @@ class RunwayProvider(VideoGenProvider):
             )
 
         if use_image_to_video:
+            endpoint = "image_to_video"
             normalized_duration = self._nearest_allowed(int(duration), self.IMAGE_ALLOWED_DURATIONS)
-            create_resp = client.image_to_video.create(
-                model=model,
-                prompt_image=prompt_image,
-                prompt_text=prompt,
-                duration=normalized_duration,
-                ratio=ratio,
-                audio=audio,
-            )
+            create_kwargs = {
+                "model": model,
+                "prompt_image": prompt_image,
+                "prompt_text": prompt,
+                "duration": normalized_duration,
+                "ratio": ratio,
+                "audio": audio,
+            }
         else:
+            endpoint = "text_to_video"
             normalized_duration = self._nearest_allowed(int(duration), self.TEXT_ALLOWED_DURATIONS)
-            normalized_ratio = ratio if ratio in self.TEXT_ALLOWED_RATIOS else "1280:720"
-            create_resp = client.text_to_video.create(
-                model=model,
-                prompt_text=prompt,
-                duration=normalized_duration,
-                ratio=normalized_ratio,
-                audio=audio,
-            )
-            ratio = normalized_ratio
+            ratio = ratio if ratio in self.TEXT_ALLOWED_RATIOS else "1280:720"
+            create_kwargs = {
+                "model": model,
+                "prompt_text": prompt,
+                "duration": normalized_duration,
+                "ratio": ratio,
+                "audio": audio,
+            }
+
+        metadata = {
+            "duration": normalized_duration,
+            "ratio": ratio,
+            "model": model,
+            "audio": audio,
+            "used_image_to_video": use_image_to_video,
+        }
+        return endpoint, create_kwargs, metadata
+
+    @staticmethod
+    def _task_output_url(task: Any) -> Optional[str]:
+        """Return the output URL of a finished task, None while still running."""
+        status = str(getattr(task, "status", "")).upper()
+
+        if status == "SUCCEEDED":
+            outputs = list(getattr(task, "output", []) or [])
+            if not outputs:
+                raise RuntimeError(f"Runway task succeeded but returned no output URLs: {task}")
+            return outputs[0]
+
+        if status == "FAILED":
+            failure = getattr(task, "failure", "unknown failure")
+            failure_code = getattr(task, "failure_code", None)
+            if failure_code:
+                raise RuntimeError(f"Runway generation failed ({failure_code}): {failure}")
+            raise RuntimeError(f"Runway generation failed: {failure}")
+
+        if status in {"CANCELLED", "THROTTLED"}:
+            raise RuntimeError(f"Runway task ended with status {status}")
+
+        return None
+
+    def _result(self, task_id: str, source_url: str, local_path: Any, metadata: Dict[str, Any]) -> GeneratedVideo:
+        return GeneratedVideo(
+            provider=self.name,
+            output_path=local_path,
+            metadata={
+                "task_id": task_id,
+                "status": "SUCCEEDED",
+                "source_url": source_url,
+                **metadata,
+            },
+        )
 
+    def generate(self, prompt: str, duration: int = 8, **kwargs: Any) -> GeneratedVideo:
+        client = self._client_or_raise()
+        endpoint, create_kwargs, metadata = self._prepare(prompt, duration, kwargs)
+        output_path = kwargs.get("output_path")
+
+        create_resp = getattr(client, endpoint).create(**create_kwargs)
         task_id = create_resp.id
         started = time.time()
 
         while time.time() - started < self.max_wait_seconds:
             task = client.tasks.retrieve(task_id)
-            status = str(getattr(task, "status", "")).upper()
+            source_url = self._task_output_url(task)
+            if source_url:
+                local_path = download_file(source_url, output_path, prefix="runway_video_")
+                return self._result(task_id, source_url, local_path, metadata)
 
-            if status == "SUCCEEDED":
-                outputs = list(getattr(task, "output", []) or [])
-                if not outputs:
-                    raise RuntimeError(f"Runway task succeeded but returned no output URLs: {task}")
+            time.sleep(self.poll_interval)
 
-                source_url = outputs[0]
-                local_path = download_file(source_url, output_path, prefix="runway_video_")
-                return GeneratedVideo(
-                    provider=self.name,
-                    output_path=local_path,
-                    metadata={
-                        "task_id": task_id,
-                        "status": status,
-                        "source_url": source_url,
-                        "duration": normalized_duration,
-                        "ratio": ratio,
-                        "model": model,
-                        "audio": audio,
-                        "used_image_to_video": use_image_to_video,
-                    },
-                )
+        raise RuntimeError(f"Runway generation timed out after {self.max_wait_seconds}s (task {task_id})")
+
+    async def generate_async(self, prompt: str, duration: int = 8, **kwargs: Any) -> GeneratedVideo:
+        """Async variant of :meth:`generate` built on ``AsyncRunwayML``.
 
-            if status == "FAILED":
-                failure = getattr(task, "failure", "unknown failure")
-                failure_code = getattr(task, "failure_code", None)
-                if failure_code:
-                    raise RuntimeError(f"Runway generation failed ({failure_code}): {failure}")
-                raise RuntimeError(f"Runway generation failed: {failure}")
+        Polling yields to the event loop, so one thread can drive many
+        in-flight generations.
+        """
+        client = self._async_client_or_raise()
+        endpoint, create_kwargs, metadata = self._prepare(prompt, duration, kwargs)
+        output_path = kwargs.get("output_path")
 
-            if status in {"CANCELLED", "THROTTLED"}:
-                raise RuntimeError(f"Runway task ended with status {status}")
+        create_resp = await getattr(client, endpoint).create(**create_kwargs)
+        task_id = create_resp.id
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        while loop.time() - started < self.max_wait_seconds:
+            task = await client.tasks.retrieve(task_id)
+            source_url = self._task_output_url(task)
+            if source_url:
+                local_path = await loop.run_in_executor(
+                    None,
+                    functools.partial(download_file, source_url, output_path, prefix="runway_video_"),
+                )
+                return self._result(task_id, source_url, local_path, metadata)
 
-            time.sleep(self.poll_interval)
+            await asyncio.sleep(self.poll_interval)
 
         raise RuntimeError(f"Runway generation timed out after {self.max_wait_seconds}s (task {task_id})")
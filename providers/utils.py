@@ -1,10 +1,134 @@
 from __future__ import annotations
 
+import hashlib
+import os
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CHUNK_SIZE = 1024 * 1024
+
+# Bodies at least this big are fetched as RANGE_PARTS concurrent byte ranges
+# when the server supports them, so a per-connection throttle applies to
+# each part instead of the whole file.
+RANGE_MIN_BYTES = 4 * 1024 * 1024
+RANGE_PARTS = 4
+
+# Set (e.g. from a SIGINT handler) to stop in-flight polls and downloads at
+# their next chunk or poll instead of running to completion.
+CANCEL = threading.Event()
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=20,
+        pool_maxsize=20,
+        max_retries=Retry(total=5, backoff_factor=1, status_forcelist=(502, 503, 504)),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Shared keep-alive pool: CDN redirect hops and repeat downloads from the same
+# host reuse TCP/TLS connections instead of handshaking on every request.
+_SESSION = _build_session()
+
+
+def stream_file(url: str, *, timeout: int = 180, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield the body of a URL in chunks without touching the disk.
+
+    Useful for piping a generated video straight into ffmpeg (``-i pipe:0``)
+    or an upload without an intermediate file.
+    """
+    with _SESSION.get(url, stream=True, timeout=timeout) as resp:
+        resp.raise_for_status()
+        expected = _expected_length(resp)
+        received = 0
+        for chunk in resp.iter_content(chunk_size=chunk_size):
+            if chunk:
+                received += len(chunk)
+                yield chunk
+
+        if expected is not None and received != expected:
+            raise RuntimeError(f"Truncated download from {url}: got {received} of {expected} bytes")
+
+
+def _expected_length(resp: requests.Response) -> Optional[int]:
+    """Body size promised by the server, if it can be compared to decoded bytes."""
+    if resp.headers.get("Content-Encoding", "identity").lower() != "identity":
+        return None
+    try:
+        return int(resp.headers["Content-Length"])
+    except (KeyError, ValueError):
+        return None
+
+
+def _range_target(url: str, timeout: int) -> Optional[Tuple[str, int]]:
+    """(final URL, size) if the server serves byte ranges of a plain body, else None."""
+    try:
+        resp = _SESSION.head(url, allow_redirects=True, timeout=timeout)
+    except requests.RequestException:
+        return None
+    if resp.status_code != 200 or resp.headers.get("Accept-Ranges", "").lower() != "bytes":
+        return None
+    length = _expected_length(resp)
+    return (resp.url, length) if length else None
+
+
+def _fetch_range(
+    url: str,
+    fd: int,
+    start: int,
+    end: int,
+    timeout: int,
+    abort: Optional[threading.Event] = None,
+) -> None:
+    """Write bytes start..end (inclusive) of url at the same offsets in fd.
+
+    Stops between chunks once ``abort`` or the global ``CANCEL`` is set.
+    """
+    headers = {"Range": f"bytes={start}-{end}", "Accept-Encoding": "identity"}
+    offset = start
+    with _SESSION.get(url, headers=headers, stream=True, timeout=timeout) as resp:
+        resp.raise_for_status()
+        if resp.status_code != 206:
+            raise RuntimeError(f"Range request to {url} was answered with HTTP {resp.status_code}")
+        for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+            if CANCEL.is_set() or (abort is not None and abort.is_set()):
+                raise RuntimeError(f"Range download from {url} cancelled")
+            if chunk:
+                os.pwrite(fd, chunk, offset)
+                offset += len(chunk)
+    if offset != end + 1:
+        raise RuntimeError(f"Truncated range from {url}: got {offset - start} of {end + 1 - start} bytes")
+
+
+def _download_ranges(url: str, f, length: int, parts: int, timeout: int) -> None:
+    f.truncate(length)
+    step = -(-length // parts)
+    # The first part to fail stops its peers, so a dead URL costs one chunk
+    # per part rather than the whole file.
+    abort = threading.Event()
+
+    def fetch(start: int) -> None:
+        try:
+            _fetch_range(url, f.fileno(), start, min(start + step, length) - 1, timeout, abort)
+        except BaseException:
+            abort.set()
+            raise
+
+    with ThreadPoolExecutor(max_workers=parts) as pool:
+        futures = [pool.submit(fetch, start) for start in range(0, length, step)]
+        for future in futures:
+            future.result()
 
 
 def download_file(
@@ -13,25 +137,53 @@ def download_file(
     *,
     prefix: str = "video_",
     timeout: int = 180,
+    sha256: Optional[str] = None,
+    parts: int = RANGE_PARTS,
 ) -> Path:
-    """Download a URL to a local file and return its path."""
+    """Download a URL to a local file and return its path.
+
+    Large bodies from servers that accept byte ranges are fetched as
+    ``parts`` concurrent ranges; everything else is streamed in one request.
+    The byte count is checked against Content-Length either way; pass
+    ``sha256`` to also verify the content digest.
+    """
     if output_path:
         dest = Path(output_path)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        handle = open(dest, "w+b")
     else:
-        fd, temp_name = tempfile.mkstemp(prefix=prefix, suffix=".mp4")
-        Path(temp_name).unlink(missing_ok=True)
-        dest = Path(temp_name)
+        # Write straight into the already-open temp file; no close/unlink/reopen race.
+        handle = tempfile.NamedTemporaryFile(prefix=prefix, suffix=".mp4", delete=False)
+        dest = Path(handle.name)
 
-    dest.parent.mkdir(parents=True, exist_ok=True)
-
-    with requests.get(url, stream=True, timeout=timeout) as resp:
-        resp.raise_for_status()
-        with open(dest, "wb") as f:
-            for chunk in resp.iter_content(chunk_size=1024 * 1024):
-                if chunk:
+    target = _range_target(url, timeout) if parts > 1 and hasattr(os, "pwrite") else None
+    digest = hashlib.sha256() if sha256 else None
+    written = 0
+    try:
+        with handle as f:
+            if target is not None and target[1] >= RANGE_MIN_BYTES:
+                _download_ranges(target[0], f, target[1], parts, timeout)
+                written = target[1]
+                if digest is not None:
+                    f.seek(0)
+                    for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                        digest.update(chunk)
+            else:
+                for chunk in stream_file(url, timeout=timeout):
+                    if CANCEL.is_set():
+                        raise RuntimeError(f"Download from {url} cancelled")
                     f.write(chunk)
+                    written += len(chunk)
+                    if digest is not None:
+                        digest.update(chunk)
+
+        if not written:
+            raise RuntimeError(f"Downloaded file is empty: {dest}")
 
-    if not dest.exists() or dest.stat().st_size < 1024:
-        raise RuntimeError(f"Downloaded file is empty or too small: {dest}")
+        if digest is not None and digest.hexdigest() != sha256.lower():
+            raise RuntimeError(f"Checksum mismatch for {dest}: expected {sha256}, got {digest.hexdigest()}")
+    except Exception:
+        dest.unlink(missing_ok=True)
+        raise
 
     return dest
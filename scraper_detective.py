@@ -12,19 +12,33 @@ Zero external dependencies — uses only Python stdlib.
 """
 
 import hashlib
+import heapq
 import hmac
 import json
 import math
+import operator
 import os
+import queue
+import re
+import select
 import socket
 import struct
+import sys
 import threading
 import time
-from collections import deque
-from typing import Dict, List, Tuple
+from array import array
+from bisect import bisect_right
+from collections import Counter, OrderedDict, deque
+from itertools import count, islice
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
 
 from flask import Blueprint, Response, jsonify, request
 
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is the fallback
+    orjson = None
+
 scraper_bp = Blueprint("scraper_detective", __name__)
 
 # ---------------------------------------------------------------------------
@@ -70,30 +84,339 @@ SEARCH_ENGINE_UA_SIGS = ("googlebot", "bingbot", "yandex", "slurp", "baiduspider
 _ASSET_PREFIXES = ("/static/", "/thumbnails/", "/avatars/", "/avatar/",
                    "/badge/", "/stats/", "/favicon.ico")
 _API_PREFIX = "/api/"
+# Same prefixes as one anchored pattern: a single C-level match per request.
+_ASSET_MATCH = re.compile("|".join(map(re.escape, _ASSET_PREFIXES))).match
+
+_NUMERIC_TAIL_RE = re.compile(r"^(.*)/([0-9]+)$")
+
+
+def _split_numeric_tail(path: str) -> Optional[Tuple[str, int]]:
+    """Split '/video/42/' into ('/video', 42); None if the last segment isn't numeric.
+
+    The prefix is interned so the prefix equality in _is_sequential is
+    usually decided by identity rather than a character compare.
+    """
+    m = _NUMERIC_TAIL_RE.match(path.rstrip("/"))
+    return (sys.intern(m.group(1)), int(m.group(2))) if m else None
+
+
+def _is_sequential(t1, t2, t3) -> bool:
+    """True if three split paths share a prefix and have consecutive ids."""
+    # Cheapest checks first: most triples fail on the id step before prefixes
+    return bool(t1 and t2 and t3
+                and t2[1] == t1[1] + 1 and t3[1] == t2[1] + 1
+                and t1[0] == t2[0] == t3[0])
+
+
+_KNOWN_SCRAPERS_LOWER: Optional[Tuple[Tuple[str, str], ...]] = None
+_KNOWN_SCRAPERS_RE = None
+
+
+def _known_scrapers() -> Tuple[Tuple[str, str], ...]:
+    """(lowercased, original) KNOWN_SCRAPERS signatures, imported once on first use.
+
+    Imported lazily because bottube_server itself imports this module.
+    """
+    global _KNOWN_SCRAPERS_LOWER, _KNOWN_SCRAPERS_RE
+    if _KNOWN_SCRAPERS_LOWER is None:
+        try:
+            from bottube_server import KNOWN_SCRAPERS
+        except ImportError:
+            KNOWN_SCRAPERS = {}
+        pairs = tuple((sig.lower(), sig) for sig in KNOWN_SCRAPERS)
+        _KNOWN_SCRAPERS_RE = _any_substring_re(lower for lower, _ in pairs)
+        _KNOWN_SCRAPERS_LOWER = pairs
+    return _KNOWN_SCRAPERS_LOWER
+
+
+def _any_substring_re(needles):
+    """One alternation over all needles (a single C scan per haystack); None if empty."""
+    needles = sorted(set(needles), key=len, reverse=True)
+    return re.compile("|".join(map(re.escape, needles))) if needles else None
+
+
+def _first_contained(ua_lower: str, pattern, needles) -> Optional[str]:
+    """First needle, in priority order, contained in ua_lower.
+
+    The regex rejects the common no-match case in one pass; on a hit the
+    ordered scan keeps the original first-signature-wins priority.
+    """
+    if pattern is None or pattern.search(ua_lower) is None:
+        return None
+    for needle in needles:
+        if needle in ua_lower:
+            return needle
+    return None
+
+
+def _match_known_scraper(ua_lower: str) -> Optional[str]:
+    """Original-case KNOWN_SCRAPERS signature found in ua_lower, if any."""
+    pairs = _known_scrapers()
+    hit = _first_contained(ua_lower, _KNOWN_SCRAPERS_RE, (lower for lower, _ in pairs))
+    if hit is None:
+        return None
+    return next(sig for lower, sig in pairs if lower == hit)
+
+
+_SEARCH_ENGINE_RE = _any_substring_re(SEARCH_ENGINE_UA_SIGS)
+
+
+# ---------------------------------------------------------------------------
+# DNS wire format helpers (shared by every resolver path)
+# ---------------------------------------------------------------------------
+
+def _build_txt_query(domain: str, txn_id: bytes) -> bytes:
+    """Build a recursive TXT/IN query packet for domain."""
+    header = txn_id + b'\x01\x00\x00\x01\x00\x00\x00\x00\x00\x00'
+
+    question = b''
+    for label in domain.split('.'):
+        question += bytes([len(label)]) + label.encode('ascii')
+    question += b'\x00\x00\x10\x00\x01'  # TXT, IN
+    return header + question
+
+
+_unpack_u16 = struct.Struct("!H").unpack_from
+_unpack_rr = struct.Struct("!HHIH").unpack_from  # TYPE, CLASS, TTL, RDLENGTH
+
+
+def _parse_asn_txt(data: bytes) -> int:
+    """Extract the ASN from a Team Cymru TXT answer. Returns 0 if absent."""
+    size = len(data)
+    if size < 12:
+        return 0
+    ancount = _unpack_u16(data, 6)[0]
+    if not ancount:
+        return 0
+
+    # Skip header (12 bytes) and the question section
+    offset = 12
+    while offset < size and data[offset] != 0:
+        if data[offset] & 0xC0 == 0xC0:
+            offset += 2
+            break
+        offset += 1 + data[offset]
+    else:
+        offset += 1
+    offset += 4  # QTYPE + QCLASS
+
+    # Read answer RRs
+    for _ in range(ancount):
+        if offset >= size:
+            break
+        # Skip name (possibly compressed)
+        if data[offset] & 0xC0 == 0xC0:
+            offset += 2
+        else:
+            while offset < size and data[offset] != 0:
+                offset += 1 + data[offset]
+            offset += 1
+        if offset + 10 > size:
+            break
+        rtype, _rclass, _ttl, rdlength = _unpack_rr(data, offset)
+        offset += 10
+        if rtype == 16 and offset < size:  # TXT
+            txt_len = data[offset]
+            txt = data[offset + 1:offset + 1 + txt_len].decode("ascii", errors="replace")
+            # Format: "ASN | IP | prefix | CC | registry"
+            try:
+                return int(txt.split("|", 1)[0].strip())
+            except ValueError:
+                pass
+        offset += rdlength
+    return 0
+
+
+def _signal_text(value) -> str:
+    """Render one signal value the way the dashboard displays it."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, separators=(",", ":"))
+    return str(value)
+
+
+def _json_bytes(obj) -> bytes:
+    """Compact UTF-8 JSON for the dashboard payloads, via orjson when installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:  # e.g. ints beyond 64 bits; let stdlib handle it
+            pass
+    return json.dumps(obj, separators=(",", ":")).encode()
 
 
 # ---------------------------------------------------------------------------
 # BehaviorWindow — per-IP sliding window tracking
 # ---------------------------------------------------------------------------
 
+class BehaviorStats(NamedTuple):
+    """Point-in-time BehaviorWindow figures used by classify()."""
+    n: int
+    n_intervals: int
+    mean_interval: float
+    interval_variance: float
+    span: float
+    seq_runs: int
+    unique_paths: int
+    deep_count: int
+    page_count: int
+    asset_count: int
+    api_count: int
+    ua_count: int
+    ref_count: int
+
+
 class BehaviorWindow:
-    """Sliding window of request data for behavioral analysis."""
-    __slots__ = ("timestamps", "paths", "asset_count", "page_count",
+    """Sliding window of request data for behavioral analysis.
+
+    Timestamps live in a fixed array('d') ring buffer (unboxed float64, no
+    per-request allocation) rather than a deque of Python floats. Interval
+    sums, the sequential-crawl counter and the unique/deep path counts are
+    maintained on insert so that classify() reads them in O(1) instead of
+    rescanning the window.
+    """
+    __slots__ = ("_ts", "_ts_head", "_ts_n", "_iv_sum", "_iv_sqsum",
+                 "paths", "_tails", "seq_runs", "unique_paths", "deep_count",
+                 "asset_count", "page_count",
                  "api_count", "referrers", "user_agents", "last_seen", "created")
 
-    def __init__(self):
-        self.timestamps: deque = deque(maxlen=500)
-        self.paths: deque = deque(maxlen=200)
+    TS_WINDOW = 500
+    PATH_WINDOW = 200
+
+    def __init__(self, now: Optional[float] = None):
+        self._ts = array("d", bytes(8 * self.TS_WINDOW))
+        self._ts_head: int = 0  # next slot to write
+        self._ts_n: int = 0
+        self._iv_sum: float = 0.0
+        self._iv_sqsum: float = 0.0
+        self.paths: deque = deque(maxlen=self.PATH_WINDOW)
+        self._tails: deque = deque(maxlen=self.PATH_WINDOW)  # _split_numeric_tail per path
+        self.seq_runs: int = 0
+        self.unique_paths: Counter = Counter()  # path -> occurrences in window
+        self.deep_count: int = 0  # paths in window with 2+ slashes
         self.asset_count: int = 0
         self.page_count: int = 0
         self.api_count: int = 0
         self.referrers: set = set()
         self.user_agents: set = set()
         self.last_seen: float = 0.0
-        self.created: float = time.time()
+        self.created: float = time.time() if now is None else now
+
+    def append_ts(self, now: float):
+        ts, head, n = self._ts, self._ts_head, self._ts_n
+        if n:
+            iv = now - ts[head - 1]
+            self._iv_sum += iv
+            self._iv_sqsum += iv * iv
+        if n == self.TS_WINDOW:
+            # The oldest timestamp is overwritten; drop its interval to the next one.
+            iv = ts[(head + 1) % self.TS_WINDOW] - ts[head]
+            self._iv_sum -= iv
+            self._iv_sqsum -= iv * iv
+        ts[head] = now
+        self._ts_head = (head + 1) % self.TS_WINDOW
+        if n < self.TS_WINDOW:
+            self._ts_n = n + 1
+        elif self._ts_head == 0:
+            self._resync_intervals()
+
+    def _resync_intervals(self):
+        """Recompute running sums exactly once per lap to cancel float drift."""
+        snap = self.ts_snapshot()
+        intervals = list(map(operator.sub, islice(snap, 1, None), snap))
+        self._iv_sum = math.fsum(intervals)
+        self._iv_sqsum = math.fsum(map(operator.mul, intervals, intervals))
+
+    def append_path(self, path: str):
+        tails = self._tails
+        if len(tails) == self.PATH_WINDOW:
+            if _is_sequential(tails[0], tails[1], tails[2]):
+                self.seq_runs -= 1
+            evicted = self.paths[0]
+            remaining = self.unique_paths[evicted] - 1
+            if remaining:
+                self.unique_paths[evicted] = remaining
+            else:
+                del self.unique_paths[evicted]
+            if evicted.count("/") >= 2:
+                self.deep_count -= 1
+        self.paths.append(path)
+        self.unique_paths[path] += 1
+        if path.count("/") >= 2:
+            self.deep_count += 1
+        tails.append(_split_numeric_tail(path))
+        if len(tails) >= 3 and _is_sequential(tails[-3], tails[-2], tails[-1]):
+            self.seq_runs += 1
+
+    def ts_snapshot(self) -> array:
+        """Timestamps oldest-first as a contiguous array copy."""
+        if self._ts_n < self.TS_WINDOW:
+            return self._ts[:self._ts_n]
+        head = self._ts_head
+        return self._ts[head:] + self._ts[:head]
+
+    def timing_stats(self) -> Tuple[int, float, float]:
+        """(interval_count, mean_interval, interval_variance) over the window."""
+        k = self._ts_n - 1
+        if k <= 0:
+            return 0, 0.0, 0.0
+        mean = self._iv_sum / k
+        return k, mean, max(self._iv_sqsum / k - mean * mean, 0.0)
+
+    def span(self) -> float:
+        """Seconds between the oldest and newest timestamps in the window."""
+        if self._ts_n < 2:
+            return 0.0
+        oldest = self._ts[self._ts_head] if self._ts_n == self.TS_WINDOW else self._ts[0]
+        return self._ts[self._ts_head - 1] - oldest
+
+    @property
+    def request_count(self) -> int:
+        return self._ts_n
+
+    def stats(self) -> "BehaviorStats":
+        """Immutable snapshot of everything classify() needs (caller holds the lock)."""
+        n_iv, mean_iv, var_iv = self.timing_stats()
+        return BehaviorStats(
+            self._ts_n, n_iv, mean_iv, var_iv, self.span(), self.seq_runs,
+            len(self.unique_paths), self.deep_count, self.page_count,
+            self.asset_count, self.api_count, len(self.user_agents), len(self.referrers),
+        )
+
+    def count_since(self, cutoff: float) -> int:
+        """Number of recorded timestamps newer than cutoff.
+
+        The ring holds at most two ascending runs, so this is two binary
+        searches rather than a scan.
+        """
+        ts, n, head = self._ts, self._ts_n, self._ts_head
+        if n < self.TS_WINDOW:
+            return n - bisect_right(ts, cutoff, 0, n)
+        return (n - bisect_right(ts, cutoff, head, n)) + (head - bisect_right(ts, cutoff, 0, head))
+
+    def is_expired(self, ttl: float, now: Optional[float] = None) -> bool:
+        if not self.last_seen:
+            return True
+        return ((time.time() if now is None else now) - self.last_seen) > ttl
+
+
+class JsProof:
+    """Per-IP JS challenge state (fixed slots instead of a 5-key dict)."""
+    __slots__ = ("proved", "proved_at", "page_views", "webdriver_detected", "no_plugins")
 
-    def is_expired(self, ttl: float) -> bool:
-        return (time.time() - self.last_seen) > ttl if self.last_seen else True
+    def __init__(self):
+        self.proved: bool = False
+        self.proved_at: float = 0.0
+        self.page_views: int = 0
+        self.webdriver_detected: bool = False
+        self.no_plugins: bool = False
+
+
+# Shared read-only default for IPs with no JS proof entry yet
+_NO_JS_PROOF = JsProof()
 
 
 # ---------------------------------------------------------------------------
@@ -109,20 +432,34 @@ class ScraperDetective:
         )).encode()
 
         # Layer 1: ASN cache — ip -> (asn_num, asn_name, is_hosting, lookup_time)
-        self._asn_cache: Dict[str, Tuple[int, str, bool, float]] = {}
+        # OrderedDict kept in LRU order: hits move to the end, eviction pops the front.
+        # Readers never take _asn_cache_lock: get()/move_to_end() are single C calls
+        # (atomic under the GIL). The lock only serialises writers and eviction.
+        self._asn_cache: "OrderedDict[str, Tuple[int, str, bool, float]]" = OrderedDict()
         self._asn_cache_lock = threading.Lock()
         self._ASN_CACHE_MAX = 10_000
         self._ASN_CACHE_TTL = 86400  # 24h
+        self._DNS_BATCH = 64
+        self._DNS_TIMEOUT = 3.0
 
         self._asn_pending: set = set()
         self._asn_pending_lock = threading.Lock()
+        # Lookups are queued to one DNS pump thread that pipelines them over a single socket
+        self._dns_queue: "queue.Queue[str]" = queue.Queue()
 
-        # Layer 2: JS proof — ip -> {proved, proved_at, page_views, webdriver_detected, no_plugins}
-        self._js_proof: Dict[str, dict] = {}
+        # Layer 2: JS proof — ip -> JsProof
+        self._js_proof: Dict[str, JsProof] = {}
 
         # Layer 3: Behavioral — ip -> BehaviorWindow
-        self._behavior: Dict[str, BehaviorWindow] = {}
-        self._behavior_lock = threading.Lock()
+        # Striped across _BEHAVIOR_SHARDS dict+lock pairs so unrelated IPs don't contend.
+        self._BEHAVIOR_SHARDS = 16  # power of two: shard = hash(ip) & (N - 1)
+        self._behavior_shards: List[Dict[str, BehaviorWindow]] = [
+            {} for _ in range(self._BEHAVIOR_SHARDS)]
+        self._behavior_locks: List[threading.Lock] = [
+            threading.Lock() for _ in range(self._BEHAVIOR_SHARDS)]
+        # Per-shard min-heap of (expire_time, ip), one entry per IP; guarded by the shard lock
+        self._behavior_expiry: List[List[Tuple[float, str]]] = [
+            [] for _ in range(self._BEHAVIOR_SHARDS)]
         self._BEHAVIOR_TTL = 3600  # 1h
 
         # IP blocklist (admin-set)
@@ -131,14 +468,35 @@ class ScraperDetective:
         # Classification cache — ip -> (label, score, signals, expire_time)
         self._class_cache: Dict[str, Tuple[str, float, dict, float]] = {}
         self._CLASS_CACHE_TTL = 30  # seconds
+        self._class_expiry: List[Tuple[float, str]] = []  # min-heap of (expire_time, ip)
+        self._class_expiry_lock = threading.Lock()
+        # ip -> (signals, {name: display string}); reused while classify() keeps
+        # returning the same cached signals dict, dropped with its cache entry.
+        self._signal_texts: Dict[str, Tuple[dict, Dict[str, str]]] = {}
+
+        # State version — bumped on every mutation the dashboard can see, so
+        # /api/admin/scrapers can answer unchanged polls with 304. next() on
+        # itertools.count is atomic under the GIL, so writers need no lock.
+        self._versions = count(1)
+        self._version = 0
+        self._epoch = os.urandom(4).hex()  # distinguishes restarts
+
+        # Dashboard summary memo — (computed_at, summary)
+        self._summary_cache: Optional[Tuple[float, dict]] = None
+        self._SUMMARY_TTL = 2.0  # seconds
 
         # DNS resolver address
         self._resolver = self._find_resolver()
+        self._resolver_addr = (self._resolver, 53)
+        self._tls = threading.local()  # per-thread socket for blocking _dns_txt_query
 
         # Background cleanup
         t = threading.Thread(target=self._cleanup_loop, daemon=True)
         t.start()
 
+        # Background ASN resolution
+        threading.Thread(target=self._dns_pump, name="asn-dns-pump", daemon=True).start()
+
     # ------------------------------------------------------------------
     # Layer 1: ASN lookup via Team Cymru DNS
     # ------------------------------------------------------------------
@@ -159,112 +517,156 @@ class ScraperDetective:
         return "127.0.0.53"
 
     def _dns_txt_query(self, domain: str) -> int:
-        """Raw UDP DNS TXT query. Returns ASN number or 0."""
-        try:
-            # Build DNS query packet
-            txn_id = os.urandom(2)
-            header = txn_id + b'\x01\x00\x00\x01\x00\x00\x00\x00\x00\x00'
+        """Raw UDP DNS TXT query. Returns ASN number or 0.
 
-            question = b''
-            for label in domain.split('.'):
-                question += bytes([len(label)]) + label.encode('ascii')
-            question += b'\x00\x00\x10\x00\x01'  # TXT, IN
+        Reuses one UDP socket per calling thread; UDP has no connection state,
+        so there is nothing to gain from a socket()/close() pair per lookup.
+        """
+        sock = getattr(self._tls, "dns_sock", None)
+        try:
+            if sock is None:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                sock.settimeout(self._DNS_TIMEOUT)
+                self._tls.dns_sock = sock
 
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(3.0)
-            try:
-                sock.sendto(header + question, (self._resolver, 53))
-                data, _ = sock.recvfrom(1024)
-            finally:
+            txn_id = os.urandom(2)
+            sock.sendto(_build_txt_query(domain, txn_id), self._resolver_addr)
+            while True:
+                data = sock.recv(1024)
+                if data[:2] == txn_id:
+                    return _parse_asn_txt(data)
+                # Late reply to an earlier, timed-out query on this socket: skip it
+        except Exception:
+            if sock is not None:
                 sock.close()
+            self._tls.dns_sock = None
+        return 0
 
-            # Parse response — skip header (12 bytes), skip question section
-            offset = 12
-            while offset < len(data) and data[offset] != 0:
-                if data[offset] & 0xC0 == 0xC0:
-                    offset += 2
-                    break
-                offset += 1 + data[offset]
-            else:
-                offset += 1
-            offset += 4  # QTYPE + QCLASS
+    @staticmethod
+    def _asn_domain(ip: str) -> Optional[str]:
+        """Team Cymru origin lookup name for an IPv4 address, None if not IPv4."""
+        parts = ip.split(".")
+        if len(parts) != 4:
+            return None
+        return ".".join(reversed(parts)) + ".origin.asn.cymru.com"
 
-            # Read answer RRs
-            ancount = struct.unpack("!H", data[6:8])[0]
-            for _ in range(ancount):
-                if offset >= len(data):
-                    break
-                # Skip name (possibly compressed)
-                if data[offset] & 0xC0 == 0xC0:
-                    offset += 2
-                else:
-                    while offset < len(data) and data[offset] != 0:
-                        offset += 1 + data[offset]
-                    offset += 1
-                if offset + 10 > len(data):
-                    break
-                rtype = struct.unpack("!H", data[offset:offset + 2])[0]
-                rdlength = struct.unpack("!H", data[offset + 8:offset + 10])[0]
-                offset += 10
-                if rtype == 16 and offset < len(data):  # TXT
-                    txt_len = data[offset]
-                    txt = data[offset + 1:offset + 1 + txt_len].decode("ascii", errors="replace")
-                    # Format: "ASN | IP | prefix | CC | registry"
-                    parts = txt.split("|")
-                    if parts:
-                        try:
-                            return int(parts[0].strip())
-                        except ValueError:
-                            pass
-                offset += rdlength
-        except Exception:
-            pass
-        return 0
+    @staticmethod
+    def _asn_result(asn_num: int) -> Tuple[int, str, bool]:
+        if not asn_num:
+            return 0, "unknown", False
+        is_hosting = asn_num in HOSTING_ASNS
+        name = HOSTING_ASNS.get(asn_num, SEARCH_ENGINE_ASNS.get(asn_num, f"AS{asn_num}"))
+        return asn_num, name, is_hosting
 
     def _lookup_asn(self, ip: str) -> Tuple[int, str, bool]:
-        """Perform ASN lookup for IPv4 address."""
+        """Perform a single blocking ASN lookup for IPv4 address."""
         try:
-            parts = ip.split(".")
-            if len(parts) != 4:
+            domain = self._asn_domain(ip)
+            if domain is None:
                 return 0, "invalid_ip", False
-            reversed_ip = ".".join(reversed(parts))
-            domain = f"{reversed_ip}.origin.asn.cymru.com"
-            asn_num = self._dns_txt_query(domain)
-            if not asn_num:
-                return 0, "unknown", False
-            is_hosting = asn_num in HOSTING_ASNS
-            name = HOSTING_ASNS.get(asn_num, SEARCH_ENGINE_ASNS.get(asn_num, f"AS{asn_num}"))
-            return asn_num, name, is_hosting
+            return self._asn_result(self._dns_txt_query(domain))
         except Exception:
             return 0, "lookup_failed", False
 
+    def _lookup_asn_batch(self, sock: socket.socket, ips: List[str]) -> Dict[str, Tuple[int, str, bool]]:
+        """Pipelined ASN lookups: send every query, then collect replies by txn id.
+
+        Replies are matched on transaction id *and* echoed question, so a late
+        answer from an earlier batch can't be attributed to the wrong IP.
+        """
+        results: Dict[str, Tuple[int, str, bool]] = {}
+        inflight: Dict[bytes, Tuple[str, bytes]] = {}
+        for ip in ips:
+            domain = self._asn_domain(ip)
+            if domain is None:
+                results[ip] = (0, "invalid_ip", False)
+                continue
+            txn_id = os.urandom(2)
+            while txn_id in inflight:
+                txn_id = os.urandom(2)
+            query = _build_txt_query(domain, txn_id)
+            try:
+                sock.sendto(query, self._resolver_addr)
+            except OSError:
+                results[ip] = (0, "lookup_failed", False)
+                continue
+            inflight[txn_id] = (ip, query[12:])
+
+        deadline = time.monotonic() + self._DNS_TIMEOUT
+        while inflight:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([sock], [], [], remaining)[0]:
+                break
+            while True:
+                try:
+                    data = sock.recv(1024)
+                except (BlockingIOError, InterruptedError):
+                    break
+                except OSError:
+                    break
+                entry = inflight.get(data[:2])
+                if entry is None or data[12:12 + len(entry[1])] != entry[1]:
+                    continue
+                del inflight[data[:2]]
+                try:
+                    results[entry[0]] = self._asn_result(_parse_asn_txt(data))
+                except Exception:
+                    results[entry[0]] = (0, "lookup_failed", False)
+
+        for ip, _question in inflight.values():
+            results[ip] = (0, "unknown", False)  # timed out, same as a failed single query
+        return results
+
+    def _store_asn(self, ip: str, info: Tuple[int, str, bool]):
+        with self._asn_cache_lock:
+            if ip not in self._asn_cache and len(self._asn_cache) >= self._ASN_CACHE_MAX:
+                self._asn_cache.popitem(last=False)
+            self._asn_cache[ip] = (info[0], info[1], info[2], time.time())
+            self._asn_cache.move_to_end(ip)
+        self._version = next(self._versions)
+
+    def _dns_pump(self):
+        """Drain queued IPs in batches of up to _DNS_BATCH and resolve them together."""
+        sock = None
+        while True:
+            batch = [self._dns_queue.get()]
+            while len(batch) < self._DNS_BATCH:
+                try:
+                    batch.append(self._dns_queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if sock is None:
+                    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                    sock.setblocking(False)
+                results = self._lookup_asn_batch(sock, batch)
+                for ip in batch:
+                    self._store_asn(ip, results.get(ip, (0, "lookup_failed", False)))
+            except Exception:
+                if sock is not None:
+                    sock.close()
+                    sock = None
+            finally:
+                with self._asn_pending_lock:
+                    self._asn_pending.difference_update(batch)
+
     def _async_asn_lookup(self, ip: str):
         """Schedule background ASN lookup."""
         with self._asn_pending_lock:
             if ip in self._asn_pending:
                 return
             self._asn_pending.add(ip)
+        self._dns_queue.put(ip)
 
-        def _do():
-            try:
-                asn_num, asn_name, is_hosting = self._lookup_asn(ip)
-                with self._asn_cache_lock:
-                    if len(self._asn_cache) >= self._ASN_CACHE_MAX:
-                        oldest = min(self._asn_cache, key=lambda k: self._asn_cache[k][3])
-                        del self._asn_cache[oldest]
-                    self._asn_cache[ip] = (asn_num, asn_name, is_hosting, time.time())
-            finally:
-                with self._asn_pending_lock:
-                    self._asn_pending.discard(ip)
-
-        threading.Thread(target=_do, daemon=True).start()
-
-    def get_asn_info(self, ip: str) -> Tuple[int, str, bool]:
+    def get_asn_info(self, ip: str, now: Optional[float] = None) -> Tuple[int, str, bool]:
         """Get ASN info (cached or async). Returns (asn_num, name, is_hosting)."""
-        with self._asn_cache_lock:
-            cached = self._asn_cache.get(ip)
-            if cached and (time.time() - cached[3]) < self._ASN_CACHE_TTL:
-                return cached[0], cached[1], cached[2]
+        cached = self._asn_cache.get(ip)
+        if cached and ((time.time() if now is None else now) - cached[3]) < self._ASN_CACHE_TTL:
+            try:
+                self._asn_cache.move_to_end(ip)
+            except KeyError:  # evicted by a concurrent writer; the value we read is still valid
+                pass
+            return cached[0], cached[1], cached[2]
         self._async_asn_lookup(ip)
         return 0, "pending", False
 
@@ -272,57 +674,88 @@ class ScraperDetective:
     # Layer 2: JS challenge proof
     # ------------------------------------------------------------------
 
-    def record_js_proof(self, ip: str):
+    def _js_entry(self, ip: str) -> JsProof:
+        entry = self._js_proof.get(ip)
+        if entry is None:
+            entry = self._js_proof[ip] = JsProof()
+        return entry
+
+    def record_js_proof(self, ip: str, webdriver: bool = False, no_plugins: bool = False):
         """Record that an IP executed JavaScript (called /api/bt-proof)."""
-        entry = self._js_proof.setdefault(ip, {
-            "proved": False, "proved_at": 0.0, "page_views": 0
-        })
-        entry["proved"] = True
-        entry["proved_at"] = time.time()
+        entry = self._js_entry(ip)
+        entry.proved = True
+        entry.proved_at = time.time()
+        if webdriver:
+            entry.webdriver_detected = True
+        if no_plugins:
+            entry.no_plugins = True
+        self._version = next(self._versions)
 
     def record_page_view(self, ip: str):
         """Increment page view counter for JS proof tracking."""
-        entry = self._js_proof.setdefault(ip, {
-            "proved": False, "proved_at": 0.0, "page_views": 0
-        })
-        entry["page_views"] = entry.get("page_views", 0) + 1
+        self._js_entry(ip).page_views += 1
+        self._version = next(self._versions)
+
+    def sign_proof(self, message: str) -> str:
+        """Hex HMAC-SHA256 tag binding a proof token to this server's secret.
+
+        hmac.digest() is the one-shot C path — no per-call HMAC object.
+        """
+        return hmac.digest(self._hmac_secret, message.encode(), "sha256").hex()
+
+    def verify_proof(self, message: str, tag: str) -> bool:
+        """Constant-time check of a tag produced by sign_proof()."""
+        return hmac.compare_digest(self.sign_proof(message), tag or "")
 
     # ------------------------------------------------------------------
     # Layer 3: Behavioral recording
     # ------------------------------------------------------------------
 
+    def _behavior_shard(self, ip: str) -> Tuple[Dict[str, BehaviorWindow], threading.Lock]:
+        idx = hash(ip) & (self._BEHAVIOR_SHARDS - 1)
+        return self._behavior_shards[idx], self._behavior_locks[idx]
+
+    def _behavior_heap(self, ip: str) -> List[Tuple[float, str]]:
+        return self._behavior_expiry[hash(ip) & (self._BEHAVIOR_SHARDS - 1)]
+
     def record_request(self, ip: str, ua: str, path: str,
                        visitor_id: str, is_new: bool, referrer: str = ""):
         """Record a request for all 3 detection layers. Called from track_visitors()."""
         now = time.time()
 
         # Layer 1: trigger async ASN lookup
-        self.get_asn_info(ip)
+        self.get_asn_info(ip, now)
 
         # Layer 2: count page views
-        is_asset = any(path.startswith(p) for p in _ASSET_PREFIXES)
+        is_asset = _ASSET_MATCH(path) is not None
         is_api = path.startswith(_API_PREFIX)
         if not is_asset and not is_api:
             self.record_page_view(ip)
 
         # Layer 3: behavioral window
-        with self._behavior_lock:
-            bw = self._behavior.get(ip)
-            if not bw or bw.is_expired(self._BEHAVIOR_TTL):
-                bw = BehaviorWindow()
-                self._behavior[ip] = bw
-            bw.timestamps.append(now)
-            bw.paths.append(path)
+        shard, lock = self._behavior_shard(ip)
+        with lock:
+            bw = shard.get(ip)
+            if not bw or bw.is_expired(self._BEHAVIOR_TTL, now):
+                if bw is None:
+                    # Replacing an expired window reuses the IP's existing heap entry
+                    heapq.heappush(self._behavior_heap(ip), (now + self._BEHAVIOR_TTL, ip))
+                bw = BehaviorWindow(now)
+                shard[ip] = bw
+            bw.append_ts(now)
+            bw.append_path(path)
             bw.last_seen = now
-            bw.user_agents.add(ua[:128])
+            # Interned: one shared object per distinct (capped) UA/referrer string
+            bw.user_agents.add(sys.intern(ua[:128]))
             if referrer:
-                bw.referrers.add(referrer[:128])
+                bw.referrers.add(sys.intern(referrer[:128]))
             if is_api:
                 bw.api_count += 1
             elif is_asset:
                 bw.asset_count += 1
             else:
                 bw.page_count += 1
+        self._version = next(self._versions)
 
     # ------------------------------------------------------------------
     # IP blocklist
@@ -333,20 +766,34 @@ class ScraperDetective:
 
     def block_ip(self, ip: str):
         self._blocked_ips.add(ip)
+        self._version = next(self._versions)
 
     def unblock_ip(self, ip: str):
         self._blocked_ips.discard(ip)
+        self._version = next(self._versions)
+
+    def state_tag(self, now: Optional[float] = None) -> str:
+        """Opaque tag that changes whenever get_active_visitors() could.
+
+        Besides explicit mutations, visitors age out of the window and the
+        per-minute request rate slides with the clock, so the tag also rolls
+        over once a minute.
+        """
+        now = time.time() if now is None else now
+        return f"{self._epoch}-{self._version}-{int(now // 60)}"
 
     # ------------------------------------------------------------------
     # Classification engine
     # ------------------------------------------------------------------
 
-    def classify(self, ip: str, ua: str = "") -> Tuple[str, float, dict]:
+    def classify(self, ip: str, ua: str = "", now: Optional[float] = None) -> Tuple[str, float, dict]:
         """Classify IP as 'human', 'suspicious', or 'bot'.
         Returns (label, score, signals_dict). Cached 30s per IP.
         """
-        now = time.time()
+        # Fast path: fresh cache hit, before any other work
         cached = self._class_cache.get(ip)
+        if now is None:
+            now = time.time()
         if cached and now < cached[3]:
             return cached[0], cached[1], cached[2]
 
@@ -354,132 +801,103 @@ class ScraperDetective:
         signals = {}
 
         # --- Signal: Known scraper UA ---
-        try:
-            from bottube_server import KNOWN_SCRAPERS
-        except ImportError:
-            KNOWN_SCRAPERS = {}
         ua_lower = (ua or "").lower()
-        for sig in KNOWN_SCRAPERS:
-            if sig.lower() in ua_lower:
-                score += 0.5
-                signals["known_scraper_ua"] = sig
-                break
+        scraper_sig = _match_known_scraper(ua_lower)
+        if scraper_sig is not None:
+            score += 0.5
+            signals["known_scraper_ua"] = scraper_sig
 
         # --- Signal: ASN is hosting provider ---
-        asn_num, asn_name, is_hosting = self.get_asn_info(ip)
+        asn_num, asn_name, is_hosting = self.get_asn_info(ip, now)
         if is_hosting:
             is_legit_engine = False
-            for engine_sig in SEARCH_ENGINE_UA_SIGS:
-                if engine_sig in ua_lower:
-                    if asn_num in SEARCH_ENGINE_ASNS:
-                        is_legit_engine = True
-                        signals["legit_search_engine"] = engine_sig
-                    else:
-                        score += 0.6
-                        signals["spoofed_engine_ua"] = engine_sig
-                    break
+            engine_sig = _first_contained(ua_lower, _SEARCH_ENGINE_RE, SEARCH_ENGINE_UA_SIGS)
+            if engine_sig is not None:
+                if asn_num in SEARCH_ENGINE_ASNS:
+                    is_legit_engine = True
+                    signals["legit_search_engine"] = engine_sig
+                else:
+                    score += 0.6
+                    signals["spoofed_engine_ua"] = engine_sig
             if not is_legit_engine and "spoofed_engine_ua" not in signals:
                 score += 0.3
                 signals["hosting_asn"] = asn_name
 
         # --- Signal: No JS proof after 3+ page views ---
-        js_info = self._js_proof.get(ip, {})
-        page_views = js_info.get("page_views", 0)
-        has_proof = js_info.get("proved", False)
+        js_info = self._js_proof.get(ip) or _NO_JS_PROOF
+        page_views = js_info.page_views
+        has_proof = js_info.proved
         if page_views >= 3 and not has_proof:
             score += 0.3
             signals["no_js_proof"] = f"{page_views}_views"
-        if js_info.get("webdriver_detected"):
+        if js_info.webdriver_detected:
             score += 0.4
             signals["webdriver"] = True
-        if js_info.get("no_plugins"):
+        if js_info.no_plugins:
             score += 0.1
             signals["zero_plugins"] = True
 
         # --- Behavioral signals ---
         bw = None
-        with self._behavior_lock:
-            bw_ref = self._behavior.get(ip)
-            if bw_ref and not bw_ref.is_expired(self._BEHAVIOR_TTL):
-                # Snapshot data under lock
-                bw = {
-                    "ts": list(bw_ref.timestamps),
-                    "paths": list(bw_ref.paths),
-                    "page_count": bw_ref.page_count,
-                    "asset_count": bw_ref.asset_count,
-                    "api_count": bw_ref.api_count,
-                    "ua_count": len(bw_ref.user_agents),
-                    "ref_count": len(bw_ref.referrers),
-                }
-
-        if bw and len(bw["ts"]) >= 5:
-            ts_list = bw["ts"]
+        shard, lock = self._behavior_shard(ip)
+        with lock:
+            bw_ref = shard.get(ip)
+            if bw_ref and not bw_ref.is_expired(self._BEHAVIOR_TTL, now):
+                bw = bw_ref.stats()  # O(1) field reads under the lock, no copies
 
+        if bw and bw.n >= 5:
             # Signal: Timing uniformity (coefficient of variation)
-            intervals = [ts_list[i] - ts_list[i - 1] for i in range(1, len(ts_list))]
-            if intervals:
-                mean_iv = sum(intervals) / len(intervals)
-                if mean_iv > 0.001:
-                    variance = sum((x - mean_iv) ** 2 for x in intervals) / len(intervals)
-                    cv = math.sqrt(variance) / mean_iv
-                    if cv < 0.1:
-                        score += 0.2
-                        signals["timing_uniform"] = round(cv, 4)
+            n_iv, mean_iv, variance = bw.n_intervals, bw.mean_interval, bw.interval_variance
+            if n_iv and mean_iv > 0.001:
+                cv = math.sqrt(variance) / mean_iv
+                if cv < 0.1:
+                    score += 0.2
+                    signals["timing_uniform"] = round(cv, 4)
 
             # Signal: Sequential path crawling
-            paths = bw["paths"]
-            seq_runs = 0
-            for i in range(2, len(paths)):
-                try:
-                    p1 = paths[i - 2].rstrip("/").rsplit("/", 1)
-                    p2 = paths[i - 1].rstrip("/").rsplit("/", 1)
-                    p3 = paths[i].rstrip("/").rsplit("/", 1)
-                    if (len(p1) == 2 and len(p2) == 2 and len(p3) == 2
-                            and p1[0] == p2[0] == p3[0]):
-                        n1, n2, n3 = int(p1[1]), int(p2[1]), int(p3[1])
-                        if n2 == n1 + 1 and n3 == n2 + 1:
-                            seq_runs += 1
-                except (IndexError, ValueError):
-                    pass
+            seq_runs = bw.seq_runs
             if seq_runs >= 2:
                 score += 0.15
                 signals["sequential_crawl"] = seq_runs
 
             # Signal: Asset ratio (pages without assets = bot)
-            if bw["page_count"] > 0:
-                asset_ratio = bw["page_count"] / max(bw["asset_count"], 1)
+            if bw.page_count > 0:
+                asset_ratio = bw.page_count / max(bw.asset_count, 1)
                 if asset_ratio > 5:
                     score += 0.1
                     signals["high_page_asset_ratio"] = round(asset_ratio, 1)
 
             # Signal: Session velocity
-            window_dur = ts_list[-1] - ts_list[0] if len(ts_list) > 1 else 1
+            window_dur = bw.span
             if window_dur > 0:
-                req_per_5min = len(ts_list) / (window_dur / 300)
+                req_per_5min = bw.n / (window_dur / 300)
                 if req_per_5min > 100:
                     score += 0.3
                     signals["high_velocity"] = round(req_per_5min, 0)
 
             # Signal: No referrer on deep pages
-            if bw["ref_count"] == 0 and bw["page_count"] >= 5:
-                deep_count = sum(1 for p in paths if p.count("/") >= 2)
+            if bw.ref_count == 0 and bw.page_count >= 5:
+                deep_count = bw.deep_count
                 if deep_count >= 5:
                     score += 0.05
                     signals["deep_no_referrer"] = deep_count
 
             # Signal: Single UA many paths
-            if bw["ua_count"] == 1 and len(set(paths)) > 30:
+            if bw.ua_count == 1 and bw.unique_paths > 30:
                 score += 0.05
-                signals["single_ua_many_paths"] = len(set(paths))
+                signals["single_ua_many_paths"] = bw.unique_paths
 
             # Signal: API-only behavior (many API calls, zero page views = scraper)
-            if bw["api_count"] >= 5 and bw["page_count"] == 0:
+            if bw.api_count >= 5 and bw.page_count == 0:
                 score += 0.25
-                signals["api_only_no_pages"] = bw["api_count"]
+                signals["api_only_no_pages"] = bw.api_count
 
         score = min(score, 1.0)
         label = "bot" if score >= 0.7 else ("suspicious" if score >= 0.4 else "human")
-        self._class_cache[ip] = (label, score, signals, now + self._CLASS_CACHE_TTL)
+        expire = now + self._CLASS_CACHE_TTL
+        self._class_cache[ip] = (label, score, signals, expire)
+        with self._class_expiry_lock:
+            heapq.heappush(self._class_expiry, (expire, ip))
         return label, score, signals
 
     # ------------------------------------------------------------------
@@ -488,69 +906,97 @@ class ScraperDetective:
 
     def get_active_visitors(self) -> List[dict]:
         """Get all active visitors with classification. Sorted by last_seen desc."""
-        visitors = []
-        with self._behavior_lock:
-            active = {ip: bw for ip, bw in self._behavior.items()
-                      if not bw.is_expired(self._BEHAVIOR_TTL)}
+        return list(self.iter_active_visitors())
 
-        for ip, bw in active.items():
-            ua_first = next(iter(bw.user_agents), "")
-            label, score, signals = self.classify(ip, ua_first)
-            asn_num, asn_name, is_hosting = self.get_asn_info(ip)
-            js_info = self._js_proof.get(ip, {})
+    def iter_active_visitors(self, now: Optional[float] = None) -> Iterator[dict]:
+        """Yield active visitors, newest first, building each dict on demand.
 
-            visitors.append({
+        Only the (ip, window) snapshot is materialised up front, so streaming
+        callers never hold the whole serialised visitor list.
+        """
+        now = time.time() if now is None else now
+        cutoff = now - 60
+        active = []
+        for shard, lock in zip(self._behavior_shards, self._behavior_locks):
+            with lock:
+                active.extend((ip, bw, bw.count_since(cutoff)) for ip, bw in shard.items()
+                              if not bw.is_expired(self._BEHAVIOR_TTL, now))
+        active.sort(key=lambda a: a[1].last_seen, reverse=True)
+
+        for ip, bw, last_min in active:
+            ua_first = next(iter(bw.user_agents), "")
+            label, score, signals = self.classify(ip, ua_first, now)
+            texts = self._signal_texts.get(ip)
+            if texts is None or texts[0] is not signals:
+                texts = (signals, {k: _signal_text(v) for k, v in signals.items()})
+                self._signal_texts[ip] = texts
+            asn_num, asn_name, is_hosting = self.get_asn_info(ip, now)
+            js_info = self._js_proof.get(ip) or _NO_JS_PROOF
+
+            yield {
                 "ip": ip,
                 "asn": asn_name,
                 "asn_num": asn_num,
                 "is_hosting": is_hosting,
                 "classification": label,
                 "confidence": round(score, 3),
-                "signals": signals,
-                "request_count": len(bw.timestamps),
+                "signals": texts[1],
+                "request_count": bw.request_count,
+                "requests_last_min": last_min,
                 "page_count": bw.page_count,
                 "asset_count": bw.asset_count,
                 "api_count": bw.api_count,
                 "user_agents": list(bw.user_agents)[:3],
                 "last_seen": bw.last_seen,
                 "first_seen": bw.created,
-                "js_proved": js_info.get("proved", False),
-                "js_page_views": js_info.get("page_views", 0),
-                "webdriver": js_info.get("webdriver_detected", False),
-                "paths_sample": list(bw.paths)[-10:],
-                "unique_paths": len(set(bw.paths)),
+                "js_proved": js_info.proved,
+                "js_page_views": js_info.page_views,
+                "webdriver": js_info.webdriver_detected,
+                "paths_sample": list(islice(reversed(bw.paths), 10))[::-1],
+                "unique_paths": len(bw.unique_paths),
                 "is_blocked": ip in self._blocked_ips,
-            })
+            }
 
-        visitors.sort(key=lambda v: v["last_seen"], reverse=True)
-        return visitors
-
-    def get_summary(self) -> dict:
-        """Summary stats for dashboard header cards."""
-        visitors = self.get_active_visitors()
-        bots = [v for v in visitors if v["classification"] == "bot"]
-        suspicious = [v for v in visitors if v["classification"] == "suspicious"]
-        humans = [v for v in visitors if v["classification"] == "human"]
+    def get_summary(self, visitors: Optional[List[dict]] = None) -> dict:
+        """Summary stats for dashboard header cards.
 
+        Pass the result of get_active_visitors() to avoid classifying every
+        visitor twice; the summary then always describes exactly that list.
+        Called without visitors, it is memoised for _SUMMARY_TTL seconds
+        since the dashboard polls it.
+        """
         now = time.time()
+        if visitors is None:
+            cached = self._summary_cache
+            if cached is not None and now - cached[0] < self._SUMMARY_TTL:
+                return cached[1]
+            visitors = self.get_active_visitors()
+        summary = self._summarize(visitors)
+        self._summary_cache = (now, summary)
+        return summary
+
+    def _summarize(self, visitors: List[dict]) -> dict:
+        """Summary stats computed from exactly these visitors, bypassing the memo."""
+        counts = {"bot": 0, "suspicious": 0, "human": 0}
+        bots = []
         recent = 0
-        with self._behavior_lock:
-            for bw in self._behavior.values():
-                recent += sum(1 for t in bw.timestamps if (now - t) < 60)
+        for v in visitors:
+            label = v["classification"]
+            counts[label] += 1
+            recent += v["requests_last_min"]
+            if label == "bot":
+                bots.append({"ip": v["ip"], "asn": v["asn"], "requests": v["request_count"],
+                             "score": v["confidence"]})
 
         return {
             "total_active": len(visitors),
-            "bots": len(bots),
-            "suspicious": len(suspicious),
-            "humans": len(humans),
+            "bots": counts["bot"],
+            "suspicious": counts["suspicious"],
+            "humans": counts["human"],
             "blocked": len(self._blocked_ips),
             "requests_per_min": recent,
             "asn_cache_size": len(self._asn_cache),
-            "top_scrapers": sorted(
-                [{"ip": v["ip"], "asn": v["asn"], "requests": v["request_count"],
-                  "score": v["confidence"]} for v in bots],
-                key=lambda x: -x["requests"]
-            )[:10],
+            "top_scrapers": sorted(bots, key=lambda x: -x["requests"])[:10],
         }
 
     # ------------------------------------------------------------------
@@ -562,30 +1008,50 @@ class ScraperDetective:
         while True:
             time.sleep(300)
             try:
-                now = time.time()
-                with self._behavior_lock:
-                    expired = [ip for ip, bw in self._behavior.items()
-                               if bw.is_expired(self._BEHAVIOR_TTL)]
-                    for ip in expired:
-                        del self._behavior[ip]
-
-                with self._asn_cache_lock:
-                    expired = [ip for ip, v in self._asn_cache.items()
-                               if (now - v[3]) > self._ASN_CACHE_TTL]
-                    for ip in expired:
-                        del self._asn_cache[ip]
-
-                expired = [ip for ip, v in self._js_proof.items()
-                           if v.get("proved") and (now - v.get("proved_at", 0)) > 86400]
-                for ip in expired:
-                    del self._js_proof[ip]
-
-                expired = [ip for ip, v in self._class_cache.items() if now > v[3]]
-                for ip in expired:
-                    del self._class_cache[ip]
+                self._evict_expired(time.time())
             except Exception:
                 pass
 
+    def _evict_expired(self, now: float):
+        # Behaviour windows and class cache: pop only heap heads that are due
+        # (O(k log N)). Heap entries can be stale — the window was refreshed or the
+        # cache entry rewritten — so each is re-checked against the live value.
+        for shard, lock, heap in zip(self._behavior_shards, self._behavior_locks,
+                                     self._behavior_expiry):
+            with lock:
+                while heap and heap[0][0] <= now:
+                    _, ip = heapq.heappop(heap)
+                    bw = shard.get(ip)
+                    if bw is None:
+                        continue
+                    if bw.is_expired(self._BEHAVIOR_TTL, now):
+                        del shard[ip]
+                        self._version = next(self._versions)
+                    else:
+                        heapq.heappush(heap, (bw.last_seen + self._BEHAVIOR_TTL, ip))
+
+        with self._asn_cache_lock:
+            # list() snapshots in one C call, so lock-free readers reordering
+            # entries can't invalidate the iteration.
+            expired = [ip for ip, v in list(self._asn_cache.items())
+                       if (now - v[3]) > self._ASN_CACHE_TTL]
+            for ip in expired:
+                self._asn_cache.pop(ip, None)
+
+        expired = [ip for ip, v in self._js_proof.items()
+                   if v.proved and (now - v.proved_at) > 86400]
+        for ip in expired:
+            del self._js_proof[ip]
+
+        with self._class_expiry_lock:
+            heap = self._class_expiry
+            while heap and heap[0][0] < now:
+                expire, ip = heapq.heappop(heap)
+                cached = self._class_cache.get(ip)
+                if cached is not None and cached[3] == expire:
+                    del self._class_cache[ip]
+                    self._signal_texts.pop(ip, None)
+
 
 # ---------------------------------------------------------------------------
 # Module-level singleton
@@ -607,6 +1073,31 @@ def _get_client_ip() -> str:
     return request.remote_addr or "unknown"
 
 
+def _admin_key_ok() -> bool:
+    """True if the request carries the admin key (X-Admin-Key header or ?key=)."""
+    try:
+        from bottube_server import ADMIN_KEY
+    except ImportError:
+        ADMIN_KEY = ""
+    provided = request.headers.get("X-Admin-Key", "") or request.args.get("key", "")
+    return bool(provided and ADMIN_KEY and hmac.compare_digest(provided.encode(), ADMIN_KEY.encode()))
+
+
+def _state_tagged(build) -> Response:
+    """Serve build(now) under a weak ETag of the detective state, or 304 if unchanged."""
+    # Tag taken before the snapshot: a change racing the build just means
+    # the next poll refetches.
+    now = time.time()
+    tag = detective.state_tag(now)
+    if request.if_none_match.contains_weak(tag):
+        resp = Response(status=304)
+    else:
+        resp = build(now)
+    resp.set_etag(tag, weak=True)
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
 # ---------------------------------------------------------------------------
 # Blueprint routes
 # ---------------------------------------------------------------------------
@@ -617,19 +1108,7 @@ def bt_proof():
     ip = _get_client_ip()
     data = request.get_json(silent=True) or {}
 
-    detective.record_js_proof(ip)
-
-    if data.get("wd"):
-        entry = detective._js_proof.setdefault(ip, {
-            "proved": False, "proved_at": 0.0, "page_views": 0
-        })
-        entry["webdriver_detected"] = True
-
-    if data.get("pl") == 0:
-        entry = detective._js_proof.setdefault(ip, {
-            "proved": False, "proved_at": 0.0, "page_views": 0
-        })
-        entry["no_plugins"] = True
+    detective.record_js_proof(ip, webdriver=bool(data.get("wd")), no_plugins=data.get("pl") == 0)
 
     return "", 204
 
@@ -637,12 +1116,7 @@ def bt_proof():
 @scraper_bp.route("/scraper-dashboard")
 def scraper_dashboard():
     """Self-contained scraper detective dashboard. Requires admin key."""
-    try:
-        from bottube_server import ADMIN_KEY
-    except ImportError:
-        ADMIN_KEY = ""
-    provided = request.args.get("key", "")
-    if not provided or not ADMIN_KEY or provided != ADMIN_KEY:
+    if not _admin_key_ok():
         return "Forbidden — append ?key=YOUR_ADMIN_KEY", 403
     return Response(_DASHBOARD_HTML, content_type="text/html")
 
@@ -650,29 +1124,110 @@ def scraper_dashboard():
 @scraper_bp.route("/api/admin/scrapers")
 def admin_scrapers_api():
     """JSON data for scraper dashboard. Requires admin key."""
-    try:
-        from bottube_server import ADMIN_KEY
-    except ImportError:
-        ADMIN_KEY = ""
-    provided = request.headers.get("X-Admin-Key", "") or request.args.get("key", "")
-    if not provided or not ADMIN_KEY or provided != ADMIN_KEY:
+    if not _admin_key_ok():
+        return jsonify({"error": "Forbidden"}), 403
+    def build(now):
+        visitors = list(detective.iter_active_visitors(now))
+        return Response(_json_bytes({
+            "timestamp": now,
+            "summary": detective.get_summary(visitors),
+            "visitors": visitors,
+        }), mimetype="application/json")
+
+    return _state_tagged(build)
+
+
+@scraper_bp.route("/api/admin/scrapers.ndjson")
+def admin_scrapers_ndjson():
+    """Streaming variant of /api/admin/scrapers. Requires admin key.
+
+    One visitor object per line, newest first, then a final
+    {"summary": ...} line. Rows are serialised as they are built, so the
+    client can start rendering before the last visitor is classified.
+    """
+    if not _admin_key_ok():
+        return jsonify({"error": "Forbidden"}), 403
+
+    def build(now):
+        def generate():
+            visitors = []
+            for v in detective.iter_active_visitors(now):
+                visitors.append(v)
+                yield _json_bytes(v) + b"\n"
+            yield _json_bytes({"summary": detective._summarize(visitors)}) + b"\n"
+
+        return Response(generate(), mimetype="application/x-ndjson")
+
+    return _state_tagged(build)
+
+
+# SSE feed timing: how often the state tag is checked, the least time between
+# two rebuilds (every site request moves the tag, so without it a busy site
+# would rebuild and diff all visitors each tick - more work than the 5s poll
+# this feed replaced), the idle keep-alive interval, and how long one
+# connection lives before EventSource reconnects (bounds how long a
+# dashboard tab pins a server thread).
+_STREAM_TICK = 1.0
+_STREAM_MIN_INTERVAL = 5.0
+_STREAM_HEARTBEAT = 15.0
+_STREAM_LIFETIME = 600.0
+
+
+@scraper_bp.route("/api/admin/scrapers/stream")
+def admin_scrapers_stream():
+    """Server-Sent Events feed for the dashboard. Requires admin key.
+
+    Each event carries the summary plus only the visitors that changed
+    ("upsert") or left ("remove") since the previous event; the first one
+    is a full snapshot marked "reset". Events are only sent when the
+    detective's state tag moves, and at most once per _STREAM_MIN_INTERVAL.
+    """
+    if not _admin_key_ok():
         return jsonify({"error": "Forbidden"}), 403
-    return jsonify({
-        "timestamp": time.time(),
-        "summary": detective.get_summary(),
-        "visitors": detective.get_active_visitors(),
-    })
+
+    def generate():
+        yield "retry: 5000\n\n"
+        sent: Dict[str, dict] = {}
+        tag = None
+        first = True
+        started = last_write = time.monotonic()
+        last_build = started - _STREAM_MIN_INTERVAL
+        while True:
+            now = time.time()
+            current_tag = detective.state_tag(now)
+            if current_tag != tag and time.monotonic() - last_build >= _STREAM_MIN_INTERVAL:
+                tag = current_tag
+                last_build = time.monotonic()
+                visitors = list(detective.iter_active_visitors(now))
+                current = {v["ip"]: v for v in visitors}
+                event = {
+                    "summary": detective._summarize(visitors),
+                    "upsert": [v for ip, v in current.items() if sent.get(ip) != v],
+                    "remove": [ip for ip in sent if ip not in current],
+                }
+                if first:
+                    event["reset"] = True
+                    first = False
+                sent = current
+                last_write = time.monotonic()
+                yield b"data: " + _json_bytes(event) + b"\n\n"
+            elif time.monotonic() - last_write >= _STREAM_HEARTBEAT:
+                last_write = time.monotonic()
+                yield ": keep-alive\n\n"
+            if time.monotonic() - started >= _STREAM_LIFETIME:
+                return
+            time.sleep(_STREAM_TICK)
+
+    resp = Response(generate(), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-store"
+    resp.headers["X-Accel-Buffering"] = "no"  # let nginx pass events through
+    return resp
 
 
 @scraper_bp.route("/api/admin/scrapers/block", methods=["POST"])
 def admin_block_ip():
     """Block an IP. Requires admin key."""
-    try:
-        from bottube_server import ADMIN_KEY
-    except ImportError:
-        ADMIN_KEY = ""
-    provided = request.headers.get("X-Admin-Key", "") or request.args.get("key", "")
-    if not provided or not ADMIN_KEY or provided != ADMIN_KEY:
+    if not _admin_key_ok():
         return jsonify({"error": "Forbidden"}), 403
     data = request.get_json(silent=True) or {}
     ip = data.get("ip", "").strip()
@@ -685,12 +1240,7 @@ def admin_block_ip():
 @scraper_bp.route("/api/admin/scrapers/unblock", methods=["POST"])
 def admin_unblock_ip():
     """Unblock an IP. Requires admin key."""
-    try:
-        from bottube_server import ADMIN_KEY
-    except ImportError:
-        ADMIN_KEY = ""
-    provided = request.headers.get("X-Admin-Key", "") or request.args.get("key", "")
-    if not provided or not ADMIN_KEY or provided != ADMIN_KEY:
+    if not _admin_key_ok():
         return jsonify({"error": "Forbidden"}), 403
     data = request.get_json(silent=True) or {}
     ip = data.get("ip", "").strip()
@@ -721,25 +1271,30 @@ body{background:#0d1117;color:#c9d1d9;font-family:-apple-system,BlinkMacSystemFo
 .card .n{font-size:28px;font-weight:700}
 .card .l{font-size:11px;color:#8b949e;text-transform:uppercase;margin-top:2px}
 .n.grn{color:#3fb950}.n.ylw{color:#d29922}.n.red{color:#f85149}.n.blu{color:#58a6ff}
-.wrap{overflow-x:auto;padding:0 24px}
+.wrap{overflow:auto;padding:0 24px;height:calc(100vh - 200px);min-height:320px}
 table{width:100%;border-collapse:collapse;margin:16px 0;min-width:900px}
 th{background:#161b22;color:#8b949e;font-size:11px;text-transform:uppercase;padding:8px 10px;text-align:left;border-bottom:1px solid #30363d;position:sticky;top:0;z-index:1}
 td{padding:7px 10px;border-bottom:1px solid #21262d;font-size:13px;vertical-align:top}
-tr:hover{background:#161b2280}
+tr.row{height:36px;cursor:pointer}
+tr.row td{white-space:nowrap}
+tr.row:hover{background:#161b2280}
+tr.row.open{background:#161b22}
+tr.sp td{padding:0;border:0}
+.mut{color:#484f58}
 .badge{display:inline-block;font-size:11px;padding:2px 8px;border-radius:10px;font-weight:600}
 .badge.bot{background:#f8514933;color:#f85149}
 .badge.suspicious{background:#d2992233;color:#d29922}
 .badge.human{background:#23863633;color:#3fb950}
 .badge.blocked{background:#f8514966;color:#ff7b72}
-.sigs{font-size:11px;color:#8b949e;max-width:280px}
+.sigs{font-size:11px;color:#8b949e;max-width:280px;overflow:hidden;text-overflow:ellipsis}
 .sigs span{background:#21262d;padding:1px 5px;border-radius:4px;margin:1px;display:inline-block;white-space:nowrap}
 .btn{padding:3px 8px;border:1px solid #30363d;border-radius:6px;background:#21262d;color:#c9d1d9;cursor:pointer;font-size:11px}
 .btn:hover{background:#30363d}
 .btn.ban{border-color:#f85149;color:#f85149}.btn.ban:hover{background:#f8514933}
-.det{display:none}
-.det td{background:#0d1117;padding:10px 20px}
-.det-inner{display:grid;grid-template-columns:1fr 1fr;gap:10px;font-size:12px}
-.det-inner .paths{max-height:100px;overflow-y:auto;font-family:monospace;font-size:11px;color:#8b949e}
+.det td{background:#0d1117;padding:10px 20px;height:150px}
+.det-inner{display:grid;grid-template-columns:1fr 1fr;gap:10px;font-size:12px;height:129px;overflow-y:auto}
+.det-inner .uas{font-family:monospace;white-space:pre-line}
+.det-inner .paths{max-height:100px;overflow-y:auto;font-family:monospace;font-size:11px;color:#8b949e;white-space:pre-line}
 code{background:#21262d;padding:1px 4px;border-radius:3px;font-size:12px}
 @media(max-width:768px){.cards{grid-template-columns:repeat(2,1fr)}.det-inner{grid-template-columns:1fr}}
 </style>
@@ -747,65 +1302,217 @@ code{background:#21262d;padding:1px 4px;border-radius:3px;font-size:12px}
 <body>
 <div class="hdr">
   <h1>&#128270; Scraper Detective</h1>
-  <div class="meta">Refresh: <span id="cd">5</span>s &middot; <span id="ts">loading</span></div>
+  <div class="meta"><span id="mode">Live</span> &middot; <span id="ts">loading</span></div>
+</div>
+<div class="cards" id="sum">
+  <div class="card"><div class="n blu" id="n-active">-</div><div class="l">Active</div></div>
+  <div class="card"><div class="n red" id="n-bots">-</div><div class="l">Bots</div></div>
+  <div class="card"><div class="n ylw" id="n-suspicious">-</div><div class="l">Suspicious</div></div>
+  <div class="card"><div class="n grn" id="n-humans">-</div><div class="l">Humans</div></div>
+  <div class="card"><div class="n blu" id="n-rpm">-</div><div class="l">Req/min</div></div>
+  <div class="card"><div class="n" id="n-blocked">-</div><div class="l">Blocked</div></div>
 </div>
-<div class="cards" id="sum"></div>
-<div class="wrap">
+<div class="wrap" id="vp">
 <table>
 <thead><tr>
   <th>IP</th><th>ASN</th><th>Class</th><th>Score</th>
   <th>Requests</th><th>JS</th><th>Signals</th>
   <th>Seen</th><th></th>
 </tr></thead>
-<tbody id="rows"></tbody>
+<tbody id="rows"><tr class="sp"><td colspan="9"></td></tr><tr class="sp"><td colspan="9"></td></tr></tbody>
 </table>
 </div>
 <script>
-var KEY=new URLSearchParams(location.search).get('key'),cd=5;
-function ago(t){var s=Math.floor(Date.now()/1000-t);if(s<5)return'now';if(s<60)return s+'s';if(s<3600)return Math.floor(s/60)+'m';return Math.floor(s/3600)+'h'}
-function sigs(o){return Object.entries(o).map(function(e){return'<span>'+e[0]+': '+(typeof e[1]==='object'?JSON.stringify(e[1]):e[1])+'</span>'}).join(' ')}
-function block(ip){if(!confirm('Block '+ip+'?'))return;fetch('/api/admin/scrapers/block?key='+KEY,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({ip:ip})}).then(function(){load()})}
-function unblock(ip){fetch('/api/admin/scrapers/unblock?key='+KEY,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({ip:ip})}).then(function(){load()})}
-function tog(ip){var r=document.getElementById('d-'+ip.replace(/[.:]/g,'_'));if(r)r.style.display=r.style.display==='none'?'table-row':'none'}
+var KEY=new URLSearchParams(location.search).get('key'),cd=5,etag=null;
+// Virtual scroller: only rows inside the viewport (plus BUF either side) are
+// in the DOM. V is the visitor list, items the flattened row/detail list and
+// offs[i] the pixel offset of items[i]. Row nodes are pooled and rewritten.
+var ROW_H=36,DET_H=150,BUF=8,mRow=false,mDet=false;
+var V=[],items=[],offs=[0],open={},rows=[],dets=[];
+// ip -> {sk, sh}: survives across polls so unchanged signals keep their HTML.
+var seen=new Map();
+var vp=document.getElementById('vp'),tb=document.getElementById('rows');
+var padTop=tb.firstChild.firstChild,padBot=tb.lastChild.firstChild;
+// Relative times are memoised on the whole-second delta, bucketed to the unit
+// that is displayed, so the map stays small and never needs invalidating.
+var agoMemo=new Map();
+function ago(t,now){
+  var s=now-Math.floor(t);if(s>=3600)s-=s%3600;else if(s>=60)s-=s%60;else if(s<5)s=0;
+  var a=agoMemo.get(s);
+  if(a===undefined){a=s<5?'now':s<60?s+'s':s<3600?s/60+'m':s/3600+'h';agoMemo.set(s,a)}
+  return a;
+}
+// Signal values arrive pre-rendered as strings, so no JSON work happens here.
+function sigKey(o){var k='';for(var n in o)k+=n+'\x1f'+o[n]+'\x1e';return k}
+function sigs(o){var h='';for(var n in o){if(h)h+=' ';h+='<span>'+n+': '+o[n]+'</span>'}return h}
+function block(ip){if(!confirm('Block '+ip+'?'))return;fetch('/api/admin/scrapers/block?key='+KEY,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({ip:ip})}).then(refresh)}
+function unblock(ip){fetch('/api/admin/scrapers/unblock?key='+KEY,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({ip:ip})}).then(refresh)}
+function tog(ip){if(open[ip])delete open[ip];else open[ip]=1;layout();schedule()}
+// All DOM writes happen in paint(), at most once per animation frame.
+var raf=0;
+function schedule(){if(!raf)raf=requestAnimationFrame(function(){raf=0;paint()})}
+function layout(){
+  items=[];offs=[0];var y=0;
+  for(var i=0;i<V.length;i++){
+    items.push(V[i]);y+=ROW_H;offs.push(y);
+    if(open[V[i].ip]){items.push({det:V[i]});y+=DET_H;offs.push(y)}
+  }
+}
+function el(tag,cls,parent){var e=document.createElement(tag);if(cls)e.className=cls;parent.appendChild(e);return e}
+function mkRow(){
+  var tr=document.createElement('tr'),c={},req;tr.className='row';
+  function td(){return el('td','',tr)}
+  c.ip=el('code','',td());c.asn=td();c.badge=el('span','badge',td());c.score=td();
+  req=td();c.req=el('span','',req);req.appendChild(document.createTextNode(' '));c.mix=el('span','mut',req);
+  c.js=td();c.sigs=el('div','sigs',td());c.seen=td();c.btn=el('button','btn',td());
+  tr.p={};tr.c=c;
+  return tr;
+}
+function mkDet(){
+  var tr=document.createElement('tr');tr.className='det';
+  tr.innerHTML='<td colspan="9"><div class="det-inner">'+
+    '<div><strong>User Agents:</strong><div class="uas"></div></div>'+
+    '<div><strong>Recent Paths:</strong><div class="paths"></div></div>'+
+    '<div><strong>Unique Paths:</strong> <span></span> | <strong>First:</strong> <span></span></div>'+
+    '<div><strong>ASN#:</strong> <span></span> | <strong>Hosting:</strong> <span></span></div>'+
+    '</div></td>';
+  var sp=tr.querySelectorAll('span');
+  tr.p={};
+  tr.c={uas:tr.querySelector('.uas'),paths:tr.querySelector('.paths'),uniq:sp[0],first:sp[1],asn:sp[2],host:sp[3]};
+  return tr;
+}
+// Cells remember what they last showed (tr.p) and are only written on change.
+function put(tr,k,el,val){if(tr.p[k]!==val){tr.p[k]=val;el.textContent=val}}
+function fillRow(tr,v,now){
+  var c=tr.c,p=tr.p,cls=v.is_blocked?'blocked':v.classification,sh=v.sh;
+  tr.ip=v.ip;tr.blocked=v.is_blocked;
+  put(tr,'ip',c.ip,v.ip);put(tr,'asn',c.asn,v.asn);
+  if(p.cls!==cls){p.cls=cls;c.badge.className='badge '+cls;c.badge.textContent=cls.toUpperCase()}
+  put(tr,'score',c.score,v.confidence.toFixed(2));
+  put(tr,'req',c.req,''+v.request_count);
+  put(tr,'mix',c.mix,'('+v.page_count+'p/'+v.asset_count+'a/'+v.api_count+'api)');
+  put(tr,'js',c.js,v.js_proved?'\u2713':(v.webdriver?'\u26a0 wd':(v.js_page_views>0?v.js_page_views+'v':'-')));
+  if(p.sh!==sh){p.sh=sh;c.sigs.innerHTML=sh}
+  put(tr,'seen',c.seen,ago(v.last_seen,now));
+  var o=!!open[v.ip];if(p.open!==o){p.open=o;tr.classList.toggle('open',o)}
+  if(p.blk!==v.is_blocked){p.blk=v.is_blocked;c.btn.className=v.is_blocked?'btn':'btn ban';c.btn.textContent=v.is_blocked?'Unblock':'Block'}
+}
+function fillDet(tr,v,now){
+  var c=tr.c;
+  put(tr,'uas',c.uas,v.user_agents.join('\n'));put(tr,'paths',c.paths,v.paths_sample.join('\n'));
+  put(tr,'uniq',c.uniq,''+v.unique_paths);put(tr,'first',c.first,ago(v.first_seen,now));
+  put(tr,'asn',c.asn,''+v.asn_num);put(tr,'host',c.host,''+v.is_hosting);
+}
+function upsert(v,acc,next){
+  var e=seen.get(v.ip),sk=sigKey(v.signals);
+  if(!e||e.sk!==sk)e={sk:sk,sh:sigs(v.signals)};
+  v.sh=e.sh;next.set(v.ip,e);acc.push(v);
+}
+function swap(acc,next){
+  seen.forEach(function(e,ip){if(!next.has(ip))delete open[ip]});
+  seen=next;V=acc;layout();schedule();
+}
+function measure(){
+  // Pin the layout constants to what the browser actually drew, once each.
+  var h,redo=false;
+  if(!mRow&&rows[0]&&rows[0].parentNode){mRow=true;h=rows[0].getBoundingClientRect().height;if(h&&h!==ROW_H){ROW_H=h;redo=true}}
+  if(!mDet&&dets[0]&&dets[0].parentNode){mDet=true;h=dets[0].getBoundingClientRect().height;if(h&&h!==DET_H){DET_H=h;redo=true}}
+  if(redo){layout();paint()}
+}
+function paint(){
+  var n=items.length,st=vp.scrollTop,lo=0,hi=n;
+  while(lo<hi){var m=(lo+hi)>>1;if(offs[m+1]<=st)lo=m+1;else hi=m}
+  var s=Math.max(0,lo-BUF),e=lo,lim=st+vp.clientHeight;
+  while(e<n&&offs[e]<lim)e++;
+  e=Math.min(n,e+BUF);
+  padTop.style.height=offs[s]+'px';padBot.style.height=(offs[n]-offs[e])+'px';
+  // Rows already in place are kept; runs of new or moved rows are collected
+  // in a fragment and inserted with one DOM call.
+  var r=0,d=0,cur=tb.firstChild.nextSibling,frag=document.createDocumentFragment(),now=Math.floor(Date.now()/1000);
+  for(var i=s;i<e;i++){
+    var it=items[i],tr;
+    if(it.det){tr=dets[d]||(dets[d]=mkDet());d++;fillDet(tr,it.det,now)}
+    else{tr=rows[r]||(rows[r]=mkRow());r++;fillRow(tr,it,now)}
+    if(tr===cur){if(frag.firstChild)tb.insertBefore(frag,cur);cur=cur.nextSibling}
+    else frag.appendChild(tr);
+  }
+  if(frag.firstChild)tb.insertBefore(frag,cur);
+  while(cur!==tb.lastChild){var nx=cur.nextSibling;tb.removeChild(cur);cur=nx}
+  if(!mRow||!mDet)measure();
+}
+// The payload is NDJSON: one visitor per line, then {"summary":...}. On the
+// first load rows are painted as chunks arrive; later loads swap in the new
+// list once complete so the scroll position doesn't jump.
 function load(){
-  fetch('/api/admin/scrapers?key='+KEY).then(function(r){return r.json()}).then(function(d){
-    var s=d.summary;
-    document.getElementById('sum').innerHTML=
-      '<div class="card"><div class="n blu">'+s.total_active+'</div><div class="l">Active</div></div>'+
-      '<div class="card"><div class="n red">'+s.bots+'</div><div class="l">Bots</div></div>'+
-      '<div class="card"><div class="n ylw">'+s.suspicious+'</div><div class="l">Suspicious</div></div>'+
-      '<div class="card"><div class="n grn">'+s.humans+'</div><div class="l">Humans</div></div>'+
-      '<div class="card"><div class="n blu">'+s.requests_per_min+'</div><div class="l">Req/min</div></div>'+
-      '<div class="card"><div class="n">'+s.blocked+'</div><div class="l">Blocked</div></div>';
-    var h='';
-    d.visitors.forEach(function(v){
-      var cls=v.is_blocked?'blocked':v.classification;
-      var sid=v.ip.replace(/[.:]/g,'_');
-      h+='<tr onclick="tog(\''+v.ip+'\')" style="cursor:pointer">'+
-        '<td><code>'+v.ip+'</code></td>'+
-        '<td>'+v.asn+'</td>'+
-        '<td><span class="badge '+cls+'">'+(v.is_blocked?'BLOCKED':v.classification.toUpperCase())+'</span></td>'+
-        '<td>'+v.confidence.toFixed(2)+'</td>'+
-        '<td>'+v.request_count+' <span style="color:#484f58">('+v.page_count+'p/'+v.asset_count+'a/'+v.api_count+'api)</span></td>'+
-        '<td>'+(v.js_proved?'&#10003;':(v.webdriver?'&#9888; wd':(v.js_page_views>0?v.js_page_views+'v':'-')))+'</td>'+
-        '<td class="sigs">'+sigs(v.signals)+'</td>'+
-        '<td>'+ago(v.last_seen)+'</td>'+
-        '<td>'+(v.is_blocked?
-          '<button class="btn" onclick="event.stopPropagation();unblock(\''+v.ip+'\')">Unblock</button>':
-          '<button class="btn ban" onclick="event.stopPropagation();block(\''+v.ip+'\')">Block</button>')+'</td></tr>';
-      h+='<tr class="det" id="d-'+sid+'" style="display:none"><td colspan="9"><div class="det-inner">'+
-        '<div><strong>User Agents:</strong><br>'+v.user_agents.map(function(u){return'<code>'+u+'</code>'}).join('<br>')+'</div>'+
-        '<div><strong>Recent Paths:</strong><div class="paths">'+v.paths_sample.join('<br>')+'</div></div>'+
-        '<div><strong>Unique Paths:</strong> '+v.unique_paths+' | <strong>First:</strong> '+ago(v.first_seen)+'</div>'+
-        '<div><strong>ASN#:</strong> '+v.asn_num+' | <strong>Hosting:</strong> '+v.is_hosting+'</div>'+
-        '</div></td></tr>';
-    });
-    document.getElementById('rows').innerHTML=h;
-    document.getElementById('ts').textContent=new Date().toLocaleTimeString();
+  fetch('/api/admin/scrapers.ndjson?key='+KEY,{headers:etag?{'If-None-Match':etag}:{}}).then(function(r){
+    // 304: nothing changed server-side; only the relative times need a repaint.
+    if(r.status===304){schedule();stamp();return}
+    if(!r.ok)throw new Error('HTTP '+r.status);
+    etag=r.headers.get('ETag');
+    var rd=r.body.getReader(),dec=new TextDecoder(),buf='',acc=[],next=new Map(),live=!V.length;
+    function line(l){if(!l)return;var o=JSON.parse(l);if(o.summary)cards(o.summary);else upsert(o,acc,next)}
+    function pump(){
+      return rd.read().then(function(c){
+        if(c.done){line(buf+dec.decode());swap(acc,next);stamp();return}
+        buf+=dec.decode(c.value,{stream:true});
+        var i,j=0;
+        while((i=buf.indexOf('\n',j))>=0){line(buf.slice(j,i));j=i+1}
+        buf=buf.slice(j);
+        if(live){V=acc;layout();schedule()}
+        return pump();
+      });
+    }
+    return pump();
   }).catch(function(e){console.error('Detective error:',e)});
 }
-load();
-setInterval(function(){cd--;if(cd<=0){cd=5;load()}document.getElementById('cd').textContent=cd},1000);
+function stamp(){document.getElementById('ts').textContent=new Date().toLocaleTimeString()}
+// Summary cards are static markup; each update only rewrites changed numbers.
+var CARDS=[['n-active','total_active'],['n-bots','bots'],['n-suspicious','suspicious'],
+  ['n-humans','humans'],['n-rpm','requests_per_min'],['n-blocked','blocked']].map(function(c){
+  return {el:document.getElementById(c[0]),k:c[1],v:null};
+});
+function cards(s){
+  for(var i=0;i<CARDS.length;i++){
+    var c=CARDS[i],v=s[c.k];
+    if(v!==c.v){c.v=v;c.el.textContent=v}
+  }
+}
+// One delegated handler for every pooled row and its button.
+tb.addEventListener('click',function(ev){
+  var tr=ev.target.closest('tr.row');if(!tr)return;
+  if(ev.target.closest('button'))(tr.blocked?unblock:block)(tr.ip);
+  else tog(tr.ip);
+});
+vp.addEventListener('scroll',schedule,{passive:true});
+window.addEventListener('resize',schedule);
+// Changes are pushed over SSE; polling is only the fallback when the stream
+// can't be opened. Either way the relative times repaint every second.
+var es=null,polling=false;
+function refresh(){if(!es)load()}
+function applyDelta(d){
+  var byIp=new Map(),acc=[],next=new Map(),i;
+  if(!d.reset)for(i=0;i<V.length;i++)byIp.set(V[i].ip,V[i]);
+  for(i=0;i<d.remove.length;i++)byIp.delete(d.remove[i]);
+  for(i=0;i<d.upsert.length;i++)byIp.set(d.upsert[i].ip,d.upsert[i]);
+  byIp.forEach(function(v){upsert(v,acc,next)});
+  acc.sort(function(a,b){return b.last_seen-a.last_seen});
+  cards(d.summary);swap(acc,next);stamp();
+}
+function startPolling(){
+  if(polling)return;polling=true;
+  document.getElementById('mode').innerHTML='Refresh: <span id="cd">5</span>s';
+  load();
+}
+if(window.EventSource){
+  es=new EventSource('/api/admin/scrapers/stream?key='+KEY);
+  es.onmessage=function(e){applyDelta(JSON.parse(e.data))};
+  // CLOSED means the browser gave up (e.g. 403); CONNECTING is a normal retry.
+  es.onerror=function(){if(es.readyState===EventSource.CLOSED){es=null;startPolling()}};
+}else startPolling();
+setInterval(function(){
+  if(!polling){schedule();return}
+  cd--;if(cd<=0){cd=5;load()}document.getElementById('cd').textContent=cd;
+},1000);
 </script>
 </body>
 </html>"""
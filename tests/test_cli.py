@@ -49,6 +49,17 @@ def test_health_json(monkeypatch, capsys):
     assert obj["ok"] is True
 
 
+def test_health_json_without_orjson(monkeypatch, capsys):
+    from bottube import cli as bottube_cli
+
+    monkeypatch.setattr(bottube_cli, "orjson", None)
+    fake = FakeClient()
+    fake._health = {"ok": True, "name": "caf\u00e9"}
+    s = run_cli(monkeypatch, capsys, ["--json", "health"], fake_client=fake)
+    assert json.loads(s) == {"ok": True, "name": "caf\u00e9"}
+    assert "caf\u00e9" in s
+
+
 def test_videos_human(monkeypatch, capsys):
     fake = FakeClient()
     s = run_cli(monkeypatch, capsys, ["videos"], fake_client=fake)
@@ -72,3 +83,15 @@ def test_live_api_health():
     c = BoTTubeClient(base_url="https://bottube.ai", api_key="", verify_ssl=True)
     r = c.health()
     assert r.get("ok") is True
+
+
+def test_parser_is_built_once(monkeypatch, capsys):
+    from bottube import cli as bottube_cli
+
+    fake = FakeClient()
+    run_cli(monkeypatch, capsys, ["--json", "health"], fake_client=fake)
+    parser = bottube_cli._build_parser()
+    s = run_cli(monkeypatch, capsys, ["videos"], fake_client=fake)
+
+    assert "[v1]" in s
+    assert bottube_cli._build_parser() is parser
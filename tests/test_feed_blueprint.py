@@ -62,10 +62,19 @@ def test_to_iso8601_handles_none():
     assert "T" in out  # returns current time in ISO format
 
 
+def test_timestamp_parse_is_cached_but_fallback_is_not():
+    feed._parse_timestamp.cache_clear()
+    feed._to_rfc2822("2026-02-16T12:34:56Z")
+    feed._to_iso8601("2026-02-16T12:34:56Z")
+    assert feed._parse_timestamp.cache_info().hits >= 1
+    assert feed._parse_timestamp("not a date") is None
+    assert "+0000" in feed._to_rfc2822("not a date")
+
+
 # ── RSS feed ─────────────────────────────────────────────────
 
 def test_rss_route_uses_video_created_at_and_content_type(monkeypatch):
-    monkeypatch.setattr(feed.requests, "get", lambda *args, **kwargs: _Resp([SAMPLE_VIDEO]))
+    monkeypatch.setattr(feed._SESSION, "get", lambda *args, **kwargs: _Resp([SAMPLE_VIDEO]))
 
     app = _build_app()
     client = app.test_client()
@@ -76,10 +85,12 @@ def test_rss_route_uses_video_created_at_and_content_type(monkeypatch):
     body = resp.get_data(as_text=True)
     assert "<pubDate>Mon, 16 Feb 2026 12:34:56 +0000</pubDate>" in body
     assert "<title>Hello</title>" in body
+    assert body.count("<item>") == 1
+    assert body.endswith("</channel>\n</rss>")
 
 
 def test_rss_route_handles_non_list_payload(monkeypatch):
-    monkeypatch.setattr(feed.requests, "get", lambda *args, **kwargs: _Resp({"error": "oops"}))
+    monkeypatch.setattr(feed._SESSION, "get", lambda *args, **kwargs: _Resp({"error": "oops"}))
 
     app = _build_app()
     client = app.test_client()
@@ -92,6 +103,25 @@ def test_rss_route_handles_non_list_payload(monkeypatch):
     assert "<item>" not in body
 
 
+def test_rss_limit_is_clamped_upstream_and_locally(monkeypatch):
+    captured = {}
+
+    def mock_get(*args, **kwargs):
+        captured["params"] = kwargs.get("params", {})
+        # Upstream ignores per_page and returns far more than asked for.
+        return _Resp([dict(SAMPLE_VIDEO, id=f"v{i}") for i in range(500)])
+
+    monkeypatch.setattr(feed._SESSION, "get", mock_get)
+
+    client = _build_app().test_client()
+    body = client.get("/feed/rss?limit=1000000").get_data(as_text=True)
+    assert captured["params"]["per_page"] == feed._MAX_LIMIT
+    assert body.count("<item>") == feed._MAX_LIMIT
+
+    body = client.get("/feed/rss?limit=2").get_data(as_text=True)
+    assert body.count("<item>") == 2
+
+
 def test_rss_passes_agent_filter(monkeypatch):
     captured = {}
 
@@ -99,7 +129,7 @@ def test_rss_passes_agent_filter(monkeypatch):
         captured["params"] = kwargs.get("params", {})
         return _Resp([])
 
-    monkeypatch.setattr(feed.requests, "get", mock_get)
+    monkeypatch.setattr(feed._SESSION, "get", mock_get)
 
     app = _build_app()
     client = app.test_client()
@@ -114,7 +144,7 @@ def test_rss_passes_category_filter(monkeypatch):
         captured["params"] = kwargs.get("params", {})
         return _Resp([])
 
-    monkeypatch.setattr(feed.requests, "get", mock_get)
+    monkeypatch.setattr(feed._SESSION, "get", mock_get)
 
     app = _build_app()
     client = app.test_client()
@@ -125,7 +155,7 @@ def test_rss_passes_category_filter(monkeypatch):
 # ── Atom feed ────────────────────────────────────────────────
 
 def test_atom_route_returns_valid_atom(monkeypatch):
-    monkeypatch.setattr(feed.requests, "get", lambda *args, **kwargs: _Resp([SAMPLE_VIDEO]))
+    monkeypatch.setattr(feed._SESSION, "get", lambda *args, **kwargs: _Resp([SAMPLE_VIDEO]))
 
     app = _build_app()
     client = app.test_client()
@@ -141,7 +171,7 @@ def test_atom_route_returns_valid_atom(monkeypatch):
 
 
 def test_atom_route_has_self_link(monkeypatch):
-    monkeypatch.setattr(feed.requests, "get", lambda *args, **kwargs: _Resp([]))
+    monkeypatch.setattr(feed._SESSION, "get", lambda *args, **kwargs: _Resp([]))
 
     app = _build_app()
     client = app.test_client()
@@ -153,7 +183,7 @@ def test_atom_route_has_self_link(monkeypatch):
 
 
 def test_atom_route_handles_empty(monkeypatch):
-    monkeypatch.setattr(feed.requests, "get", lambda *args, **kwargs: _Resp({"error": "oops"}))
+    monkeypatch.setattr(feed._SESSION, "get", lambda *args, **kwargs: _Resp({"error": "oops"}))
 
     app = _build_app()
     client = app.test_client()
@@ -166,7 +196,7 @@ def test_atom_route_handles_empty(monkeypatch):
 
 
 def test_atom_uses_iso8601_timestamps(monkeypatch):
-    monkeypatch.setattr(feed.requests, "get", lambda *args, **kwargs: _Resp([SAMPLE_VIDEO]))
+    monkeypatch.setattr(feed._SESSION, "get", lambda *args, **kwargs: _Resp([SAMPLE_VIDEO]))
 
     app = _build_app()
     client = app.test_client()
@@ -178,7 +208,7 @@ def test_atom_uses_iso8601_timestamps(monkeypatch):
 
 
 def test_atom_media_content(monkeypatch):
-    monkeypatch.setattr(feed.requests, "get", lambda *args, **kwargs: _Resp([SAMPLE_VIDEO]))
+    monkeypatch.setattr(feed._SESSION, "get", lambda *args, **kwargs: _Resp([SAMPLE_VIDEO]))
 
     app = _build_app()
     client = app.test_client()
@@ -199,6 +229,11 @@ def test_normalize_videos_handles_bare_list():
     assert len(feed._normalize_videos([{"id": 1}, {"id": 2}])) == 2
 
 
+def test_normalize_videos_respects_limit():
+    payload = {"videos": [{"id": 1}, "junk", {"id": 2}, {"id": 3}]}
+    assert feed._normalize_videos(payload, 2) == [{"id": 1}, {"id": 2}]
+
+
 def test_normalize_videos_handles_garbage():
     assert feed._normalize_videos("not json") == []
     assert feed._normalize_videos(42) == []
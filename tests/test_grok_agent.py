@@ -0,0 +1,640 @@
+# SPDX-License-Identifier: MIT
+import json
+import pathlib
+import sys
+import types
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT / "tools") not in sys.path:
+    sys.path.insert(0, str(ROOT / "tools"))
+
+import grok_agent  # noqa: E402
+from tools import _video_prep  # noqa: E402
+
+MB = 1024 * 1024
+
+
+class FakeFFmpeg:
+    """Stands in for subprocess.run: answers ffprobe, "encodes" by writing files.
+
+    sizes maps a CRF (or "copy") to the output size in MB. encoders is what
+    `ffmpeg -encoders` lists; encodes with a codec in broken exit non-zero.
+    """
+
+    def __init__(self, stream, sizes, encoders="", broken=()):
+        self.stream = stream
+        self.sizes = sizes
+        self.encoders = encoders
+        self.broken = set(broken)
+        self.calls = []
+
+    def __call__(self, cmd, **kwargs):
+        self.calls.append(cmd)
+        if cmd[0] == "ffprobe":
+            fields = cmd[cmd.index("-show_entries") + 1].split("=", 1)[1].split(",")
+            lines = [f"{k}={self.stream[k]}" for k in fields if k in self.stream]
+            return types.SimpleNamespace(returncode=0, stdout="\n".join(lines) + "\n")
+        if "-encoders" in cmd:
+            return types.SimpleNamespace(returncode=0, stdout=self.encoders)
+        if "-c:v" in cmd and cmd[cmd.index("-c:v") + 1] in self.broken:
+            return types.SimpleNamespace(returncode=1, stdout=b"", stderr=b"no device")
+        flag = next((f for f in ("-crf", "-cq") if f in cmd), None)
+        key = cmd[cmd.index(flag) + 1] if flag else "copy"
+        pathlib.Path(cmd[-1]).write_bytes(b"\0" * int(self.sizes[key] * MB))
+        return types.SimpleNamespace(returncode=0, stdout=b"", stderr=b"")
+
+    @property
+    def encodes(self):
+        return [c for c in self.calls if c[0] == "ffmpeg" and "-encoders" not in c]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_encoder_probe():
+    _video_prep.ffmpeg_encoders.cache_clear()
+    grok_agent._HW_FAILED.clear()
+    yield
+    _video_prep.ffmpeg_encoders.cache_clear()
+    grok_agent._HW_FAILED.clear()
+
+
+def _source(tmp_path, size_mb):
+    src = tmp_path / "raw.mp4"
+    src.write_bytes(b"\0" * int(size_mb * MB))
+    return src
+
+
+def test_prepare_video_remuxes_compliant_source(monkeypatch, tmp_path):
+    fake = FakeFFmpeg({"codec_type": "video", "codec_name": "h264", "width": 720,
+                       "height": 720, "duration": "5.0"}, {"copy": 1.5})
+    monkeypatch.setattr(grok_agent.subprocess, "run", fake)
+
+    size = grok_agent.prepare_video(str(_source(tmp_path, 1.5)), str(tmp_path / "out.mp4"))
+
+    assert size == 1.5
+    assert len(fake.encodes) == 1
+    assert "copy" in fake.encodes[0] and "libx264" not in fake.encodes[0]
+
+
+def test_probe_video_uses_known_metadata_without_ffprobe(monkeypatch):
+    fake = FakeFFmpeg({}, {})
+    monkeypatch.setattr(grok_agent.subprocess, "run", fake)
+    known = {"codec_name": "h264", "width": 1280, "height": 720, "duration": 12, "model": "m"}
+
+    video, needs_resize, needs_trim = grok_agent.probe_video("raw.mp4", known)
+
+    assert fake.calls == []
+    assert video["codec_name"] == "h264" and needs_resize and needs_trim
+
+
+def test_probe_video_queries_first_video_stream_only(monkeypatch):
+    fake = FakeFFmpeg({"codec_name": "h264", "width": 720, "height": 720, "duration": "N/A"}, {})
+    monkeypatch.setattr(grok_agent.subprocess, "run", fake)
+
+    video, needs_resize, needs_trim = grok_agent.probe_video("raw.mp4", {"duration": 5})
+
+    assert "v:0" in fake.calls[0] and "-show_streams" not in fake.calls[0]
+    assert video == {"codec_name": "h264", "width": "720", "height": "720"}
+    assert (needs_resize, needs_trim) == (False, False)
+
+
+def test_prepare_video_reencodes_oversized_source(monkeypatch, tmp_path):
+    fake = FakeFFmpeg({"codec_type": "video", "codec_name": "h264", "width": 1280,
+                       "height": 720, "duration": "5.0"}, {"26": 1.0})
+    monkeypatch.setattr(grok_agent.subprocess, "run", fake)
+
+    grok_agent.prepare_video(str(_source(tmp_path, 1.0)), str(tmp_path / "out.mp4"))
+
+    assert len(fake.encodes) == 1
+    assert "libx264" in fake.encodes[0]
+
+
+def test_prepare_video_trims_and_scales_long_oversized_source(monkeypatch, tmp_path):
+    fake = FakeFFmpeg({"codec_name": "h264", "width": 1920, "height": 1080, "duration": "12.0"},
+                      {"26": 1.0})
+    monkeypatch.setattr(grok_agent.subprocess, "run", fake)
+    src, out = str(_source(tmp_path, 1.0)), str(tmp_path / "out.mp4")
+
+    grok_agent.prepare_video(src, out)
+
+    cmd = fake.encodes[0]
+    assert cmd[:4] == ["ffmpeg", "-y", "-i", src]
+    assert cmd[4:8] == ["-t", "8", "-vf", grok_agent.FF_SCALE[1]]
+    assert cmd[-4:] == ["-an", "-movflags", "+faststart", out]
+
+
+def test_next_crf_follows_six_per_halving_and_clamps():
+    assert grok_agent._next_crf(26, 4.0) == 26 + 7  # 2x over the 1.9MB aim
+    assert grok_agent._next_crf(26, 2.01) == 27  # always moves at least one step
+    assert grok_agent._next_crf(38, 64.0) == grok_agent.MAX_CRF
+
+
+def test_prepare_video_jumps_to_predicted_crf(monkeypatch, tmp_path):
+    fake = FakeFFmpeg({"codec_type": "video", "width": 1280, "height": 720, "duration": "5.0"},
+                      {"26": 4.0, "33": 1.2})
+    monkeypatch.setattr(grok_agent.subprocess, "run", fake)
+
+    size = grok_agent.prepare_video(str(_source(tmp_path, 6.0)), str(tmp_path / "out.mp4"))
+
+    assert abs(size - 1.2) < 1e-6
+    assert [c[c.index("-crf") + 1] for c in fake.encodes] == ["26", "33"]
+    assert all(c[c.index("-preset") + 1] == "veryfast" for c in fake.encodes)
+
+
+def test_prepare_video_gives_up_at_max_crf(monkeypatch, tmp_path):
+    sizes = {str(crf): 9.0 for crf in range(20, 41)}
+    fake = FakeFFmpeg({"codec_type": "video", "width": 1280, "height": 720, "duration": "5.0"}, sizes)
+    monkeypatch.setattr(grok_agent.subprocess, "run", fake)
+
+    try:
+        grok_agent.prepare_video(str(_source(tmp_path, 9.0)), str(tmp_path / "out.mp4"))
+        assert False, "Expected compression failure"
+    except Exception as exc:
+        assert "Could not compress" in str(exc)
+    assert fake.encodes[-1][fake.encodes[-1].index("-crf") + 1] == str(grok_agent.MAX_CRF)
+    assert len(fake.encodes) <= 4
+
+
+def test_prepare_video_uses_thorough_preset_after_a_predicted_miss(monkeypatch, tmp_path):
+    fake = FakeFFmpeg({"codec_type": "video", "width": 1280, "height": 720, "duration": "5.0"},
+                      {"26": 4.0, "33": 2.5, "36": 1.5})
+    monkeypatch.setattr(grok_agent.subprocess, "run", fake)
+
+    grok_agent.prepare_video(str(_source(tmp_path, 6.0)), str(tmp_path / "out.mp4"))
+
+    assert [c[c.index("-preset") + 1] for c in fake.encodes] == ["veryfast", "veryfast", "fast"]
+    assert "scenecut=0:ref=1:bframes=0" in fake.encodes[0]
+
+
+def test_prepare_video_prefers_listed_hardware_encoder(monkeypatch, tmp_path):
+    fake = FakeFFmpeg({"codec_type": "video", "width": 1280, "height": 720, "duration": "5.0"},
+                      {"26": 1.0}, encoders=" V....D h264_nvenc           NVIDIA NVENC H.264 encoder\n")
+    monkeypatch.setattr(grok_agent.subprocess, "run", fake)
+
+    grok_agent.prepare_video(str(_source(tmp_path, 6.0)), str(tmp_path / "out.mp4"))
+    grok_agent.prepare_video(str(_source(tmp_path, 6.0)), str(tmp_path / "out.mp4"))
+
+    assert [c[c.index("-c:v") + 1] for c in fake.encodes] == ["h264_nvenc", "h264_nvenc"]
+    assert sum("-encoders" in c for c in fake.calls) == 1
+
+
+def test_prepare_video_falls_back_to_libx264_when_hardware_fails(monkeypatch, tmp_path):
+    fake = FakeFFmpeg({"codec_type": "video", "width": 1280, "height": 720, "duration": "5.0"},
+                      {"26": 1.0}, encoders=" V....D h264_nvenc  NVENC\n", broken={"h264_nvenc"})
+    monkeypatch.setattr(grok_agent.subprocess, "run", fake)
+
+    grok_agent.prepare_video(str(_source(tmp_path, 6.0)), str(tmp_path / "out.mp4"))
+    grok_agent.prepare_video(str(_source(tmp_path, 6.0)), str(tmp_path / "out.mp4"))
+
+    assert [c[c.index("-c:v") + 1] for c in fake.encodes] == ["h264_nvenc", "libx264", "libx264"]
+
+
+def test_remux_stream_only_for_sources_with_headroom(monkeypatch, tmp_path):
+    started = []
+    monkeypatch.setattr(grok_agent.subprocess, "Popen", lambda cmd, **kw: started.append(cmd) or "proc")
+    fits = ({"codec_name": "h264"}, False, False)
+
+    assert grok_agent.remux_stream(str(_source(tmp_path, 1.0)), fits) == "proc"
+    assert "frag_keyframe+empty_moov" in started[0] and started[0][-1] == "pipe:1"
+    assert grok_agent.remux_stream(str(_source(tmp_path, 1.98)), fits) is None
+    assert grok_agent.remux_stream(str(_source(tmp_path, 1.0)), ({"codec_name": "hevc"}, False, False)) is None
+    assert grok_agent.remux_stream(str(_source(tmp_path, 1.0)), ({"codec_name": "h264"}, True, False)) is None
+
+
+def test_upload_pipes_remux_process_over_ssh(monkeypatch):
+    import subprocess
+
+    proc = subprocess.Popen([sys.executable, "-c", "import sys; sys.stdout.buffer.write(b'mp4' * 100)"],
+                            stdout=subprocess.PIPE)
+    sent = []
+
+    def fake_run(cmd, **kwargs):
+        if hasattr(kwargs.get("stdin"), "read"):
+            sent.append(kwargs["stdin"].read())
+        out = json.dumps({"ok": True, "video_id": "v1"}) if "curl" in cmd[-1] else ""
+        return types.SimpleNamespace(returncode=0, stdout=out)
+
+    monkeypatch.setattr(grok_agent.subprocess, "run", fake_run)
+    monkeypatch.setattr(grok_agent, "_ssh_master_started", False)
+    monkeypatch.setitem(grok_agent.BOTTUBE_AGENTS, "bot", "key")
+
+    assert grok_agent.upload_to_bottube(proc, "bot", "Title")["video_id"] == "v1"
+    assert sent == [b"mp4" * 100]
+
+
+def test_upload_multiplexes_one_ssh_connection(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        out = json.dumps({"ok": True, "video_id": "v1"}) if "curl" in cmd[-1] else ""
+        return types.SimpleNamespace(returncode=0, stdout=out)
+
+    monkeypatch.setattr(grok_agent.subprocess, "run", fake_run)
+    monkeypatch.setattr(grok_agent, "_ssh_master_started", False)
+    monkeypatch.setitem(grok_agent.BOTTUBE_AGENTS, "bot", "key")
+    clip = _source(tmp_path, 0.1)
+
+    grok_agent.upload_to_bottube(str(clip), "bot", "Same title")
+    grok_agent.upload_to_bottube(str(clip), "bot", "Same title")
+
+    masters = [c for c in calls if "ControlMaster=auto" in c]
+    assert len(masters) == 1 and "-N" in masters[0]
+    others = [c for c in calls if c not in masters]
+    assert len(others) == 4  # scp + ssh(curl; rm) per upload
+    assert all(f"ControlPath={grok_agent.SSH_CONTROL_PATH}" in c for c in others)
+    assert others[1][-1].endswith("rm -f " + others[0][-1].split(":", 1)[1])
+    assert others[0][-1] != others[2][-1]  # same title, distinct remote files
+
+
+def test_batch_video_runs_pipelines_concurrently_and_survives_failures(monkeypatch, capsys):
+    import threading
+
+    barrier = threading.Barrier(2, timeout=5)
+    done = []
+
+    def fake_pipeline(prompt, agent, title, **kwargs):
+        barrier.wait()  # deadlocks unless both pipelines run at the same time
+        if agent == "bad":
+            raise RuntimeError("provider down")
+        done.append(agent)
+        return {"video_id": agent}
+
+    monkeypatch.setattr(grok_agent, "video_pipeline", fake_pipeline)
+    monkeypatch.setattr(grok_agent, "GROK_API_KEY", "k")
+    monkeypatch.setattr(sys, "argv", ["grok_agent.py", "batch-video", "good:a robot", "bad:a robot", "nocolon"])
+
+    grok_agent.main()
+
+    out = capsys.readouterr().out
+    assert done == ["good"]
+    assert "ERROR [bad]: provider down" in out
+    assert "Expected 'agent:prompt', got: nocolon" in out
+
+
+def test_scan_prs_reviews_in_parallel_and_keeps_order(monkeypatch):
+    import threading
+
+    barrier = threading.Barrier(2, timeout=5)
+    prs = {"r1": [{"number": 1}], "r2": [{"number": 2}], "r3": []}
+
+    def fake_review(repo, pr, dry_run=False, use_cache=True):
+        barrier.wait()  # both reviews must be in flight together
+        return {"verdict": "approve", "summary": repo}
+
+    monkeypatch.setattr(grok_agent, "get_open_prs", lambda repo: prs[repo])
+    monkeypatch.setattr(grok_agent, "review_pr", fake_review)
+
+    results = grok_agent.scan_prs(repos=["r1", "r2", "r3"], dry_run=True)
+
+    assert list(results) == ["r1#1", "r2#2"]
+
+
+def test_gh_timeout_returns_empty_output(monkeypatch):
+    import subprocess
+
+    def hang(cmd, **kwargs):
+        raise subprocess.TimeoutExpired(cmd, kwargs["timeout"])
+
+    monkeypatch.setattr(grok_agent.subprocess, "run", hang)
+    assert grok_agent.gh(["pr", "list"]) == ""
+
+
+@pytest.fixture
+def caches(monkeypatch, tmp_path):
+    monkeypatch.setattr(grok_agent, "_gh_cache", grok_agent._JsonCache(tmp_path / "cache.json"))
+    monkeypatch.setattr(grok_agent, "_review_cache", grok_agent._JsonCache(tmp_path / "reviews.json"))
+    return tmp_path
+
+
+def _pr(**overrides):
+    pr = {"number": 7, "title": "t", "author": {"login": "a"}, "additions": 1, "deletions": 0,
+          "files": [{"path": "x"}], "updatedAt": "2026-01-01T00:00:00Z"}
+    pr.update(overrides)
+    return pr
+
+
+def _diff_section(path, *hunks):
+    header = f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n"
+    return header + "".join(f"@@ -{i} +{i} @@\n+{body}\n" for i, body in enumerate(hunks, 1))
+
+
+def test_truncate_diff_keeps_whole_hunks_within_budget():
+    diff = _diff_section("a.py", "x" * 40, "y" * 400, "z" * 40) + _diff_section("b.py", "w")
+
+    out = grok_agent._truncate_diff(diff, budget_tokens=40)  # ~160 chars
+
+    assert "x" * 40 in out and "y" * 400 not in out and "b.py" not in out
+    assert "3 hunks omitted" in out and f"full diff is {len(diff)} chars" in out
+
+
+def test_truncate_diff_drops_lockfiles_and_leaves_small_diffs_alone():
+    small = _diff_section("a.py", "x")
+    assert grok_agent._truncate_diff(small) == small
+
+    out = grok_agent._truncate_diff(small + _diff_section("web/yarn.lock", "dep" * 5000))
+
+    assert out.startswith(small.rstrip("\n")) and "dep" not in out
+    assert out.endswith("[generated/binary files omitted: web/yarn.lock]")
+
+
+def test_gh_drops_output_when_not_captured(monkeypatch):
+    seen = []
+
+    def fake_run(cmd, **kwargs):
+        seen.append(kwargs)
+        return types.SimpleNamespace(stdout=" out \n" if kwargs.get("capture_output") else None)
+
+    monkeypatch.setattr(grok_agent.subprocess, "run", fake_run)
+
+    assert grok_agent.gh(["pr", "list"]) == "out"
+    assert grok_agent.gh(["pr", "comment"], capture=False) == ""
+    assert seen[1]["stdout"] is grok_agent.subprocess.DEVNULL
+    assert "capture_output" not in seen[1]
+
+
+def test_review_pr_reuses_inputs_for_unchanged_prs(monkeypatch, caches):
+    calls = []
+
+    def fake_gh(args, capture=True):
+        calls.append(args[:2])
+        return "diff --git a/x b/x" if args[:2] == ["pr", "diff"] else "profile"
+
+    monkeypatch.setattr(grok_agent, "gh", fake_gh)
+    monkeypatch.setattr(grok_agent, "grok_chat", lambda messages, **kw: '{"verdict": "approve"}')
+    pr = _pr()
+
+    grok_agent.review_pr("r", pr, dry_run=True)
+    grok_agent.save_gh_cache(["r"], keep=[grok_agent._pr_cache_key("r", pr)])
+    # fresh process: reload from disk
+    monkeypatch.setattr(grok_agent, "_gh_cache", grok_agent._JsonCache(caches / "cache.json"))
+    grok_agent.review_pr("r", pr, dry_run=True)
+    grok_agent.review_pr("r", dict(pr, updatedAt="2026-01-02T00:00:00Z"), dry_run=True)
+
+    assert calls == [["pr", "diff"], ["api", "users/a"], ["pr", "diff"], ["api", "users/a"]]
+
+
+def test_review_pr_reuses_verdict_until_code_changes(monkeypatch, caches):
+    diffs = iter(["diff A", "diff A", "diff B"])
+    comments, asked = [], []
+
+    def fake_gh(args, capture=True):
+        if args[:2] == ["pr", "comment"]:
+            comments.append(args)
+        return next(diffs) if args[:2] == ["pr", "diff"] else "profile"
+
+    def fake_chat(messages, **kw):
+        asked.append(messages[1]["content"])
+        return '{"verdict": "reject", "confidence": 0.9, "suggested_comment": "no"}'
+
+    monkeypatch.setattr(grok_agent, "gh", fake_gh)
+    monkeypatch.setattr(grok_agent, "grok_chat", fake_chat)
+
+    # A bumped updatedAt (e.g. our own comment) re-fetches the diff, but the
+    # code is the same, so Grok is not asked again and no second comment posts.
+    grok_agent.review_pr("r", _pr())
+    grok_agent.save_gh_cache()
+    monkeypatch.setattr(grok_agent, "_review_cache", grok_agent._JsonCache(caches / "reviews.json"))
+    assert grok_agent.review_pr("r", _pr(updatedAt="2026-01-02T00:00:00Z"))["verdict"] == "reject"
+    grok_agent.review_pr("r", _pr(updatedAt="2026-01-03T00:00:00Z"))
+
+    assert len(asked) == 2 and "diff B" in asked[1]
+    assert len(comments) == 2
+
+
+@pytest.mark.parametrize("files, additions, deletions, farming", [
+    ([{"path": "README.md"}], 3, 1, 8),
+    ([{"path": "docs/readme.rst"}, {"path": "README.md"}], 9, 0, 8),
+    ([{"path": "app.py"}], 4000, 1500, 0),
+])
+def test_review_pr_applies_rules_without_grok(monkeypatch, files, additions, deletions, farming):
+    def unexpected(*args, **kwargs):
+        raise AssertionError("rule-matched PRs need no gh or Grok calls")
+
+    monkeypatch.setattr(grok_agent, "gh", unexpected)
+    monkeypatch.setattr(grok_agent, "grok_chat", unexpected)
+
+    review = grok_agent.review_pr("r", _pr(files=files, additions=additions, deletions=deletions))
+
+    assert review["verdict"] == "needs_maintainer"
+    assert review["bounty_farming_score"] == farming
+
+
+def test_review_rules_leave_ordinary_prs_to_grok():
+    assert grok_agent._rule_verdict(["README.md"], _pr(additions=10)) is None
+    assert grok_agent._rule_verdict(["README.md", "app.py"], _pr(additions=2)) is None
+    assert grok_agent._rule_verdict([], _pr(additions=2)) is None
+
+
+def test_review_pr_no_cache_always_asks_grok(monkeypatch, caches):
+    asked = []
+    monkeypatch.setattr(grok_agent, "gh", lambda args, capture=True: "diff A")
+    monkeypatch.setattr(grok_agent, "grok_chat",
+                        lambda messages, **kw: asked.append(1) or '{"verdict": "approve"}')
+
+    grok_agent.review_pr("r", _pr(), dry_run=True)
+    grok_agent.review_pr("r", _pr(), dry_run=True, use_cache=False)
+
+    assert len(asked) == 2
+
+
+def test_grok_chat_posts_over_shared_session(monkeypatch):
+    sent = []
+
+    def fake_post(url, data=None, headers=None, timeout=None):
+        sent.append((url, json.loads(data), headers))
+        body = {"choices": [{"message": {"content": "hi"}}]}
+        return types.SimpleNamespace(content=json.dumps(body).encode())
+
+    monkeypatch.setattr(grok_agent._GROK_SESSION, "post", fake_post)
+    monkeypatch.setattr(grok_agent, "GROK_API_KEY", "xai-k")
+
+    assert grok_agent.grok_chat([{"role": "user", "content": "hello"}]) == "hi"
+    url, payload, headers = sent[0]
+    assert url.endswith("/v1/chat/completions")
+    assert payload["messages"][0]["content"] == "hello"
+    assert headers["Authorization"] == "Bearer xai-k"
+    assert headers["Content-Type"] == "application/json"
+
+
+def test_grok_chat_raises_api_errors(monkeypatch):
+    body = json.dumps({"error": {"message": "bad key"}}).encode()
+    monkeypatch.setattr(grok_agent._GROK_SESSION, "post",
+                        lambda *a, **k: types.SimpleNamespace(content=body))
+
+    with pytest.raises(Exception, match="bad key"):
+        grok_agent.grok_chat([{"role": "user", "content": "hello"}])
+
+
+def test_grok_chat_json_mode_requests_json_object(monkeypatch):
+    sent = []
+
+    def fake_post(url, data=None, **kwargs):
+        sent.append(json.loads(data))
+        return types.SimpleNamespace(content=b'{"choices": [{"message": {"content": "{}"}}]}')
+
+    monkeypatch.setattr(grok_agent._GROK_SESSION, "post", fake_post)
+    grok_agent.grok_chat([], json_mode=True)
+    grok_agent.grok_chat([])
+
+    assert sent[0]["response_format"] == {"type": "json_object"}
+    assert "response_format" not in sent[1]
+
+
+@pytest.mark.parametrize("response", [
+    '{"verdict": "approve"}',
+    'Here you go:\n```json\n{"verdict": "approve"}\n```\nThanks {not json}',
+    'Verdict follows {"verdict": "approve", "issues": [{"x": 1}]} done',
+])
+def test_parse_review_extracts_the_verdict_object(response):
+    assert grok_agent._parse_review(response)["verdict"] == "approve"
+
+
+@pytest.mark.parametrize("response", ["no json here", "[1, 2]", "```json\n[1]\n```"])
+def test_parse_review_rejects_non_objects(response):
+    with pytest.raises(ValueError):
+        grok_agent._parse_review(response)
+
+
+def test_json_helpers_match_stdlib_without_orjson(monkeypatch):
+    payload = {"messages": [{"role": "user", "content": "héllo \"diff\""}], "n": 1.5}
+    fast = grok_agent._json_bytes(payload)
+    monkeypatch.setattr(grok_agent, "orjson", None)
+
+    assert grok_agent._json_loads(grok_agent._json_bytes(payload)) == payload
+    assert grok_agent._json_loads(fast) == payload
+    with pytest.raises(json.JSONDecodeError):
+        grok_agent._json_loads("not json")
+
+
+def test_concurrent_transfers_get_their_own_connections(monkeypatch):
+    with grok_agent._transfer_opts() as first:
+        with grok_agent._transfer_opts() as second:
+            assert f"ControlPath={grok_agent.SSH_CONTROL_PATH}" in first
+            assert "ControlPath=none" in second
+    with grok_agent._transfer_opts() as again:
+        assert f"ControlPath={grok_agent.SSH_CONTROL_PATH}" in again
+    assert grok_agent._transfers_in_flight == 0
+
+
+def test_ssh_connections_do_not_compress_video():
+    assert "Compression=no" in grok_agent._ssh_opts()
+    assert "Compression=no" in grok_agent._ssh_opts(shared=False)
+
+
+def test_batch_pipelines_overlap_generation_but_queue_for_encoding(monkeypatch):
+    import threading
+    import time
+
+    state = {"gen": 0, "gen_peak": 0, "enc": 0, "enc_peak": 0}
+    lock = threading.Lock()
+
+    def track(stage, fn):
+        with lock:
+            state[stage] += 1
+            state[stage + "_peak"] = max(state[stage + "_peak"], state[stage])
+        time.sleep(0.05)
+        fn()
+        with lock:
+            state[stage] -= 1
+
+    def fake_generate(output_path, **kwargs):
+        track("gen", lambda: pathlib.Path(output_path).write_bytes(b"\0" * MB))
+        return types.SimpleNamespace(provider="grok", metadata={})
+
+    def fake_prepare(raw, ready, probe=None):
+        track("enc", lambda: pathlib.Path(ready).write_bytes(b"\0"))
+        return 1.0
+
+    monkeypatch.setattr(grok_agent, "generate_video", fake_generate)
+    monkeypatch.setattr(grok_agent, "probe_video", lambda path, known=None: ({}, True, False))
+    monkeypatch.setattr(grok_agent, "remux_stream", lambda path, probe=None: None)
+    monkeypatch.setattr(grok_agent, "prepare_video", fake_prepare)
+    monkeypatch.setattr(grok_agent, "upload_to_bottube", lambda *a, **k: {"video_id": "v"})
+
+    for i in range(3):
+        monkeypatch.setitem(grok_agent.BOTTUBE_AGENTS, f"a{i}", "key")
+    threads = [threading.Thread(target=grok_agent.video_pipeline, args=("p", f"a{i}", "t"))
+               for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert state["gen_peak"] == 3
+    assert state["enc_peak"] == 1
+
+
+def test_both_scripts_share_one_encoder_probe(monkeypatch):
+    import grok_video
+
+    fake = FakeFFmpeg({}, {}, encoders=" V....D h264_nvenc           NVIDIA NVENC H.264 encoder\n")
+    monkeypatch.setattr(grok_agent.subprocess, "run", fake)
+
+    assert grok_agent._available_hw_encoders() == ("h264_nvenc",)
+    assert grok_video._available_hw_encoders() == ("h264_nvenc",)
+    assert sum("-encoders" in c for c in fake.calls) == 1
+
+
+def test_probe_video_skips_ffprobe_for_readable_mp4(monkeypatch, tmp_path):
+    from test_grok_video import _mp4
+
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(_mp4(1280, 720, 10.5))
+    fake = FakeFFmpeg({}, {})
+    monkeypatch.setattr(grok_agent.subprocess, "run", fake)
+
+    video, needs_resize, needs_trim = grok_agent.probe_video(str(clip))
+
+    assert fake.calls == []
+    assert video == {"duration": 10.5, "width": 1280, "height": 720, "codec_name": "h264"}
+    assert needs_resize and needs_trim
+
+
+def test_video_pipeline_rejects_unknown_agent_before_generating(monkeypatch):
+    monkeypatch.setattr(grok_agent, "generate_video", lambda **kw: pytest.fail("generated"))
+
+    with pytest.raises(Exception, match="Unknown agent 'nobody'"):
+        grok_agent.video_pipeline("p", "nobody", "t")
+
+
+def test_video_pipeline_kills_undrained_remux_on_upload_error(monkeypatch):
+    import subprocess
+
+    proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"], stdout=subprocess.PIPE)
+    monkeypatch.setitem(grok_agent.BOTTUBE_AGENTS, "bot", "key")
+    monkeypatch.setattr(grok_agent, "generate_video",
+                        lambda output_path, **kw: pathlib.Path(output_path).write_bytes(b"\0")
+                        and types.SimpleNamespace(provider="grok", metadata={}))
+    monkeypatch.setattr(grok_agent, "probe_video", lambda path, known=None: ({}, False, False))
+    monkeypatch.setattr(grok_agent, "remux_stream", lambda path, probe=None: proc)
+
+    def failing_upload(*args, **kwargs):
+        raise Exception("ssh down")
+
+    monkeypatch.setattr(grok_agent, "upload_to_bottube", failing_upload)
+
+    with pytest.raises(Exception, match="ssh down"):
+        grok_agent.video_pipeline("p", "bot", "t")
+    assert proc.returncode is not None
+    assert proc.stdout.closed
+
+
+@pytest.mark.parametrize("data", [
+    b"\0\0\0\x01moov",  # 64-bit size announced, header cut short
+    b"\0\0\0\x10moov\0\0\0\x08mvhd",  # moov holding only an empty mvhd
+], ids=["short-largesize", "empty-mvhd"])
+def test_probe_video_falls_back_to_ffprobe_for_malformed_mp4(monkeypatch, tmp_path, data):
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(data)
+    with pytest.raises(ValueError):
+        _video_prep.probe_mp4(str(clip))
+
+    fake = FakeFFmpeg({"codec_name": "h264", "width": 640, "height": 360, "duration": 4.0}, {})
+    monkeypatch.setattr(grok_agent.subprocess, "run", fake)
+
+    video, needs_resize, needs_trim = grok_agent.probe_video(str(clip))
+
+    assert fake.calls[0][0] == "ffprobe"
+    assert video["width"] == "640" and not needs_resize and not needs_trim
@@ -0,0 +1,116 @@
+# SPDX-License-Identifier: MIT
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+from providers import grok_imagine
+from providers.grok_imagine import GrokImagineProvider
+
+_DONE = {"video": {"url": "https://cdn.example/v.mp4"}}
+
+
+class _FakeSession:
+    """Answers the create POST, then one poll per entry: a body dict or 304."""
+
+    def __init__(self, polls):
+        self._polls = list(polls)
+        self.calls = []
+
+    def post(self, url, **kwargs):
+        self.calls.append(("POST", url, None))
+        self.submitted = kwargs
+        return SimpleNamespace(status_code=200, headers={}, raise_for_status=lambda: None,
+                               json=lambda: {"request_id": "req-1"})
+
+    def get(self, url, headers=None, **kwargs):
+        self.calls.append(("GET", url, headers.get("If-None-Match")))
+        body = self._polls.pop(0)
+        if body == 304:
+            return SimpleNamespace(status_code=304, headers={})
+        return SimpleNamespace(status_code=200, headers={"ETag": f'"{len(self._polls)}"'},
+                               raise_for_status=lambda: None, content=json.dumps(body).encode())
+
+
+def _provider(monkeypatch, polls, **kwargs):
+    session = _FakeSession(polls)
+    sleeps = []
+    monkeypatch.setattr(grok_imagine, "_SESSION", session)
+    monkeypatch.setattr(grok_imagine, "CANCEL", SimpleNamespace(is_set=lambda: False, wait=sleeps.append))
+    monkeypatch.setattr(grok_imagine, "download_file", lambda url, output_path=None, prefix="": Path("/tmp/g.mp4"))
+    provider = GrokImagineProvider(api_key="k", api_base="https://api.example/v1", **kwargs)
+    return provider, session, sleeps
+
+
+def test_generate_submits_and_polls_over_shared_session(monkeypatch):
+    provider, session, _ = _provider(monkeypatch, [{"status": "pending"}, _DONE])
+
+    result = provider.generate("a cat")
+
+    assert result.output_path == Path("/tmp/g.mp4")
+    assert result.metadata["request_id"] == "req-1"
+    assert [call[:2] for call in session.calls] == [
+        ("POST", "https://api.example/v1/videos/generations"),
+        ("GET", "https://api.example/v1/videos/req-1"),
+        ("GET", "https://api.example/v1/videos/req-1"),
+    ]
+
+
+def test_submit_sends_compact_json_body(monkeypatch):
+    provider, session, _ = _provider(monkeypatch, [_DONE])
+
+    provider.generate("a cät", duration=6)
+
+    body = session.submitted["data"]
+    assert isinstance(body, bytes) and b", " not in body and b": " not in body
+    assert json.loads(body) == {"model": "grok-imagine-video", "prompt": "a cät", "duration": 6,
+                                "aspect_ratio": "1:1", "resolution": "720p"}
+    assert session.submitted["headers"]["Content-Type"] == "application/json"
+
+
+def test_poll_backs_off_and_revalidates_with_etag(monkeypatch):
+    polls = [{"status": "pending"}] + [304] * 6 + [_DONE]
+    provider, session, sleeps = _provider(monkeypatch, polls, max_poll_interval=4.0)
+
+    provider.generate("a cat")
+
+    assert sleeps == [1.0, 1.5, 2.25, 3.375, 4.0, 4.0, 4.0]
+    etags = [etag for method, _, etag in session.calls if method == "GET"]
+    assert etags[0] is None and set(etags[1:]) == {'"7"'}
+
+
+def test_pending_bodies_are_not_parsed(monkeypatch):
+    parsed = []
+    real_loads = grok_imagine._json_loads
+    monkeypatch.setattr(grok_imagine, "_json_loads", lambda body: parsed.append(body) or real_loads(body))
+    provider, _, _ = _provider(monkeypatch, [{"status": "pending", "progress": 40}] * 3 + [_DONE])
+
+    provider.generate("a cat")
+
+    assert len(parsed) == 1 and b"cdn.example" in parsed[0]
+
+
+def test_terminal_status_without_error_key_still_ends_polling(monkeypatch):
+    provider, session, _ = _provider(monkeypatch, [{"status": "pending"}, {"status": "FAILED"}])
+
+    try:
+        provider.generate("a cat")
+        assert False, "Expected RuntimeError"
+    except RuntimeError as exc:
+        assert "failed" in str(exc)
+    assert len(session.calls) == 3
+
+
+def test_cancel_stops_polling_before_the_next_request(monkeypatch):
+    import threading
+
+    provider, session, _ = _provider(monkeypatch, [{"status": "pending"}] * 5)
+    cancel = threading.Event()
+    monkeypatch.setattr(grok_imagine, "CANCEL", cancel)
+    monkeypatch.setattr(provider, "_backoff", lambda delay, deadline: cancel.set())
+
+    try:
+        provider.generate("a cat")
+        assert False, "Expected RuntimeError"
+    except RuntimeError as exc:
+        assert "cancelled" in str(exc)
+    assert len(session.calls) == 2
@@ -0,0 +1,500 @@
+# SPDX-License-Identifier: MIT
+import io
+import json
+import pathlib
+import struct
+import sys
+import types
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT / "tools") not in sys.path:
+    sys.path.insert(0, str(ROOT / "tools"))
+
+import grok_video  # noqa: E402
+from tools import _video_prep  # noqa: E402
+
+
+def _response(body=None, text=""):
+    def json():
+        if body is None:
+            raise ValueError("not json")
+        return body
+
+    return types.SimpleNamespace(json=json, text=text)
+
+
+def _parse_multipart(content_type, body):
+    from werkzeug.formparser import parse_form_data
+
+    environ = {"REQUEST_METHOD": "POST", "CONTENT_TYPE": content_type,
+               "CONTENT_LENGTH": str(len(body)), "wsgi.input": io.BytesIO(body)}
+    _, form, files = parse_form_data(environ)
+    return form, files
+
+
+def test_upload_streams_multipart_over_shared_session(monkeypatch, tmp_path):
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(b"mp4" * 50000)
+    sent = []
+
+    def fake_post(url, headers=None, data=None, timeout=None):
+        body = b"".join(iter(lambda: data.read(8192), b""))
+        assert len(body) == len(data)
+        sent.append((url, headers, body))
+        return _response({"ok": True, "video_id": "v1"})
+
+    monkeypatch.setattr(grok_video.SESSION, "post", fake_post)
+    monkeypatch.setattr(grok_video, "BOTTUBE_API_KEY", "key")
+
+    video_id = grok_video.upload_to_bottube(str(clip), "Tïtle", "D", tags=["a", " "], gen_method="grok")
+
+    assert video_id == "v1"
+    url, headers, body = sent[0]
+    assert url.endswith("/api/upload") and headers["X-API-Key"] == "key"
+    assert headers["Content-Length"] == str(len(body))
+    form, files = _parse_multipart(headers["Content-Type"], body)
+    assert form.to_dict() == {"title": "Tïtle", "description": "D", "tags": "a", "gen_method": "grok"}
+    assert files["video"].filename == "clip.mp4"
+    assert files["video"].mimetype == "video/mp4"
+    assert files["video"].read() == b"mp4" * 50000
+
+
+def test_multipart_upload_is_sent_with_content_length(tmp_path):
+    import requests
+
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(b"\0" * 1000)
+
+    with grok_video.MultipartUpload({"title": "t"}, "video", str(clip)) as body:
+        prepared = requests.Request("POST", "https://bottube.example/api/upload", data=body,
+                                    headers={"Content-Type": body.content_type}).prepare()
+
+    assert prepared.headers["Content-Length"] == str(len(body))
+    assert "Transfer-Encoding" not in prepared.headers
+    assert body.sent == 0
+
+    with grok_video.MultipartUpload({"title": "t"}, "video", str(clip)) as body:
+        sent = b"".join(iter(lambda: body.read(100), b""))
+    assert body.sent == len(sent) == len(body)
+
+
+def test_upload_rejects_non_json_response(monkeypatch, tmp_path):
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(b"mp4")
+    monkeypatch.setattr(grok_video.SESSION, "post", lambda *a, **k: _response(text="<html>502</html>"))
+    monkeypatch.setattr(grok_video, "BOTTUBE_API_KEY", "key")
+
+    with pytest.raises(RuntimeError, match="non-JSON"):
+        grok_video.upload_to_bottube(str(clip), "T")
+
+
+MB = 1024 * 1024
+
+
+class FakeFFmpeg:
+    """Stands in for subprocess.run: answers ffprobe, "encodes" by writing files.
+
+    sizes maps a CRF (or "copy", or a hardware encoder name) to the output
+    size in MB; None fails the run. encoders is the `ffmpeg -encoders` listing.
+    """
+
+    def __init__(self, info, sizes, encoders=""):
+        self.info = info
+        self.sizes = sizes
+        self.encoders = encoders
+        self.calls = []
+
+    def __call__(self, cmd, **kwargs):
+        self.calls.append(cmd)
+        if cmd[0] == "ffprobe":
+            return types.SimpleNamespace(returncode=0, stdout=json.dumps(self.info))
+        if "-encoders" in cmd:
+            return types.SimpleNamespace(returncode=0, stdout=self.encoders)
+        if "-crf" in cmd:
+            key = cmd[cmd.index("-crf") + 1]
+        elif "-b:v" in cmd:
+            key = cmd[cmd.index("-c:v") + 1]
+        else:
+            key = "copy"
+        if self.sizes.get(key) is None:
+            return types.SimpleNamespace(returncode=1, stdout=b"", stderr=b"failed")
+        pathlib.Path(cmd[-1]).write_bytes(b"\0" * int(self.sizes[key] * MB))
+        return types.SimpleNamespace(returncode=0, stdout=b"", stderr=b"")
+
+    @property
+    def encodes(self):
+        return [c for c in self.calls if c[0] == "ffmpeg" and "-encoders" not in c]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_encoder_probe():
+    _video_prep.ffmpeg_encoders.cache_clear()
+    grok_video._HW_FAILED.clear()
+    yield
+    _video_prep.ffmpeg_encoders.cache_clear()
+    grok_video._HW_FAILED.clear()
+
+
+def _info(width=1280, height=720, duration=5.0, size_mb=1.0):
+    return {"format": {"duration": str(duration), "size": str(int(size_mb * MB))},
+            "streams": [{"codec_type": "video", "codec_name": "h264", "width": width, "height": height}]}
+
+
+def test_prepare_encodes_with_veryfast_preset(monkeypatch, tmp_path):
+    fake = FakeFFmpeg(_info(), {"28": 1.2})
+    monkeypatch.setattr(grok_video.subprocess, "run", fake)
+
+    prepared = grok_video.prepare_for_bottube(str(tmp_path / "raw.mp4"))
+
+    assert prepared.endswith("raw_bottube.mp4")
+    assert len(fake.encodes) == 1
+    cmd = fake.encodes[0]
+    assert cmd[cmd.index("-preset") + 1] == "veryfast"
+    assert cmd[cmd.index("-maxrate") + 1] == "1800k"
+    assert cmd[cmd.index("-bufsize") + 1] == "3600k"
+    # -fs would truncate an oversized clip and exit 0, skipping the CRF retry
+    assert "-fs" not in cmd
+
+
+def test_prepare_limits_input_and_scales_only_oversized_clips(monkeypatch, tmp_path):
+    fake = FakeFFmpeg(_info(width=1280, height=720), {"28": 1.0})
+    monkeypatch.setattr(grok_video.subprocess, "run", fake)
+    grok_video.prepare_for_bottube(str(tmp_path / "raw.mp4"))
+    cmd = fake.encodes[0]
+    assert cmd.index("-t") < cmd.index("-i") and "-vf" in cmd
+    assert cmd[cmd.index("-threads") + 1] == "0"
+
+    fake = FakeFFmpeg(_info(width=720, height=720, size_mb=3.0), {"28": 1.0})
+    monkeypatch.setattr(grok_video.subprocess, "run", fake)
+    grok_video.prepare_for_bottube(str(tmp_path / "raw.mp4"))
+    assert "-vf" not in fake.encodes[0]
+
+    fake = FakeFFmpeg(_info(width=1080, height=1080), {"28": 1.0})
+    monkeypatch.setattr(grok_video.subprocess, "run", fake)
+    grok_video.prepare_for_bottube(str(tmp_path / "raw.mp4"))
+    cmd = fake.encodes[0]
+    assert cmd[cmd.index("-vf") + 1] == "scale=720:720"
+
+
+def test_prepare_retries_at_higher_crf_when_over_cap(monkeypatch, tmp_path):
+    fake = FakeFFmpeg(_info(), {"28": 2.5, "32": 1.8})
+    monkeypatch.setattr(grok_video.subprocess, "run", fake)
+
+    prepared = grok_video.prepare_for_bottube(str(tmp_path / "raw.mp4"))
+
+    assert [c[c.index("-crf") + 1] for c in fake.encodes] == ["28", "32"]
+    assert pathlib.Path(prepared).stat().st_size <= grok_video.MAX_UPLOAD_BYTES
+
+
+def test_prepare_fails_when_every_crf_is_over_cap(monkeypatch, tmp_path):
+    monkeypatch.setattr(grok_video, "SCRATCH_DIR", tmp_path / "no-shm")
+    fake = FakeFFmpeg(_info(), {"28": 2.5, "32": 2.2})
+    monkeypatch.setattr(grok_video.subprocess, "run", fake)
+
+    with pytest.raises(RuntimeError, match="Could not encode"):
+        grok_video.prepare_for_bottube(str(tmp_path / "raw.mp4"))
+    assert len(fake.encodes) == 2
+    assert not (tmp_path / "raw_bottube.mp4").exists()
+
+
+def test_prepare_skips_compliant_video(monkeypatch, tmp_path):
+    fake = FakeFFmpeg(_info(width=720, height=720), {})
+    monkeypatch.setattr(grok_video.subprocess, "run", fake)
+    raw = str(tmp_path / "raw.mp4")
+
+    assert grok_video.prepare_for_bottube(raw) == raw
+    assert fake.encodes == []
+
+
+def test_prepare_trims_long_h264_with_stream_copy(monkeypatch, tmp_path):
+    fake = FakeFFmpeg(_info(width=720, height=720, duration=10.0), {"copy": 1.0})
+    monkeypatch.setattr(grok_video.subprocess, "run", fake)
+
+    grok_video.prepare_for_bottube(str(tmp_path / "raw.mp4"))
+
+    assert len(fake.encodes) == 1
+    cmd = fake.encodes[0]
+    assert cmd[cmd.index("-t") + 1] == "8" and cmd[cmd.index("-c") + 1] == "copy"
+    assert "libx264" not in cmd
+
+
+def test_prepare_reencodes_when_trim_copy_fails(monkeypatch, tmp_path):
+    fake = FakeFFmpeg(_info(width=720, height=720, duration=10.0), {"copy": None, "28": 1.0})
+    monkeypatch.setattr(grok_video.subprocess, "run", fake)
+
+    grok_video.prepare_for_bottube(str(tmp_path / "raw.mp4"))
+
+    assert len(fake.encodes) == 2 and "libx264" in fake.encodes[1]
+
+
+_NVENC_LISTING = " V....D h264_nvenc           NVIDIA NVENC H.264 encoder (codec h264)\n"
+
+
+def test_prepare_prefers_listed_hardware_encoder(monkeypatch, tmp_path):
+    fake = FakeFFmpeg(_info(), {"h264_nvenc": 1.4}, encoders=_NVENC_LISTING)
+    monkeypatch.setattr(grok_video.subprocess, "run", fake)
+
+    grok_video.prepare_for_bottube(str(tmp_path / "raw.mp4"))
+
+    assert len(fake.encodes) == 1
+    cmd = fake.encodes[0]
+    assert cmd[cmd.index("-c:v") + 1] == "h264_nvenc" and cmd[cmd.index("-b:v") + 1] == "1500k"
+    assert "libx264" not in cmd and "-maxrate" in cmd
+
+
+def test_prepare_falls_back_to_libx264_when_hardware_fails(monkeypatch, tmp_path):
+    fake = FakeFFmpeg(_info(), {"h264_nvenc": None, "28": 1.0}, encoders=_NVENC_LISTING)
+    monkeypatch.setattr(grok_video.subprocess, "run", fake)
+
+    grok_video.prepare_for_bottube(str(tmp_path / "raw.mp4"))
+    grok_video.prepare_for_bottube(str(tmp_path / "raw.mp4"))
+
+    codecs = [c[c.index("-c:v") + 1] for c in fake.encodes]
+    assert codecs == ["h264_nvenc", "libx264", "libx264"]
+
+
+def _box(kind, payload=b""):
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def _full_box(kind, version, body):
+    return _box(kind, bytes([version, 0, 0, 0]) + body)
+
+
+def _trak(handler, width=0, height=0, entry=b"mp4a"):
+    tkhd = _full_box(b"tkhd", 0, b"\0" * 72 + struct.pack(">II", width << 16, height << 16))
+    hdlr = _full_box(b"hdlr", 0, b"\0" * 4 + handler + b"\0" * 12 + b"\0")
+    stsd = _full_box(b"stsd", 0, struct.pack(">I", 1) + _box(entry, b"\0" * 70))
+    minf = _box(b"minf", _box(b"stbl", stsd))
+    return _box(b"trak", tkhd + _box(b"mdia", hdlr + minf))
+
+
+def _mp4(width, height, seconds, entry=b"avc1", mvhd_version=0):
+    if mvhd_version:
+        mvhd = _full_box(b"mvhd", 1, struct.pack(">QQIQ", 0, 0, 1000, int(seconds * 1000)) + b"\0" * 80)
+    else:
+        mvhd = _full_box(b"mvhd", 0, struct.pack(">IIII", 0, 0, 1000, int(seconds * 1000)) + b"\0" * 80)
+    moov = _box(b"moov", mvhd + _trak(b"soun") + _trak(b"vide", width, height, entry))
+    # moov after mdat, as an encoder without +faststart writes it
+    return _box(b"ftyp", b"isom\0\0\0\0") + _box(b"mdat", b"\0" * 4096) + moov
+
+
+@pytest.mark.parametrize("mvhd_version", [0, 1])
+def test_probe_reads_mp4_headers_without_ffprobe(monkeypatch, tmp_path, mvhd_version):
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(_mp4(1280, 720, 10.5, mvhd_version=mvhd_version))
+    monkeypatch.setattr(grok_video.subprocess, "run", FakeFFmpeg({}, {}))
+
+    info = grok_video.probe_video(str(clip))
+
+    assert grok_video.subprocess.run.calls == []
+    assert info == {"size": clip.stat().st_size, "duration": 10.5,
+                    "width": 1280, "height": 720, "codec_name": "h264"}
+
+
+@pytest.mark.parametrize("moov", [
+    _box(b"mvhd"),
+    _box(b"mvhd") + _trak(b"vide", 1280, 720, b"avc1"),
+    _full_box(b"mvhd", 0, b"\0" * 4) + _trak(b"vide", 1280, 720, b"avc1"),
+    _full_box(b"mvhd", 0, struct.pack(">IIII", 0, 0, 1000, 5000) + b"\0" * 80)
+    + _box(b"trak", _full_box(b"tkhd", 0, b"") + _box(b"mdia", _full_box(b"hdlr", 0, b"\0" * 4 + b"vide"))),
+], ids=["only-empty-mvhd", "empty-mvhd", "short-mvhd", "short-tkhd"])
+def test_probe_falls_back_to_ffprobe_for_malformed_boxes(monkeypatch, tmp_path, moov):
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(_box(b"ftyp", b"isom\0\0\0\0") + _box(b"moov", moov))
+    fake = FakeFFmpeg(_info(width=640, height=360), {})
+    monkeypatch.setattr(grok_video.subprocess, "run", fake)
+
+    info = grok_video.probe_video(str(clip))
+
+    assert fake.calls[0][0] == "ffprobe"
+    assert (info["width"], info["height"]) == (640, 360)
+
+
+def test_probe_falls_back_to_ffprobe_for_unreadable_files(monkeypatch, tmp_path):
+    clip = tmp_path / "clip.webm"
+    clip.write_bytes(b"\x1aE\xdf\xa3 not an mp4")
+    fake = FakeFFmpeg(_info(width=640, height=360), {})
+    monkeypatch.setattr(grok_video.subprocess, "run", fake)
+
+    info = grok_video.probe_video(str(clip))
+
+    assert fake.calls[0][0] == "ffprobe"
+    assert (info["width"], info["height"]) == (640, 360)
+
+
+def test_main_warms_bottube_connection_while_preparing(monkeypatch, tmp_path):
+    import threading
+
+    clip = tmp_path / "raw.mp4"
+    clip.write_bytes(b"mp4")
+    both_running = threading.Barrier(2, timeout=5)
+    uploaded = []
+
+    def fake_prepare(path):
+        both_running.wait()  # deadlocks unless the warm-up runs alongside
+        return path
+
+    monkeypatch.setattr(grok_video, "GROK_API_KEY", "k")
+    monkeypatch.setattr(grok_video, "generate_video",
+                        lambda **kw: types.SimpleNamespace(provider="grok", output_path=clip, metadata={}))
+    monkeypatch.setattr(grok_video, "prepare_for_bottube", fake_prepare)
+    monkeypatch.setattr(grok_video, "_warm_connection", both_running.wait)
+    monkeypatch.setattr(grok_video, "upload_to_bottube", lambda *a, **kw: uploaded.append(a))
+    monkeypatch.setattr(sys, "argv", ["grok_video.py", "a cat", "--upload", "--title", "T"])
+
+    grok_video.main()
+
+    assert uploaded[0][:2] == (str(clip), "T")
+
+
+def test_warm_connection_ignores_network_errors(monkeypatch):
+    import requests
+
+    def refuse(*args, **kwargs):
+        raise requests.ConnectionError("refused")
+
+    monkeypatch.setattr(grok_video.SESSION, "head", refuse)
+    grok_video._warm_connection()
+
+
+def test_batch_runs_every_prompt_in_one_process(monkeypatch, tmp_path):
+    prompts = tmp_path / "prompts.txt"
+    prompts.write_text("a cat\n\nbad prompt\na dog\n")
+    results = tmp_path / "runs.jsonl"
+    uploads = []
+
+    def fake_generate(prompt, output_path=None, **kwargs):
+        if prompt == "bad prompt":
+            raise RuntimeError("provider down")
+        pathlib.Path(output_path).write_bytes(b"mp4")
+        return types.SimpleNamespace(provider="grok", output_path=output_path, metadata={})
+
+    def fake_upload(path, title, *args, **kwargs):
+        uploads.append((path, title))
+        return f"v{len(uploads)}"
+
+    monkeypatch.setattr(grok_video, "GROK_API_KEY", "k")
+    monkeypatch.setattr(grok_video, "generate_video", fake_generate)
+    monkeypatch.setattr(grok_video, "prepare_for_bottube", lambda path: path)
+    monkeypatch.setattr(grok_video, "_warm_connection", lambda: None)
+    monkeypatch.setattr(grok_video, "upload_to_bottube", fake_upload)
+    monkeypatch.setattr(sys, "argv", ["grok_video.py", "--batch", str(prompts), "--upload", "--title", "T",
+                                      "--output", str(tmp_path / "clips"), "--results", str(results)])
+
+    grok_video.main()
+
+    records = [json.loads(line) for line in results.read_text().splitlines()]
+    assert [r["prompt"] for r in records] == ["a cat", "bad prompt", "a dog"]
+    assert records[1]["error"] == "provider down"
+    assert [r.get("video_id") for r in records] == ["v1", None, "v2"]
+    assert uploads == [(str(tmp_path / "clips" / "clip_001.mp4"), "T #1"),
+                       (str(tmp_path / "clips" / "clip_003.mp4"), "T #3")]
+
+
+def test_batch_without_results_keeps_stdout_pure_jsonl(monkeypatch, tmp_path, capsys):
+    prompts = tmp_path / "prompts.txt"
+    prompts.write_text("a cat\na dog\n")
+
+    def fake_generate(prompt, output_path=None, **kwargs):
+        clip = tmp_path / f"{prompt}.mp4"
+        clip.write_bytes(b"mp4")
+        return types.SimpleNamespace(provider="grok", output_path=clip, metadata={"request_id": "r"})
+
+    monkeypatch.setattr(grok_video, "GROK_API_KEY", "k")
+    monkeypatch.setattr(grok_video, "generate_video", fake_generate)
+    monkeypatch.setattr(sys, "argv", ["grok_video.py", "--batch", str(prompts)])
+
+    grok_video.main()
+
+    out, err = capsys.readouterr()
+    assert [json.loads(line)["prompt"] for line in out.splitlines()] == ["a cat", "a dog"]
+    assert "[1/2]" in err and "Provider used: grok" in err
+
+
+def test_prompt_and_batch_are_mutually_exclusive(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["grok_video.py"])
+    with pytest.raises(SystemExit):
+        grok_video.main()
+
+
+def test_parser_is_built_once_and_router_loads_lazily():
+    import subprocess
+
+    assert grok_video._build_parser() is grok_video._build_parser()
+    probe = ("import sys; sys.path.insert(0, 'tools'); import grok_video; "
+             "print('providers.router' in sys.modules)")
+    out = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+
+def test_prepare_encodes_on_scratch_dir_then_moves_into_place(monkeypatch, tmp_path):
+    scratch = tmp_path / "shm"
+    scratch.mkdir()
+    monkeypatch.setattr(grok_video, "SCRATCH_DIR", scratch)
+    fake = FakeFFmpeg(_info(), {"28": 1.0})
+    monkeypatch.setattr(grok_video.subprocess, "run", fake)
+
+    prepared = grok_video.prepare_for_bottube(str(tmp_path / "raw.mp4"))
+
+    assert pathlib.Path(fake.encodes[0][-1]).parent == scratch
+    assert pathlib.Path(prepared).stat().st_size == MB
+    assert list(scratch.iterdir()) == []
+
+
+def test_prepare_cleans_scratch_file_when_ffmpeg_fails(monkeypatch, tmp_path):
+    import subprocess
+
+    scratch = tmp_path / "shm"
+    scratch.mkdir()
+    monkeypatch.setattr(grok_video, "SCRATCH_DIR", scratch)
+
+    def failing(cmd, **kwargs):
+        if cmd[0] == "ffprobe":
+            return types.SimpleNamespace(returncode=0, stdout=json.dumps(_info()))
+        if "-encoders" in cmd:
+            return types.SimpleNamespace(returncode=0, stdout="")
+        pathlib.Path(cmd[-1]).write_bytes(b"partial")
+        raise subprocess.CalledProcessError(1, cmd)
+
+    monkeypatch.setattr(grok_video.subprocess, "run", failing)
+
+    with pytest.raises(subprocess.CalledProcessError):
+        grok_video.prepare_for_bottube(str(tmp_path / "raw.mp4"))
+    assert list(scratch.iterdir()) == []
+
+
+def test_sigint_sets_the_shared_cancel_flag():
+    from providers.utils import CANCEL
+
+    try:
+        with pytest.raises(KeyboardInterrupt):
+            grok_video._cancel_on_sigint(2, None)
+        assert CANCEL.is_set()
+    finally:
+        CANCEL.clear()
+
+
+def test_failed_encode_prints_ffmpeg_stderr_tail(monkeypatch, tmp_path, capsys):
+    import subprocess
+
+    seen = []
+
+    def failing(cmd, **kwargs):
+        if cmd[0] == "ffprobe":
+            return types.SimpleNamespace(returncode=0, stdout=json.dumps(_info()))
+        if "-encoders" in cmd:
+            return types.SimpleNamespace(returncode=0, stdout="")
+        seen.append(kwargs)
+        raise subprocess.CalledProcessError(1, cmd, stderr=b"noise " * 1000 + b"Unknown encoder 'libx264'")
+
+    monkeypatch.setattr(grok_video.subprocess, "run", failing)
+
+    with pytest.raises(subprocess.CalledProcessError):
+        grok_video.prepare_for_bottube(str(tmp_path / "raw.mp4"))
+
+    assert seen[0]["stdout"] is subprocess.DEVNULL and seen[0]["stderr"] is subprocess.PIPE
+    out = capsys.readouterr().out
+    assert "Unknown encoder 'libx264'" in out and len(out) < 2200
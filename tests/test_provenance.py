@@ -53,6 +53,13 @@ class TestProvenanceNode:
         assert d["video_id"] == "vid123"
         assert d["revision_of"] == "parent"
 
+    def test_node_is_immutable_and_hashable(self):
+        """Nodes can be shared by cached walks and used as dict keys."""
+        node = ProvenanceNode("vid1", "T", "@a", "2024-01-01")
+        with pytest.raises(AttributeError):
+            node.title = "changed"
+        assert {node: 1}[ProvenanceNode("vid1", "T", "@a", "2024-01-01")] == 1
+
 
 class TestLineageValidator:
     """Test lineage validation."""
@@ -89,6 +96,18 @@ class TestLineageValidator:
         with pytest.raises(CircularReferenceError):
             LineageValidator.check_circular_reference("vid15", "vid14", lineage)
 
+    def test_depth_limit_boundary(self):
+        """Exactly MAX_LINEAGE_DEPTH ancestors is allowed, one more is not."""
+        limit = LineageValidator.MAX_LINEAGE_DEPTH
+        lineage = {f"vid{i}": f"vid{i-1}" for i in range(2, limit + 1)}
+        LineageValidator.check_circular_reference("new", f"vid{limit}", lineage)
+
+        lineage[f"vid{limit + 1}"] = f"vid{limit}"
+        with pytest.raises(CircularReferenceError):
+            LineageValidator.check_circular_reference("new", f"vid{limit + 1}", lineage)
+        LineageValidator.check_circular_reference(
+            "new", f"vid{limit + 1}", lineage, max_depth=limit + 1)
+
     def test_validate_missing_parent(self):
         """Should raise for missing parent video."""
         with pytest.raises(VideoNotFoundError):
@@ -179,6 +198,34 @@ class TestLineageService:
         siblings = service.get_siblings("vid1")
         assert len(siblings) == 0
 
+    def test_descendants_follow_children_index_breadth_first(self, sample_data):
+        """Descendants come out level by level and respect max_depth."""
+        videos, lineage = sample_data
+        videos["vid5"] = {"title": "Third gen", "author": "@x", "created_at": "2024-01-05"}
+        lineage["vid5"] = "vid4"
+        service = LineageService(videos, lineage)
+
+        assert [n.video_id for n in service.get_descendants("vid1", max_depth=2)] == [
+            "vid2", "vid3", "vid4"]
+        assert [n.video_id for n in service.get_descendants("vid1")] == [
+            "vid2", "vid3", "vid4", "vid5"]
+        assert service._children == {"vid1": ["vid2", "vid3"], "vid2": ["vid4"], "vid4": ["vid5"]}
+
+    def test_traversals_are_cached_per_service(self, sample_data):
+        """Repeated queries should reuse the first walk."""
+        videos, lineage = sample_data
+        service = LineageService(videos, lineage)
+
+        first = service.get_ancestors("vid4")
+        first.clear()  # callers get their own list
+        service.get_lineage_tree("vid4")
+        service.get_remix_chain("vid4")
+
+        assert len(service.get_ancestors("vid4")) == 2
+        assert service._ancestors_cached.cache_info().misses == 1
+        assert service._ancestors_cached.cache_info().hits == 3
+        assert LineageService(videos, lineage)._ancestors_cached.cache_info().currsize == 0
+
 
 class TestEdgeCases:
     """Test edge cases and error handling."""
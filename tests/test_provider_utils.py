@@ -0,0 +1,175 @@
+# SPDX-License-Identifier: MIT
+from types import SimpleNamespace
+
+from providers import utils
+
+
+def test_download_file_to_temp_path(monkeypatch):
+    monkeypatch.setattr(utils, "stream_file", lambda url, timeout=180: iter([b"a" * 2048]))
+    monkeypatch.setattr(utils, "_range_target", lambda url, timeout: None)
+
+    dest = utils.download_file("https://cdn.example/v.mp4", prefix="test_video_")
+    try:
+        assert dest.name.startswith("test_video_")
+        assert dest.read_bytes() == b"a" * 2048
+    finally:
+        dest.unlink()
+
+
+def test_download_file_removes_partial_file_on_error(monkeypatch, tmp_path):
+    def broken_stream(url, timeout=180):
+        yield b"a" * 10
+        raise ConnectionError("reset")
+
+    monkeypatch.setattr(utils, "stream_file", broken_stream)
+    monkeypatch.setattr(utils, "_range_target", lambda url, timeout: None)
+    dest = tmp_path / "out" / "video.mp4"
+
+    try:
+        utils.download_file("https://cdn.example/v.mp4", str(dest))
+        assert False, "Expected ConnectionError"
+    except ConnectionError:
+        pass
+
+    assert not dest.exists()
+
+
+class _FakeResponse:
+    def __init__(self, body, headers):
+        self._body = body
+        self.headers = headers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self._body), chunk_size):
+            yield self._body[i:i + chunk_size]
+
+
+class _FakeSession:
+    def __init__(self, response):
+        self._response = response
+
+    def head(self, url, allow_redirects=True, timeout=180):
+        return SimpleNamespace(status_code=200, url=url, headers=self._response.headers)
+
+    def get(self, url, stream=True, timeout=180):
+        return self._response
+
+
+class _RangeSession:
+    """Serves body with byte-range support; records the Range headers asked for."""
+
+    def __init__(self, body, honour_ranges=True):
+        self._body = body
+        self._honour = honour_ranges
+        self.ranges = []
+
+    def head(self, url, allow_redirects=True, timeout=180):
+        headers = {"Accept-Ranges": "bytes", "Content-Length": str(len(self._body))}
+        return SimpleNamespace(status_code=200, url=url + "?signed", headers=headers)
+
+    def get(self, url, headers=None, stream=True, timeout=180):
+        spec = (headers or {}).get("Range")
+        if spec is None or not self._honour:
+            response = _FakeResponse(self._body, {"Content-Length": str(len(self._body))})
+            response.status_code = 200
+            return response
+        self.ranges.append((url, spec))
+        start, end = (int(n) for n in spec.split("=")[1].split("-"))
+        response = _FakeResponse(self._body[start:end + 1], {})
+        response.status_code = 206
+        return response
+
+
+def test_stream_file_detects_truncation(monkeypatch):
+    monkeypatch.setattr(utils, "_SESSION", _FakeSession(_FakeResponse(b"abc", {"Content-Length": "10"})))
+
+    try:
+        list(utils.stream_file("https://cdn.example/v.mp4"))
+        assert False, "Expected RuntimeError"
+    except RuntimeError as exc:
+        assert "got 3 of 10 bytes" in str(exc)
+
+
+def test_download_file_accepts_small_file_and_checks_sha256(monkeypatch, tmp_path):
+    import hashlib
+
+    body = b"tiny but valid"
+    monkeypatch.setattr(utils, "_SESSION", _FakeSession(_FakeResponse(body, {"Content-Length": str(len(body))})))
+    dest = tmp_path / "video.mp4"
+
+    result = utils.download_file("https://cdn.example/v.mp4", str(dest), sha256=hashlib.sha256(body).hexdigest())
+    assert result.read_bytes() == body
+
+    try:
+        utils.download_file("https://cdn.example/v.mp4", str(dest), sha256="0" * 64)
+        assert False, "Expected RuntimeError"
+    except RuntimeError as exc:
+        assert "Checksum mismatch" in str(exc)
+    assert not dest.exists()
+
+
+def test_download_file_fetches_large_bodies_as_parallel_ranges(monkeypatch, tmp_path):
+    import hashlib
+
+    body = bytes(range(256)) * (utils.RANGE_MIN_BYTES // 256 + 3)
+    session = _RangeSession(body)
+    monkeypatch.setattr(utils, "_SESSION", session)
+
+    dest = utils.download_file("https://cdn.example/v.mp4", str(tmp_path / "v.mp4"),
+                               sha256=hashlib.sha256(body).hexdigest())
+
+    assert dest.read_bytes() == body
+    assert len(session.ranges) == utils.RANGE_PARTS
+    assert all(url == "https://cdn.example/v.mp4?signed" for url, _ in session.ranges)
+
+
+def test_download_file_fails_cleanly_when_ranges_are_ignored(monkeypatch, tmp_path):
+    body = b"x" * (utils.RANGE_MIN_BYTES + 1)
+    monkeypatch.setattr(utils, "_SESSION", _RangeSession(body, honour_ranges=False))
+    dest = tmp_path / "v.mp4"
+
+    try:
+        utils.download_file("https://cdn.example/v.mp4", str(dest))
+        assert False, "Expected RuntimeError"
+    except RuntimeError as exc:
+        assert "HTTP 200" in str(exc)
+    assert not dest.exists()
+
+
+def test_fetch_range_stops_once_a_peer_aborts(monkeypatch, tmp_path):
+    import threading
+
+    monkeypatch.setattr(utils, "_SESSION", _RangeSession(b"x" * 64))
+    abort = threading.Event()
+    abort.set()
+
+    with open(tmp_path / "v.mp4", "w+b") as f:
+        try:
+            utils._fetch_range("https://cdn.example/v.mp4", f.fileno(), 0, 63, 30, abort)
+            assert False, "Expected RuntimeError"
+        except RuntimeError as exc:
+            assert "cancelled" in str(exc)
+        assert f.read() == b""
+
+
+def test_download_file_honours_global_cancel(monkeypatch, tmp_path):
+    body = b"small body"
+    monkeypatch.setattr(utils, "_SESSION", _FakeSession(_FakeResponse(body, {"Content-Length": str(len(body))})))
+    monkeypatch.setattr(utils.CANCEL, "is_set", lambda: True)
+    dest = tmp_path / "v.mp4"
+
+    try:
+        utils.download_file("https://cdn.example/v.mp4", str(dest))
+        assert False, "Expected RuntimeError"
+    except RuntimeError as exc:
+        assert "cancelled" in str(exc)
+    assert not dest.exists()
@@ -0,0 +1,82 @@
+# SPDX-License-Identifier: MIT
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+from providers import runway
+from providers.runway import RunwayProvider
+
+
+class _FakeTasks:
+    def __init__(self, statuses):
+        self._statuses = list(statuses)
+
+    def retrieve(self, task_id):
+        status = self._statuses.pop(0)
+        output = ["https://cdn.example/video.mp4"] if status == "SUCCEEDED" else []
+        return SimpleNamespace(status=status, output=output)
+
+
+class _FakeCreate:
+    def __init__(self):
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        return SimpleNamespace(id="task-1")
+
+
+class _AsyncWrap:
+    def __init__(self, inner):
+        self._inner = inner
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+
+        async def call(*args, **kwargs):
+            return attr(*args, **kwargs)
+
+        return call
+
+
+def _fake_download(url, output_path=None, *, prefix="video_", timeout=180):
+    return Path("/tmp/runway_test.mp4")
+
+
+def test_generate_polls_until_succeeded(monkeypatch):
+    monkeypatch.setattr(runway, "download_file", _fake_download)
+    text = _FakeCreate()
+    provider = RunwayProvider(api_key="k", poll_interval=0)
+    provider._client = SimpleNamespace(text_to_video=text, tasks=_FakeTasks(["RUNNING", "SUCCEEDED"]))
+
+    result = provider.generate("a cat", duration=9)
+
+    assert result.output_path == Path("/tmp/runway_test.mp4")
+    assert result.metadata["task_id"] == "task-1"
+    assert result.metadata["duration"] == 8
+    assert text.calls[0]["ratio"] == "1280:720"
+
+
+def test_generate_async_polls_until_succeeded(monkeypatch):
+    monkeypatch.setattr(runway, "download_file", _fake_download)
+    provider = RunwayProvider(api_key="k", poll_interval=0)
+    provider._async_client = SimpleNamespace(
+        text_to_video=_AsyncWrap(_FakeCreate()),
+        tasks=_AsyncWrap(_FakeTasks(["PENDING", "RUNNING", "SUCCEEDED"])),
+    )
+
+    result = asyncio.run(provider.generate_async("a cat", duration=4))
+
+    assert result.metadata["source_url"] == "https://cdn.example/video.mp4"
+    assert result.metadata["duration"] == 4
+
+
+def test_generate_raises_on_failed_task():
+    provider = RunwayProvider(api_key="k", poll_interval=0)
+    provider._client = SimpleNamespace(text_to_video=_FakeCreate(), tasks=_FakeTasks(["FAILED"]))
+
+    try:
+        provider.generate("a cat")
+        assert False, "Expected RuntimeError"
+    except RuntimeError as exc:
+        assert "Runway generation failed" in str(exc)
@@ -0,0 +1,475 @@
+# SPDX-License-Identifier: MIT
+import json
+import pathlib
+import sys
+import time
+import types
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import scraper_detective as sd  # noqa: E402
+
+
+def _detective(monkeypatch, asn=(0, "unknown", False)):
+    det = sd.ScraperDetective(hmac_secret="test")
+    monkeypatch.setattr(det, "_lookup_asn_batch", lambda sock, ips: {ip: asn for ip in ips})
+    return det
+
+
+def _wait_for_lookups(det, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with det._asn_pending_lock:
+            if not det._asn_pending:
+                return
+        time.sleep(0.005)
+    raise AssertionError("ASN lookups did not finish")
+
+
+def test_asn_cache_evicts_least_recently_used(monkeypatch):
+    det = _detective(monkeypatch, asn=(14061, "DigitalOcean", True))
+    det._ASN_CACHE_MAX = 2
+
+    for ip in ("1.1.1.1", "2.2.2.2"):
+        det.get_asn_info(ip)
+        _wait_for_lookups(det)
+
+    assert det.get_asn_info("1.1.1.1") == (14061, "DigitalOcean", True)
+
+    det.get_asn_info("3.3.3.3")
+    _wait_for_lookups(det)
+
+    assert list(det._asn_cache) == ["1.1.1.1", "3.3.3.3"]
+
+
+def _txt_response(query: bytes, txt: bytes) -> bytes:
+    header = query[:2] + b"\x81\x80\x00\x01\x00\x01\x00\x00\x00\x00"
+    rdata = bytes([len(txt)]) + txt
+    answer = b"\xc0\x0c\x00\x10\x00\x01\x00\x00\x0e\x10" + len(rdata).to_bytes(2, "big") + rdata
+    return header + query[12:] + answer
+
+
+def test_parse_asn_txt_roundtrip():
+    query = sd._build_txt_query("4.3.2.1.origin.asn.cymru.com", b"\x12\x34")
+    response = _txt_response(query, b"14061 | 1.2.3.0/24 | US | arin | 2012-01-01")
+
+    assert query[:2] == b"\x12\x34"
+    assert sd._parse_asn_txt(response) == 14061
+    assert sd._parse_asn_txt(response[:20]) == 0
+
+
+class _Clock:
+    def __init__(self, start=1_000_000.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+
+def test_classify_flags_uniform_sequential_crawl(monkeypatch):
+    det = _detective(monkeypatch)
+    clock = _Clock()
+    monkeypatch.setattr(sd.time, "time", clock)
+
+    for i in range(1, 41):
+        det.record_request("9.9.9.9", "python-requests/2.31", f"/video/{i}", "", True)
+        clock.now += 0.5
+
+    label, score, signals = det.classify("9.9.9.9", "python-requests/2.31")
+
+    assert signals["timing_uniform"] == 0.0
+    assert signals["sequential_crawl"] == 38
+    assert signals["high_velocity"] == 615
+    assert signals["high_page_asset_ratio"] == 40.0
+    assert signals["single_ua_many_paths"] == 40
+    assert label == "bot"
+
+
+def test_classify_human_like_browsing(monkeypatch):
+    det = _detective(monkeypatch)
+    clock = _Clock()
+    monkeypatch.setattr(sd.time, "time", clock)
+
+    for i, gap in enumerate((3.0, 41.0, 2.5, 17.0, 90.0, 6.0)):
+        det.record_request("8.8.4.4", "Mozilla/5.0", "/watch/abc" if i % 2 else "/static/app.js", "", False)
+        clock.now += gap
+    det.record_js_proof("8.8.4.4")
+
+    label, score, signals = det.classify("8.8.4.4", "Mozilla/5.0")
+
+    assert label == "human"
+    assert "timing_uniform" not in signals
+    assert "sequential_crawl" not in signals
+
+
+def test_asset_match_mirrors_prefix_list():
+    for path in ("/static/app.js", "/avatar/x.png", "/avatars/y.png", "/favicon.ico",
+                 "/static", "/statics/a", "/api/videos", "/watch/abc", "/badge", "/stats/x"):
+        expected = any(path.startswith(p) for p in sd._ASSET_PREFIXES)
+        assert (sd._ASSET_MATCH(path) is not None) == expected, path
+
+
+def test_behavior_window_ring_buffer_wraps_in_order():
+    bw = sd.BehaviorWindow()
+    for i in range(bw.TS_WINDOW + 3):
+        bw.append_ts(float(i))
+
+    snap = bw.ts_snapshot()
+    assert bw.request_count == bw.TS_WINDOW
+    assert snap[0] == 3.0 and snap[-1] == float(bw.TS_WINDOW + 2)
+    assert list(snap) == sorted(snap)
+    assert bw.count_since(float(bw.TS_WINDOW)) == 2
+
+
+def test_behavior_window_incremental_stats_match_full_scan():
+    import random
+    import statistics
+
+    rng = random.Random(7)
+    bw = sd.BehaviorWindow()
+    t = 0.0
+    for i in range(bw.TS_WINDOW * 2 + 37):
+        t += rng.uniform(0.1, 5.0)
+        bw.append_ts(t)
+        bw.append_path(f"/video/{i}" if rng.random() < 0.7 else "/watch/x")
+
+    snap = list(bw.ts_snapshot())
+    intervals = [b - a for a, b in zip(snap, snap[1:])]
+    k, mean, var = bw.timing_stats()
+    assert k == len(intervals)
+    assert abs(mean - statistics.fmean(intervals)) < 1e-9
+    assert abs(var - statistics.pvariance(intervals)) < 1e-6
+    assert abs(bw.span() - (snap[-1] - snap[0])) < 1e-9
+
+    tails = [sd._split_numeric_tail(p) for p in bw.paths]
+    expected = sum(sd._is_sequential(*tails[i - 2:i + 1]) for i in range(2, len(tails)))
+    assert bw.seq_runs == expected
+    assert len(bw.unique_paths) == len(set(bw.paths))
+    assert bw.deep_count == sum(1 for p in bw.paths if p.count("/") >= 2)
+
+
+def test_lookup_asn_batch_matches_out_of_order_replies():
+    import socket
+    import threading
+
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(("127.0.0.1", 0))
+    answers = {b"4": b"14061 | 1.2.3.0/24 | US", b"8": b"16509 | 5.6.7.0/24 | US"}
+
+    def serve():
+        queries = [server.recvfrom(512) for _ in range(2)]
+        for data, addr in reversed(queries):
+            txt = answers[data[13:14]]  # first label of the reversed IP
+            reply = _txt_response(data, txt)
+            server.sendto(bytes([reply[0] ^ 0xFF]) + reply[1:], addr)  # mismatched txn id
+            server.sendto(reply, addr)
+
+    threading.Thread(target=serve, daemon=True).start()
+
+    det = sd.ScraperDetective(hmac_secret="test")
+    det._resolver_addr = server.getsockname()
+    client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    client.setblocking(False)
+    try:
+        results = det._lookup_asn_batch(client, ["1.2.3.4", "5.6.7.8", "bad-ip"])
+    finally:
+        client.close()
+        server.close()
+
+    assert results["1.2.3.4"] == (14061, "DigitalOcean", True)
+    assert results["5.6.7.8"] == (16509, "Amazon AWS", True)
+    assert results["bad-ip"] == (0, "invalid_ip", False)
+
+
+def test_js_proof_signals(monkeypatch):
+    det = _detective(monkeypatch)
+    for _ in range(3):
+        det.record_page_view("7.7.7.7")
+
+    assert det.classify("7.7.7.7")[2]["no_js_proof"] == "3_views"
+
+    det._class_cache.clear()
+    det.record_js_proof("7.7.7.7", webdriver=True, no_plugins=True)
+    signals = det.classify("7.7.7.7")[2]
+
+    assert "no_js_proof" not in signals
+    assert signals["webdriver"] is True
+    assert signals["zero_plugins"] is True
+
+
+def test_sign_and_verify_proof(monkeypatch):
+    det = _detective(monkeypatch)
+    tag = det.sign_proof("1.2.3.4|1700000000")
+
+    assert det.verify_proof("1.2.3.4|1700000000", tag)
+    assert not det.verify_proof("1.2.3.5|1700000000", tag)
+    assert not det.verify_proof("1.2.3.4|1700000000", "")
+    assert not sd.ScraperDetective(hmac_secret="other").verify_proof("1.2.3.4|1700000000", tag)
+
+
+def test_active_visitors_and_summary_cover_all_shards(monkeypatch):
+    det = _detective(monkeypatch)
+    ips = [f"10.0.{i // 250}.{i % 250}" for i in range(100)]
+    for ip in ips:
+        det.record_request(ip, "Mozilla/5.0", "/", "", False)
+
+    visitors = det.get_active_visitors()
+    summary = det.get_summary()
+
+    assert sorted(v["ip"] for v in visitors) == sorted(ips)
+    assert summary["total_active"] == 100
+    assert summary["requests_per_min"] == 100
+
+
+def test_count_since_bisects_both_ring_segments():
+    bw = sd.BehaviorWindow()
+    stamps = [float(i) for i in range(bw.TS_WINDOW + 137)]
+    for t in stamps:
+        bw.append_ts(t)
+
+    kept = stamps[-bw.TS_WINDOW:]
+    for cutoff in (-1.0, 0.0, 136.5, 200.0, float(bw.TS_WINDOW + 100), 1e9):
+        assert bw.count_since(cutoff) == sum(1 for t in kept if t > cutoff), cutoff
+
+
+def test_summary_reuses_visitors_and_is_memoised(monkeypatch):
+    det = _detective(monkeypatch)
+    clock = _Clock()
+    monkeypatch.setattr(sd.time, "time", clock)
+    det.record_request("10.1.1.1", "Mozilla/5.0", "/", "", False)
+    visitors = det.get_active_visitors()
+
+    monkeypatch.setattr(det, "get_active_visitors", lambda: [])
+    summary = det.get_summary(visitors)
+    assert summary["total_active"] == 1
+    assert summary["requests_per_min"] == 1
+
+    det.record_request("10.1.1.2", "Mozilla/5.0", "/", "", False)
+    assert det.get_summary() is summary
+
+    clock.now += det._SUMMARY_TTL
+    assert det.get_summary()["total_active"] == 0
+
+
+def test_summary_of_given_visitors_ignores_the_memo(monkeypatch):
+    det = _detective(monkeypatch)
+    det.record_request("10.1.2.1", "Mozilla/5.0", "/", "", False)
+    visitors = det.get_active_visitors()
+
+    assert det.get_summary([])["total_active"] == 0
+    assert det.get_summary(visitors)["total_active"] == 1
+
+
+def test_evict_expired_uses_heap_and_keeps_refreshed_entries(monkeypatch):
+    det = _detective(monkeypatch)
+    clock = _Clock()
+    monkeypatch.setattr(sd.time, "time", clock)
+
+    det.record_request("1.1.1.1", "Mozilla/5.0", "/", "", False)
+    det.record_request("2.2.2.2", "Mozilla/5.0", "/", "", False)
+    det.classify("1.1.1.1")
+
+    clock.now += det._BEHAVIOR_TTL - 10
+    det.record_request("2.2.2.2", "Mozilla/5.0", "/watch/x", "", False)  # refresh
+    clock.now += 20
+    det._evict_expired(clock.now)
+
+    active = {v["ip"] for v in det.get_active_visitors()}
+    assert active == {"2.2.2.2"}
+    assert "1.1.1.1" not in det._class_cache
+    assert sum(len(h) for h in det._behavior_expiry) == 1
+
+
+def test_ua_signature_matching_keeps_priority_order(monkeypatch):
+    monkeypatch.setattr(sd, "_KNOWN_SCRAPERS_LOWER", (("googlebot", "Googlebot"), ("curl", "curl")))
+    monkeypatch.setattr(sd, "_KNOWN_SCRAPERS_RE", sd._any_substring_re(("googlebot", "curl")))
+
+    assert sd._match_known_scraper("curl/8.0 (compatible; googlebot)") == "Googlebot"
+    assert sd._match_known_scraper("mozilla/5.0 firefox") is None
+    assert sd._first_contained("mozilla bingbot applebot", sd._SEARCH_ENGINE_RE,
+                               sd.SEARCH_ENGINE_UA_SIGS) == "bingbot"
+
+
+def test_spoofed_engine_on_hosting_asn(monkeypatch):
+    det = _detective(monkeypatch, asn=(14061, "DigitalOcean", True))
+    det.get_asn_info("5.5.5.5")
+    _wait_for_lookups(det)
+
+    signals = det.classify("5.5.5.5", "Mozilla/5.0 (compatible; Googlebot/2.1)")[2]
+
+    assert signals["spoofed_engine_ua"] == "googlebot"
+    assert "hosting_asn" not in signals
+
+
+def test_dns_txt_query_reuses_thread_socket_and_skips_stale_replies():
+    import socket
+    import threading
+
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(("127.0.0.1", 0))
+
+    def serve():
+        for _ in range(2):
+            data, addr = server.recvfrom(512)
+            reply = _txt_response(data, b"20473 | x")
+            server.sendto(bytes([reply[0] ^ 0xFF]) + reply[1:], addr)  # stale txn id
+            server.sendto(reply, addr)
+
+    threading.Thread(target=serve, daemon=True).start()
+
+    det = sd.ScraperDetective(hmac_secret="test")
+    det._resolver_addr = server.getsockname()
+    try:
+        assert det._dns_txt_query("1.0.0.10.origin.asn.cymru.com") == 20473
+        first = det._tls.dns_sock
+        assert det._dns_txt_query("2.0.0.10.origin.asn.cymru.com") == 20473
+        assert det._tls.dns_sock is first
+    finally:
+        det._tls.dns_sock.close()
+        server.close()
+
+
+def _admin_client(monkeypatch, det):
+    from flask import Flask
+
+    monkeypatch.setitem(sys.modules, "bottube_server", types.SimpleNamespace(ADMIN_KEY="k"))
+    monkeypatch.setattr(sd, "detective", det)
+    app = Flask(__name__)
+    app.register_blueprint(sd.scraper_bp)
+    return app.test_client()
+
+
+def test_admin_scrapers_answers_unchanged_polls_with_304(monkeypatch):
+    det = _detective(monkeypatch)
+    client = _admin_client(monkeypatch, det)
+    monkeypatch.setattr(sd.time, "time", _Clock())
+    det.get_summary([])  # a fresh memo that no longer matches the visitors
+    det.record_request("10.2.2.2", "Mozilla/5.0", "/", "", False)
+
+    first = client.get("/api/admin/scrapers?key=k")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "no-store"
+    assert [v["ip"] for v in first.get_json()["visitors"]] == ["10.2.2.2"]
+    assert first.get_json()["summary"]["total_active"] == 1
+
+    again = client.get("/api/admin/scrapers?key=k", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.get_data() == b""
+
+    det.block_ip("10.2.2.2")
+    changed = client.get("/api/admin/scrapers?key=k", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_admin_scrapers_ndjson_streams_visitors_then_summary(monkeypatch):
+    det = _detective(monkeypatch)
+    client = _admin_client(monkeypatch, det)
+    clock = _Clock()
+    monkeypatch.setattr(sd.time, "time", clock)
+    det.get_summary()  # memo of an empty detective
+    for ip in ("10.3.3.1", "10.3.3.2", "10.3.3.3"):
+        det.record_request(ip, "Mozilla/5.0", "/", "", False)
+        clock.now += 1
+
+    resp = client.get("/api/admin/scrapers.ndjson?key=k")
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+
+    assert resp.mimetype == "application/x-ndjson"
+    assert [v["ip"] for v in lines[:-1]] == ["10.3.3.3", "10.3.3.2", "10.3.3.1"]
+    assert lines[-1]["summary"]["total_active"] == 3
+    assert client.get("/api/admin/scrapers.ndjson?key=k",
+                      headers={"If-None-Match": resp.headers["ETag"]}).status_code == 304
+    assert client.get("/api/admin/scrapers.ndjson").status_code == 403
+    assert client.get("/api/admin/scrapers.ndjson?key=kk").status_code == 403
+
+
+def test_scraper_dashboard_checks_the_admin_key(monkeypatch):
+    client = _admin_client(monkeypatch, _detective(monkeypatch))
+
+    assert client.get("/scraper-dashboard?key=k").status_code == 200
+    assert client.get("/scraper-dashboard?key=kk").status_code == 403
+    assert client.get("/scraper-dashboard").status_code == 403
+
+
+def test_json_bytes_matches_with_and_without_orjson(monkeypatch):
+    payload = {"ip": "10.0.0.1", "signals": {"ua": "curl/8"}, "n": [1, 2.5, None, True], 7: "x"}
+    fast = sd._json_bytes(payload)
+    monkeypatch.setattr(sd, "orjson", None)
+    slow = sd._json_bytes(payload)
+    assert json.loads(fast) == json.loads(slow)
+    assert b" " not in slow
+
+
+def test_visitor_signals_are_display_strings_reused_per_classification(monkeypatch):
+    det = _detective(monkeypatch)
+    clock = _Clock()
+    monkeypatch.setattr(sd.time, "time", clock)
+    for i in range(1, 41):
+        det.record_request("9.9.9.8", "python-requests/2.31", f"/video/{i}", "", True)
+        clock.now += 0.5
+
+    first = det.get_active_visitors()[0]["signals"]
+    assert first["timing_uniform"] == "0"
+    assert first["sequential_crawl"] == "38"
+    assert all(isinstance(v, str) for v in first.values())
+    assert det.get_active_visitors()[0]["signals"] is first
+    assert sd._signal_text(True) == "true"
+    assert sd._signal_text(12.5) == "12.5"
+
+
+def test_admin_scrapers_stream_pushes_only_changes(monkeypatch):
+    det = _detective(monkeypatch)
+    client = _admin_client(monkeypatch, det)
+    monkeypatch.setattr(sd, "_STREAM_TICK", 0.01)
+    monkeypatch.setattr(sd, "_STREAM_MIN_INTERVAL", 0.0)
+    det.get_summary([])  # a stale memo the stream must not reuse
+    for ip in ("10.4.4.1", "10.4.4.2"):
+        det.record_request(ip, "Mozilla/5.0", "/", "", False)
+    _wait_for_lookups(det)
+
+    resp = client.get("/api/admin/scrapers/stream?key=k", buffered=False)
+    chunks = iter(resp.response)
+    assert resp.mimetype == "text/event-stream"
+    assert next(chunks).startswith(b"retry:")
+
+    def next_event():
+        chunk = next(chunks)
+        while not chunk.startswith(b"data: "):
+            chunk = next(chunks)
+        return json.loads(chunk[len(b"data: "):])
+
+    first = next_event()
+    assert first["reset"] is True
+    assert sorted(v["ip"] for v in first["upsert"]) == ["10.4.4.1", "10.4.4.2"]
+    assert first["summary"]["total_active"] == 2
+
+    det.block_ip("10.4.4.2")
+    second = next_event()
+    assert "reset" not in second
+    assert [v["ip"] for v in second["upsert"]] == ["10.4.4.2"]
+    assert second["upsert"][0]["is_blocked"] is True
+    assert second["remove"] == []
+    resp.close()
+
+
+def test_admin_scrapers_stream_rebuilds_at_most_once_per_interval(monkeypatch):
+    det = _detective(monkeypatch)
+    client = _admin_client(monkeypatch, det)
+    monkeypatch.setattr(sd, "_STREAM_TICK", 0.01)
+    monkeypatch.setattr(sd, "_STREAM_HEARTBEAT", 0.05)
+    monkeypatch.setattr(sd, "_STREAM_MIN_INTERVAL", 60.0)
+    det.record_request("10.4.5.1", "Mozilla/5.0", "/", "", False)
+    _wait_for_lookups(det)
+
+    resp = client.get("/api/admin/scrapers/stream?key=k", buffered=False)
+    chunks = iter(resp.response)
+    next(chunks)  # retry:
+    assert next(chunks).startswith(b"data: ")
+
+    det.block_ip("10.4.5.1")  # moves the tag, but within the interval
+    assert next(chunks).startswith(b": keep-alive")
+    resp.close()
@@ -1,10 +1,19 @@
 # SPDX-License-Identifier: MIT
 from pathlib import Path
 
+import pytest
+
 from providers.base import GeneratedVideo
 from providers import router
 
 
+@pytest.fixture(autouse=True)
+def _fresh_health():
+    router.clear_provider_health()
+    yield
+    router.clear_provider_health()
+
+
 class FailProvider:
     def generate(self, prompt: str, duration: int = 8, **kwargs):
         raise RuntimeError("forced failure")
@@ -59,3 +68,100 @@ def test_generate_video_without_fallback_raises(monkeypatch):
         assert False, "Expected RuntimeError"
     except RuntimeError as exc:
         assert "All provider attempts failed" in str(exc)
+
+
+def test_choose_provider_hints_are_case_insensitive():
+    assert router.choose_provider("A CINEMATIC Sunrise", prefer="auto") == "runway"
+    assert router.choose_provider("Grok does a cinematic dance", prefer="auto") == "grok"
+
+
+def test_generate_video_reuses_provider_instances(monkeypatch):
+    created = []
+
+    def factory():
+        provider = SuccessProvider("grok")
+        created.append(provider)
+        return provider
+
+    monkeypatch.setattr(router, "_PROVIDER_FACTORIES", {"grok": factory, "runway": FailProvider})
+    router.clear_provider_cache()
+
+    router.generate_video("test", prefer="grok")
+    router.generate_video("test", prefer="grok")
+
+    assert len(created) == 1
+
+
+def test_generate_video_error_is_bounded_and_chained(monkeypatch):
+    class NoisyProvider:
+        def generate(self, prompt: str, duration: int = 8, **kwargs):
+            raise ValueError("x" * 5000)
+
+    monkeypatch.setattr(router, "_PROVIDER_FACTORIES", {"grok": NoisyProvider, "runway": NoisyProvider})
+
+    try:
+        router.generate_video("test", prefer="grok")
+        assert False, "Expected RuntimeError"
+    except RuntimeError as exc:
+        assert "grok[ValueError]" in str(exc)
+        assert len(str(exc)) < 1000
+        assert isinstance(exc.__cause__, ValueError)
+
+
+def test_generate_video_runway_skips_selection(monkeypatch):
+    monkeypatch.setattr(
+        router,
+        "_PROVIDER_FACTORIES",
+        {"grok": lambda: SuccessProvider("grok"), "runway": FailProvider},
+    )
+
+    result = router.generate_video_runway("grok please", duration=5)
+
+    assert result.provider == "grok"
+    assert result.metadata["router_primary"] == "runway"
+    assert result.metadata["router_fallback_used"] is True
+
+
+def test_choose_provider_memoizes_on_lowercased_prompt():
+    router._classify_prompt.cache_clear()
+
+    assert router.choose_provider("Filmic Ocean", prefer="auto") == "runway"
+    assert router.choose_provider("FILMIC OCEAN", prefer="auto") == "runway"
+    assert router.choose_provider("", prefer="auto") == "grok"
+
+    info = router._classify_prompt.cache_info()
+    assert info.hits == 1
+    assert info.misses == 2
+
+
+def test_recently_failed_provider_is_tried_last(monkeypatch):
+    calls = []
+
+    class Flaky:
+        def __init__(self, name, fail):
+            self.name, self.fail = name, fail
+
+        def generate(self, prompt: str, duration: int = 8, **kwargs):
+            calls.append(self.name)
+            if self.fail:
+                raise RuntimeError("down")
+            return GeneratedVideo(provider=self.name, output_path=Path("/tmp/video.mp4"), metadata={})
+
+    monkeypatch.setattr(
+        router,
+        "_PROVIDER_FACTORIES",
+        {"grok": lambda: Flaky("grok", True), "runway": lambda: Flaky("runway", False)},
+    )
+    router.clear_provider_cache()
+
+    router.generate_video("test", prefer="grok")
+    result = router.generate_video("test", prefer="grok")
+
+    assert calls == ["grok", "runway", "runway"]
+    assert result.metadata["router_primary"] == "grok"
+    assert result.metadata["router_fallback_used"] is True
+
+    # Once the cooldown has passed the primary is tried first again.
+    monkeypatch.setattr(router, "_HEALTH_COOLDOWN_SECONDS", 0.0)
+    router.generate_video("test", prefer="grok")
+    assert calls[3:] == ["grok", "runway"]
@@ -0,0 +1,135 @@
+# SPDX-License-Identifier: MIT
+"""Video prep helpers shared by grok_video.py and grok_agent.py.
+
+Both scripts shrink clips for BoTTube with ffmpeg; the MP4 header probe and
+the ffmpeg encoder listing live here so they run (and are cached) once.
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+import struct
+import subprocess
+
+# MP4 sample entry type -> ffprobe codec_name, for the codecs worth naming.
+_MP4_CODECS = {b"avc1": "h264", b"avc3": "h264", b"hvc1": "hevc", b"hev1": "hevc", b"av01": "av1", b"vp09": "vp9"}
+
+
+def _mp4_boxes(data: bytes, start: int = 0, end: int | None = None):
+    """Yield (type, payload start, payload end) for each box in data[start:end]."""
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", data, pos)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise ValueError(f"bad {kind!r} box at {pos}")
+        yield kind, pos + header, pos + size
+        pos += size
+
+
+def _child(data: bytes, start: int, end: int, kind: bytes) -> tuple[int, int]:
+    for child_kind, child_start, child_end in _mp4_boxes(data, start, end):
+        if child_kind == kind:
+            return child_start, child_end
+    raise ValueError(f"no {kind!r} box")
+
+
+def _read_moov(path: str, file_size: int) -> bytes:
+    """The moov box payload, found by hopping over top-level box headers."""
+    with open(path, "rb") as f:
+        pos = 0
+        while pos + 8 <= file_size:
+            f.seek(pos)
+            header = f.read(16)
+            size, kind = struct.unpack_from(">I4s", header)
+            header_len = 8
+            if size == 1:
+                size = struct.unpack_from(">Q", header, 8)[0]
+                header_len = 16
+            elif size == 0:
+                size = file_size - pos
+            if size < header_len:
+                raise ValueError(f"bad {kind!r} box at {pos}")
+            if kind == b"moov":
+                f.seek(pos + header_len)
+                return f.read(size - header_len)
+            pos += size
+    raise ValueError("no moov box")
+
+
+def _need(start: int, end: int, length: int, kind: bytes) -> None:
+    """Raise ValueError unless the payload start..end holds at least length bytes."""
+    if end - start < length:
+        raise ValueError(f"{kind!r} box too short ({end - start} < {length} bytes)")
+
+
+def probe_mp4(path: str) -> dict:
+    """Duration, size, geometry and codec straight from the MP4 headers.
+
+    Raises ValueError for any layout it cannot read (fragmented or non-MP4
+    files, truncated boxes, no video track) and OSError if the file cannot
+    be opened; callers fall back to ffprobe on either.
+    """
+    size = os.stat(path).st_size
+    try:
+        info = _moov_info(_read_moov(path, size))
+    except (struct.error, IndexError) as exc:
+        raise ValueError(f"unreadable MP4 headers in {path}: {exc}") from exc
+    info["size"] = size
+    return info
+
+
+def _moov_info(moov: bytes) -> dict:
+    """Duration, geometry and codec from a moov payload."""
+    info = {}
+    for kind, start, end in _mp4_boxes(moov):
+        if kind == b"mvhd":
+            _need(start, end, 1, kind)
+            _need(start, end, 32 if moov[start] == 1 else 20, kind)
+            if moov[start] == 1:
+                timescale, duration = struct.unpack_from(">IQ", moov, start + 20)
+            else:
+                timescale, duration = struct.unpack_from(">II", moov, start + 12)
+            if not timescale or not duration:
+                raise ValueError("no movie duration")
+            info["duration"] = duration / timescale
+        elif kind == b"trak" and "width" not in info:
+            mdia = _child(moov, start, end, b"mdia")
+            hdlr = _child(moov, *mdia, b"hdlr")
+            _need(*hdlr, 12, b"hdlr")
+            if moov[hdlr[0] + 8:hdlr[0] + 12] != b"vide":
+                continue
+            tkhd = _child(moov, start, end, b"tkhd")
+            _need(*tkhd, 84, b"tkhd")
+            width, height = struct.unpack_from(">II", moov, tkhd[1] - 8)
+            info["width"], info["height"] = width >> 16, height >> 16
+            stbl = _child(moov, *_child(moov, *mdia, b"minf"), b"stbl")
+            stsd = _child(moov, *stbl, b"stsd")
+            _need(*stsd, 16, b"stsd")
+            entry = moov[stsd[0] + 12:stsd[0] + 16]
+            info["codec_name"] = _MP4_CODECS.get(entry, entry.decode("latin-1"))
+    if "duration" not in info or "width" not in info:
+        raise ValueError("no movie header or video track")
+    return info
+
+
+@functools.lru_cache(maxsize=1)
+def ffmpeg_encoders() -> frozenset[str]:
+    """Names of the encoders this ffmpeg build lists, probed once per process."""
+    try:
+        listing = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            capture_output=True,
+            text=True,
+            timeout=10,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return frozenset()
+    return frozenset(line.split()[1] for line in listing.splitlines() if len(line.split()) > 1)
@@ -40,10 +40,15 @@ import os
 import sys
 import json
 import argparse
+import contextlib
 import subprocess
-import time
 import tempfile
+import threading
+import time
 import hashlib
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 # Allow imports from repo root when called as: python3 tools/grok_agent.py ...
@@ -51,7 +56,16 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is the fallback
+    orjson = None
+
 from providers.router import generate_video
+from tools._video_prep import ffmpeg_encoders, probe_mp4
 
 # ─── Config ───────────────────────────────────────────────────────────
 GROK_API_KEY = os.environ.get("GROK_API_KEY", "")
@@ -61,6 +75,15 @@ VPS_HOST = os.environ.get("VPS_HOST", "50.28.86.153")
 VPS_PASS = os.environ.get("VPS_PASS", "")
 
 OWNER = "Scottcjn"
+REVIEW_WORKERS = 4     # PRs reviewed at once (bounds gh + Grok concurrency)
+GH_TIMEOUT = 120       # seconds per gh call
+# PR inputs (diff, author profile) keyed by repo#number@updatedAt, so PRs
+# untouched since the last scan are not fetched from GitHub again.
+GH_CACHE_PATH = Path(os.environ.get("GROK_AGENT_CACHE", Path.home() / ".cache" / "grok_agent.json"))
+# Grok verdicts keyed by a hash of the reviewed content; see _review_key().
+REVIEW_CACHE_PATH = Path(os.environ.get("GROK_AGENT_REVIEW_CACHE",
+                                        Path.home() / ".cache" / "grok_agent_reviews.json"))
+REVIEW_CACHE_TTL = 30 * 24 * 3600  # seconds
 REPOS = ["Rustchain", "bottube", "rustchain-bounties", "silicon-archaeology-skill", "beacon-skill"]
 
 # BoTTube agent API keys (agent_slug → api_key)
@@ -75,24 +98,96 @@ MAX_DURATION = 8       # seconds
 MAX_SIZE_MB = 2        # megabytes
 MAX_RESOLUTION = 720   # pixels
 
+# x264 CRF search: start here, never leave [MIN_CRF, MAX_CRF].
+START_CRF = 26
+MIN_CRF, MAX_CRF = 20, 40
+
+# Uploads are short and ephemeral, so the first two encodes trade a few
+# percent of size for speed; only a miss after that pays for -preset fast.
+X264_QUICK = ["-preset", "veryfast", "-x264-params", "scenecut=0:ref=1:bframes=0"]
+X264_THOROUGH = ["-preset", "fast"]
+
+# Hardware H.264 encoders in preference order, mapping a CRF-like quality to
+# encoder flags. VideoToolbox's -q:v runs 1-100 with higher meaning better.
+# Set GROK_AGENT_HWENC=0 to force libx264.
+HW_ENCODERS = {
+    "h264_nvenc": lambda q: ["-rc", "vbr", "-cq", str(q), "-preset", "p4"],
+    "h264_qsv": lambda q: ["-global_quality", str(q)],
+    "h264_videotoolbox": lambda q: ["-q:v", str(max(1, 100 - 2 * q))],
+}
+_HW_FAILED = set()  # encoders that are listed but failed at runtime (no device)
+
+# Fixed pieces of the ffmpeg command line, built once; prepare_video()
+# only fills in the input, the codec flags and the output path.
+FF_TRIM = ("-t", str(MAX_DURATION))
+FF_SCALE = ("-vf", f"scale={MAX_RESOLUTION}:{MAX_RESOLUTION}:force_original_aspect_ratio=decrease")
+FF_OUTPUT = ("-an", "-movflags", "+faststart")  # strip audio, moov atom up front
+
+# Concurrent batch pipelines overlap freely while generating and uploading
+# (network-bound) but queue for the encode stage: libx264 already uses every
+# core, so running several encodes at once only adds contention.
+ENCODE_SLOTS = threading.BoundedSemaphore(int(os.environ.get("GROK_AGENT_ENCODERS", "1")))
+
+_LOG_LOCK = threading.Lock()
+
+
+def log(*args):
+    """print() that keeps lines whole when batch pipelines run in threads."""
+    with _LOG_LOCK:
+        print(*args, flush=True)
+
+
 # ─── Grok API ─────────────────────────────────────────────────────────
 
-def grok_chat(messages, model=None, temperature=0.1):
-    """Call Grok chat API via curl (avoids urllib 403 issues)."""
-    payload = json.dumps({
+def _build_grok_session():
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=REVIEW_WORKERS))
+    # Plain urllib got 403s from api.x.ai; send an explicit user agent rather
+    # than a library default.
+    session.headers["User-Agent"] = "bottube-grok-agent/1.0"
+    return session
+
+
+# One keep-alive pool for every Grok call instead of a curl process and a
+# fresh TLS handshake per request.
+_GROK_SESSION = _build_grok_session()
+
+
+def _json_loads(data):
+    """Parse JSON text or bytes, via orjson when installed."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _json_bytes(obj):
+    """Compact UTF-8 JSON, via orjson when installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:  # e.g. lone surrogates; let stdlib handle it
+            pass
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def grok_chat(messages, model=None, temperature=0.1, json_mode=False):
+    """Call the Grok chat completions API.
+
+    json_mode asks for a single JSON object as the whole reply.
+    """
+    payload = {
         "messages": messages,
         "model": model or GROK_MODEL,
         "stream": False,
         "temperature": temperature
-    })
-    result = subprocess.run(
-        ["curl", "-s", "https://api.x.ai/v1/chat/completions",
-         "-H", "Content-Type: application/json",
-         "-H", f"Authorization: Bearer {GROK_API_KEY}",
-         "-d", payload],
-        capture_output=True, text=True, timeout=120
+    }
+    if json_mode:
+        payload["response_format"] = {"type": "json_object"}
+    resp = _GROK_SESSION.post(
+        "https://api.x.ai/v1/chat/completions",
+        data=_json_bytes(payload),
+        headers={"Authorization": f"Bearer {GROK_API_KEY}", "Content-Type": "application/json"},
+        timeout=120,
     )
-    data = json.loads(result.stdout)
+    data = _json_loads(resp.content)
     if "error" in data:
         raise Exception(data["error"].get("message", str(data["error"])))
     return data["choices"][0]["message"]["content"]
@@ -100,82 +195,256 @@ def grok_chat(messages, model=None, temperature=0.1):
 
 # ─── Video Pipeline ──────────────────────────────────────────────────
 
-def prepare_video(input_path, output_path):
-    """Compress and resize video for BoTTube constraints."""
-    # Check current specs
-    probe = subprocess.run(
-        ["ffprobe", "-v", "quiet", "-print_format", "json", "-show_streams", input_path],
-        capture_output=True, text=True
-    )
-    streams = json.loads(probe.stdout).get("streams", [{}])
-    video = next((s for s in streams if s.get("codec_type") == "video"), streams[0])
+def _next_crf(crf, size_mb):
+    """Predict the CRF that lands under MAX_SIZE_MB from one measured encode.
+
+    x264 roughly halves the bitrate every +6 CRF, so the step is
+    6 * log2(size / target), aiming 5% under the limit for headroom.
+    """
+    step = math.ceil(6 * math.log2(size_mb / (MAX_SIZE_MB * 0.95)))
+    return min(max(crf + max(step, 1), MIN_CRF), MAX_CRF)
+
+
+def _available_hw_encoders():
+    """Hardware encoders this ffmpeg build lists, in preference order."""
+    if os.environ.get("GROK_AGENT_HWENC", "1") == "0":
+        return ()
+    listed = ffmpeg_encoders()
+    return tuple(name for name in HW_ENCODERS if name in listed)
+
+
+def _video_encoder_args(crf, attempt):
+    """Codec flags for one encode: the first working hardware encoder, else libx264."""
+    for name in _available_hw_encoders():
+        if name not in _HW_FAILED:
+            return ["-c:v", name, *HW_ENCODERS[name](crf)]
+    return ["-c:v", "libx264", "-crf", str(crf),
+            *(X264_QUICK if attempt <= 2 else X264_THOROUGH)]
+
+
+PROBE_FIELDS = ("codec_name", "width", "height", "duration")
+
+
+def probe_video(input_path, known=None):
+    """Probe a clip once; returns (video stream, needs_resize, needs_trim).
+
+    known is metadata already reported for the clip (e.g. by the provider);
+    if it has every PROBE_FIELDS entry, nothing is read at all. Otherwise
+    the MP4 headers are parsed in-process, with ffprobe as the fallback.
+    """
+    known = known or {}
+    if all(known.get(field) is not None for field in PROBE_FIELDS):
+        video = {field: known[field] for field in PROBE_FIELDS}
+    else:
+        try:
+            video = {field: value for field, value in probe_mp4(input_path).items() if field in PROBE_FIELDS}
+        except (OSError, ValueError):
+            video = None
+    if video is None:
+        # Only the first video stream's four fields, as key=value lines,
+        # rather than every stream as JSON.
+        probe = subprocess.run(
+            ["ffprobe", "-v", "quiet", "-select_streams", "v:0",
+             "-show_entries", "stream=" + ",".join(PROBE_FIELDS),
+             "-of", "default=noprint_wrappers=1", input_path],
+            capture_output=True, text=True
+        )
+        video = {}
+        for line in probe.stdout.splitlines():
+            key, _, value = line.partition("=")
+            if value and value != "N/A":
+                video[key] = value
     w = int(video.get("width", 720))
     h = int(video.get("height", 720))
     dur = float(video.get("duration", 5))
+    return video, w > MAX_RESOLUTION or h > MAX_RESOLUTION, dur > MAX_DURATION
+
+
+def _remuxable(input_path, probe, limit_mb=MAX_SIZE_MB):
+    """True if the source can be stream-copied as is: H.264, in bounds, small enough."""
+    video, needs_resize, needs_trim = probe
+    src_mb = os.path.getsize(input_path) / (1024 * 1024)
+    return (not needs_resize and not needs_trim and src_mb <= limit_mb
+            and video.get("codec_name") == "h264")
+
+
+def remux_stream(input_path, probe=None):
+    """Start ffmpeg remuxing input to fragmented MP4 on stdout, or None.
+
+    Only for sources that already fit, with 5% headroom for the fragment
+    boxes, since a streamed upload cannot be measured before it is sent.
+    The caller must wait() on the returned process and check its exit code.
+    """
+    if not _remuxable(input_path, probe or probe_video(input_path), MAX_SIZE_MB * 0.95):
+        return None
+    return subprocess.Popen(
+        ["ffmpeg", "-v", "error", "-i", input_path, "-c:v", "copy", "-an",
+         "-movflags", "frag_keyframe+empty_moov", "-f", "mp4", "pipe:1"],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+
 
-    needs_resize = w > MAX_RESOLUTION or h > MAX_RESOLUTION
-    needs_trim = dur > MAX_DURATION
-
-    # Start with moderate CRF, increase if needed
-    for crf in [26, 28, 30, 33]:
-        cmd = ["ffmpeg", "-y", "-i", input_path]
-        if needs_trim:
-            cmd += ["-t", str(MAX_DURATION)]
-        if needs_resize:
-            cmd += ["-vf", f"scale={MAX_RESOLUTION}:{MAX_RESOLUTION}:force_original_aspect_ratio=decrease"]
-        cmd += [
-            "-c:v", "libx264", "-crf", str(crf), "-preset", "fast",
-            "-an",  # strip audio
-            "-movflags", "+faststart",
-            output_path
-        ]
-        subprocess.run(cmd, capture_output=True, timeout=60)
+def prepare_video(input_path, output_path, probe=None):
+    """Compress and resize video for BoTTube constraints."""
+    probe = probe or probe_video(input_path)
+    video, needs_resize, needs_trim = probe
+
+    # Already within limits: remux instead of re-encoding (drop audio, move
+    # the moov atom up front). Fall through to the encode if the copy fails.
+    if _remuxable(input_path, probe):
+        copy = subprocess.run(
+            ["ffmpeg", "-y", "-i", input_path, "-c:v", "copy", *FF_OUTPUT, output_path],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=60
+        )
+        if copy.returncode == 0:
+            return os.path.getsize(output_path) / (1024 * 1024)
+
+    # Encode at START_CRF, then jump straight to the CRF predicted from the
+    # measured size instead of stepping through a fixed ladder.
+    head = ["ffmpeg", "-y", "-i", input_path,
+            *(FF_TRIM if needs_trim else ()), *(FF_SCALE if needs_resize else ())]
+    crf, tried = START_CRF, set()
+    while crf not in tried:
+        tried.add(crf)
+        codec = _video_encoder_args(crf, len(tried))
+        run = subprocess.run([*head, *codec, *FF_OUTPUT, output_path],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=60)
+        if run.returncode != 0 and codec[1] in HW_ENCODERS:
+            # Listed but unusable (no GPU/driver): retry this CRF in software.
+            _HW_FAILED.add(codec[1])
+            tried.discard(crf)
+            continue
 
         size_mb = os.path.getsize(output_path) / (1024 * 1024)
         if size_mb <= MAX_SIZE_MB:
             return size_mb
+        crf = _next_crf(crf, size_mb)
 
     raise Exception(f"Could not compress below {MAX_SIZE_MB}MB (got {size_mb:.1f}MB)")
 
 
-def upload_to_bottube(video_path, agent_slug, title, description=""):
-    """SCP video to VPS and upload via local curl."""
+# scp/ssh calls to the VPS share one multiplexed connection (OpenSSH
+# ControlMaster) instead of each doing its own TCP + SSH handshake.
+SSH_CONTROL_PATH = os.path.join(tempfile.gettempdir(), "grok-ssh-%r@%h:%p")
+_ssh_master_lock = threading.Lock()
+_ssh_master_started = False
+_transfers_in_flight = 0
+
+
+def _ssh_opts(shared=True):
+    control = SSH_CONTROL_PATH if shared else "none"
+    # Compression is per connection, and almost every byte sent is already
+    # H.264, so zlib would only burn CPU; pin it off even if ~/.ssh/config
+    # turns it on. (It only applies to connections these options open.)
+    return ["-o", "StrictHostKeyChecking=no", "-o", f"ControlPath={control}",
+            "-o", "Compression=no"]
+
+
+@contextlib.contextmanager
+def _transfer_opts():
+    """ssh options for moving a video to the VPS.
+
+    A lone transfer rides the shared connection. When batch pipelines upload
+    at the same time, the extra transfers open their own connections so each
+    gets its own TCP window instead of queueing on one.
+    """
+    global _transfers_in_flight
+    with _ssh_master_lock:
+        shared = _transfers_in_flight == 0
+        _transfers_in_flight += 1
+    try:
+        yield _ssh_opts(shared)
+    finally:
+        with _ssh_master_lock:
+            _transfers_in_flight -= 1
+
+
+def _ensure_ssh_master():
+    """Open the shared VPS connection once; it lingers 10 minutes after last use.
+
+    If it cannot be opened, later calls find no control socket and simply
+    connect directly, as before.
+    """
+    global _ssh_master_started
+    with _ssh_master_lock:
+        if _ssh_master_started:
+            return
+        _ssh_master_started = True
+        try:
+            # -f backgrounds the master after auth; its stdio goes to
+            # /dev/null so nothing waits on a pipe it keeps open.
+            subprocess.run(
+                ["sshpass", "-p", VPS_PASS, "ssh", *_ssh_opts(),
+                 "-o", "ControlMaster=auto", "-o", "ControlPersist=600",
+                 "-N", "-f", f"root@{VPS_HOST}"],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL, timeout=30
+            )
+        except (OSError, subprocess.SubprocessError):
+            pass
+
+
+def _agent_key(agent_slug):
+    """BoTTube API key for agent_slug; raises for unknown or unconfigured agents."""
     api_key = BOTTUBE_AGENTS.get(agent_slug)
     if not api_key:
         raise Exception(f"Unknown agent '{agent_slug}'. Known: {list(BOTTUBE_AGENTS.keys())}")
+    return api_key
 
-    remote_path = f"/tmp/grok_upload_{hashlib.md5(title.encode()).hexdigest()[:8]}.mp4"
 
-    # SCP to VPS
-    print(f"    SCP → {VPS_HOST}:{remote_path}")
-    subprocess.run(
-        ["sshpass", "-p", VPS_PASS, "scp", "-o", "StrictHostKeyChecking=no",
-         video_path, f"root@{VPS_HOST}:{remote_path}"],
-        capture_output=True, timeout=60
-    )
+def upload_to_bottube(video_path, agent_slug, title, description=""):
+    """SCP video to VPS and upload via local curl.
+
+    video_path may also be a remux_stream() process; its stdout is piped
+    straight to the VPS without touching the local disk.
+    """
+    api_key = _agent_key(agent_slug)
 
-    # Upload via local curl on VPS
-    print(f"    Uploading as {agent_slug}...")
+    # Random rather than derived from the title, so concurrent batch uploads
+    # that share a title cannot overwrite each other's file on the VPS.
+    remote_path = f"/tmp/grok_upload_{os.urandom(4).hex()}.mp4"
+    _ensure_ssh_master()
+
+    if isinstance(video_path, subprocess.Popen):
+        log(f"    Streaming → {VPS_HOST}:{remote_path}")
+        try:
+            with _transfer_opts() as opts:
+                subprocess.run(
+                    ["sshpass", "-p", VPS_PASS, "ssh", *opts,
+                     f"root@{VPS_HOST}", f"cat > {remote_path}"],
+                    stdin=video_path.stdout, stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL, timeout=60
+                )
+        finally:
+            video_path.stdout.close()  # a stalled ffmpeg gets SIGPIPE instead of hanging
+        if video_path.wait(timeout=60) != 0:
+            raise Exception(f"ffmpeg remux failed (exit {video_path.returncode})")
+    else:
+        # SCP to VPS
+        log(f"    SCP → {VPS_HOST}:{remote_path}")
+        with _transfer_opts() as opts:
+            subprocess.run(
+                ["sshpass", "-p", VPS_PASS, "scp", *opts,
+                 video_path, f"root@{VPS_HOST}:{remote_path}"],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=60
+            )
+
+    # Upload via local curl on VPS, removing the remote file in the same session
+    log(f"    Uploading as {agent_slug}...")
     result = subprocess.run(
-        ["sshpass", "-p", VPS_PASS, "ssh", "-o", "StrictHostKeyChecking=no",
+        ["sshpass", "-p", VPS_PASS, "ssh", *_ssh_opts(),
          f"root@{VPS_HOST}",
          f'curl -s -X POST http://localhost:8097/api/upload '
          f'-H "X-API-Key: {api_key}" '
          f'-F "video=@{remote_path}" '
          f'-F "title={title}" '
-         f'-F "description={description}"'],
+         f'-F "description={description}"; '
+         f'rm -f {remote_path}'],
         capture_output=True, text=True, timeout=60
     )
 
-    # Clean up remote file
-    subprocess.run(
-        ["sshpass", "-p", VPS_PASS, "ssh", "-o", "StrictHostKeyChecking=no",
-         f"root@{VPS_HOST}", f"rm -f {remote_path}"],
-        capture_output=True, timeout=10
-    )
-
     try:
-        resp = json.loads(result.stdout)
+        resp = _json_loads(result.stdout)
         if resp.get("ok"):
             return resp
         raise Exception(f"Upload failed: {resp}")
@@ -201,21 +470,25 @@ def video_pipeline(
     dry_run=False,
 ):
     """Full pipeline: generate via router -> compress -> upload."""
-    print(f"\n  VIDEO PIPELINE: {agent_slug}")
-    print(f"  Title: {title}")
-    print(f"  Prompt: {prompt[:80]}...")
-    print(f"  Provider: {provider} (fallback={'off' if no_fallback else 'on'})")
+    log(f"\n  VIDEO PIPELINE: {agent_slug}")
+    log(f"  Title: {title}")
+    log(f"  Prompt: {prompt[:80]}...")
+    log(f"  Provider: {provider} (fallback={'off' if no_fallback else 'on'})")
 
     if dry_run:
-        print("  [DRY RUN] Would generate and upload")
+        log("  [DRY RUN] Would generate and upload")
         return {"dry_run": True}
 
+    # Fail before paying for a generation (or spawning a remux) that could
+    # never be uploaded.
+    _agent_key(agent_slug)
+
     with tempfile.TemporaryDirectory() as tmpdir:
         raw_path = os.path.join(tmpdir, "raw.mp4")
         ready_path = os.path.join(tmpdir, "ready.mp4")
 
         # Step 1: Generate via provider router
-        print("  [1/4] Generating video via provider router...")
+        log("  [1/4] Generating video via provider router...")
         generation = generate_video(
             prompt=prompt,
             prefer=provider,
@@ -230,26 +503,42 @@ def video_pipeline(
             audio=runway_audio,
             prompt_image=runway_image,
         )
-        print(f"    Provider used: {generation.provider}")
+        log(f"    Provider used: {generation.provider}")
 
         source_id = generation.metadata.get("request_id") or generation.metadata.get("task_id")
         if source_id:
-            print(f"    Job ID: {source_id}")
+            log(f"    Job ID: {source_id}")
 
         # Step 2: Compress
-        print("  [2/4] Compressing video...")
+        log("  [2/4] Compressing video...")
         raw_mb = os.path.getsize(raw_path) / (1024 * 1024)
-        print(f"    Raw: {raw_mb:.1f}MB")
+        log(f"    Raw: {raw_mb:.1f}MB")
 
-        size_mb = prepare_video(raw_path, ready_path)
-        print(f"    Compressed: {size_mb:.1f}MB")
+        probe = probe_video(raw_path, generation.metadata)
+        upload_source = remux_stream(raw_path, probe)
+        if upload_source is not None:
+            log("    Already within limits; remuxing straight into the upload")
+        else:
+            with ENCODE_SLOTS:
+                size_mb = prepare_video(raw_path, ready_path, probe)
+            log(f"    Compressed: {size_mb:.1f}MB")
+            upload_source = ready_path
 
         # Step 3: Upload
-        print("  [3/4] Uploading to BoTTube...")
-        result = upload_to_bottube(ready_path, agent_slug, title, description)
+        log("  [3/4] Uploading to BoTTube...")
+        try:
+            result = upload_to_bottube(upload_source, agent_slug, title, description)
+        finally:
+            # A remux the upload never drained (error before or mid-stream)
+            # would otherwise outlive the pipeline with its pipe open.
+            if isinstance(upload_source, subprocess.Popen):
+                if upload_source.poll() is None:
+                    upload_source.kill()
+                    upload_source.wait()
+                upload_source.stdout.close()
         video_id = result.get("video_id", "?")
-        print(f"    Uploaded! ID: {video_id}")
-        print(f"    Watch: https://bottube.ai/watch/{video_id}")
+        log(f"    Uploaded! ID: {video_id}")
+        log(f"    Watch: https://bottube.ai/watch/{video_id}")
         result["provider"] = generation.provider
 
     return result
@@ -286,43 +575,278 @@ Be concise. Output a JSON object with:
 }"""
 
 
-def gh(args):
-    """Run gh CLI command."""
+def gh(args, capture=True):
+    """Run gh CLI command; its stdout, or "" if capture is False."""
     env = os.environ.copy()
     env["GITHUB_TOKEN"] = GITHUB_TOKEN
-    result = subprocess.run(["gh"] + args, capture_output=True, text=True, env=env)
-    return result.stdout.strip()
+    if capture:
+        streams = {"capture_output": True, "text": True}
+    else:
+        streams = {"stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+    try:
+        result = subprocess.run(["gh"] + args, env=env, timeout=GH_TIMEOUT, **streams)
+    except subprocess.TimeoutExpired:
+        log(f"    gh {' '.join(args[:2])} timed out after {GH_TIMEOUT}s")
+        return ""
+    return result.stdout.strip() if capture else ""
 
 
 def get_open_prs(repo):
     raw = gh(["pr", "list", "--repo", f"{OWNER}/{repo}", "--json",
-              "number,title,author,additions,deletions,files,createdAt", "--limit", "20"])
-    return json.loads(raw) if raw else []
+              "number,title,author,additions,deletions,files,createdAt,updatedAt", "--limit", "20"])
+    return _json_loads(raw) if raw else []
+
+
+class _JsonCache:
+    """A dict persisted as one JSON file, loaded on first use; thread-safe."""
+
+    def __init__(self, path):
+        self.path = path
+        self._data = None
+        self._lock = threading.Lock()
+
+    def _loaded(self):
+        if self._data is None:
+            try:
+                self._data = _json_loads(self.path.read_bytes())
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
+
+    def get(self, key):
+        with self._lock:
+            return self._loaded().get(key)
+
+    def put(self, key, value):
+        with self._lock:
+            self._loaded()[key] = value
+
+    def save(self, keep=lambda key, value: True):
+        """Drop entries keep() rejects, then write the file (if ever loaded)."""
+        with self._lock:
+            if self._data is None:
+                return
+            for key in [k for k, v in self._data.items() if not keep(k, v)]:
+                del self._data[key]
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self.path.write_bytes(_json_bytes(self._data))
+            except OSError as e:
+                log(f"  Could not write {self.path}: {e}")
+
+
+_gh_cache = _JsonCache(GH_CACHE_PATH)
+_review_cache = _JsonCache(REVIEW_CACHE_PATH)
+
+
+def _pr_cache_key(repo, pr):
+    return f"{repo}#{pr['number']}@{pr.get('updatedAt', '')}"
+
+
+def _cached_pr_inputs(repo, pr):
+    """Cached {"diff", "profile"} for this PR revision, or None."""
+    return _gh_cache.get(_pr_cache_key(repo, pr)) if pr.get("updatedAt") else None
+
+
+def _store_pr_inputs(repo, pr, inputs):
+    if pr.get("updatedAt"):
+        _gh_cache.put(_pr_cache_key(repo, pr), inputs)
+
+
+def save_gh_cache(repos=(), keep=()):
+    """Write the PR input and review caches. Input entries for the given fully
+    scanned repos that are not in keep (closed PRs, old revisions) are
+    dropped first, as are reviews older than REVIEW_CACHE_TTL."""
+    repos, keep = set(repos), set(keep)
+    _gh_cache.save(lambda key, _: key.split("#", 1)[0] not in repos or key in keep)
+    cutoff = time.time() - REVIEW_CACHE_TTL
+    _review_cache.save(lambda _, entry: entry.get("at", 0) >= cutoff)
+
+
+def _review_key(diff, files, author):
+    """Content hash of everything Grok sees, plus the model and prompt that judge it.
+
+    Unlike updatedAt, this survives comments and label changes (including
+    our own review comment) that do not touch the code.
+    """
+    material = json.dumps([GROK_MODEL, PR_SYSTEM_PROMPT, author, files, diff])
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+# Grok's latency grows with prompt size, so diffs are cut to roughly this
+# many tokens (estimated at 4 chars each), at hunk boundaries.
+DIFF_TOKEN_BUDGET = 1500
+_DIFF_FILE_RE = re.compile(r"^(?=diff --git )", re.M)
+_DIFF_HUNK_RE = re.compile(r"^(?=@@)", re.M)
+_DIFF_PATH_RE = re.compile(r"diff --git a/.* b/(.*)")
+# Generated or binary files: their hunks say nothing about the change.
+_GENERATED_PATH_RE = re.compile(
+    r"(^|/)(package-lock\.json|yarn\.lock|pnpm-lock\.yaml|poetry\.lock|Pipfile\.lock"
+    r"|Cargo\.lock|go\.sum)$|\.(png|jpe?g|gif|ico|webp|mp4|webm|pdf|zip|gz|min\.js)$")
+
+
+def _truncate_diff(diff, budget_tokens=DIFF_TOKEN_BUDGET):
+    """Keep whole hunks, in order, until the token budget runs out.
+
+    Lockfile and binary sections are dropped up front; notes at the end
+    say what was left out.
+    """
+    pieces, skipped = [], []
+    for section in _DIFF_FILE_RE.split(diff):
+        if not section:
+            continue
+        header, *hunks = _DIFF_HUNK_RE.split(section)
+        match = _DIFF_PATH_RE.match(header)
+        path = match.group(1) if match else ""
+        if _GENERATED_PATH_RE.search(path) or "\nBinary files " in header:
+            skipped.append(path)
+            continue
+        pieces.append((header, False))
+        pieces.extend((hunk, True) for hunk in hunks)
+
+    budget = budget_tokens * 4
+    kept, used = [], 0
+    for piece, _ in pieces:
+        if used + len(piece) > budget:
+            if not kept:  # one huge hunk: better a cut-off hunk than nothing
+                kept.append(piece[:budget])
+            break
+        kept.append(piece)
+        used += len(piece)
+
+    notes = []
+    omitted = sum(is_hunk for _, is_hunk in pieces[len(kept):])
+    if omitted:
+        notes.append(f"... [TRUNCATED — {omitted} hunks omitted; full diff is {len(diff)} chars]")
+    if skipped:
+        notes.append(f"... [generated/binary files omitted: {', '.join(skipped)}]")
+    if not notes:
+        return diff
+    return "".join(kept).rstrip("\n") + "\n\n" + "\n".join(notes)
 
 
 def get_pr_diff(repo, number):
     diff = gh(["pr", "diff", str(number), "--repo", f"{OWNER}/{repo}"])
-    if len(diff) > 8000:
-        diff = diff[:8000] + f"\n\n... [TRUNCATED — full diff is {len(diff)} chars]"
-    return diff
+    return _truncate_diff(diff) if diff else diff
+
+
+def _readme_only(files):
+    return bool(files) and all(Path(f).name.lower().startswith("readme") for f in files)
+
+
+# PRs that get a fixed verdict without asking Grok: (test(files, pr),
+# bounty_farming_score, summary). Checked in order; no comment is posted.
+REVIEW_RULES = (
+    (lambda files, pr: _readme_only(files) and pr["additions"] < 10, 8,
+     "Tiny README-only change; a common bounty-farming pattern"),
+    (lambda files, pr: pr["additions"] + pr["deletions"] > 5000, 0,
+     "Diff too large for auto-review"),
+)
+
 
+def _rule_verdict(files, pr):
+    """A needs_maintainer verdict from the first matching REVIEW_RULES entry, or None."""
+    for test, farming, summary in REVIEW_RULES:
+        if test(files, pr):
+            return {"verdict": "needs_maintainer", "confidence": 1.0, "summary": summary,
+                    "issues": [], "bounty_farming_score": farming,
+                    "security_concerns": [], "suggested_comment": ""}
+    return None
 
-def review_pr(repo, pr, dry_run=False):
-    """Review a single PR using Grok."""
+
+def review_pr(repo, pr, dry_run=False, use_cache=True):
+    """Review a single PR using Grok, reusing the verdict for unchanged code."""
     number = pr["number"]
     title = pr["title"]
     author = pr["author"]["login"]
 
-    print(f"\n  PR #{number}: {title}")
-    print(f"  Author: {author} | +{pr['additions']}/-{pr['deletions']}")
+    log(f"\n  PR #{number}: {title}")
+    log(f"  Author: {author} | +{pr['additions']}/-{pr['deletions']}")
+
+    if "files" in pr:  # `pr list` already returned the file list
+        files = [f["path"] for f in pr["files"] or []]
+    else:
+        files_raw = gh(["pr", "view", str(number), "--repo", f"{OWNER}/{repo}",
+                        "--json", "files", "--jq", ".files[].path"])
+        files = files_raw.split("\n") if files_raw else []
+
+    preset = _rule_verdict(files, pr)
+    if preset is not None:
+        log(f"    VERDICT: {preset['verdict']} | FARMING: {preset['bounty_farming_score']}/10 (rule; Grok not asked)")
+        log(f"    {preset['summary']}")
+        return preset
+
+    cached = _cached_pr_inputs(repo, pr) if use_cache else None
+    if cached:
+        diff, profile = cached["diff"], cached["profile"]
+        log("    Unchanged since last scan; using cached diff")
+    else:
+        diff = get_pr_diff(repo, number)
+        profile = gh(["api", f"users/{author}", "--jq",
+                      r'"\(.login) | created: \(.created_at) | repos: \(.public_repos) | followers: \(.followers)"'])
+        if diff:  # empty means gh failed or timed out; don't pin that
+            _store_pr_inputs(repo, pr, {"diff": diff, "profile": profile})
+
+    review_key = _review_key(diff, files, author)
+    entry = _review_cache.get(review_key) if use_cache and diff else None
+    if entry:
+        review = entry["review"]
+        log("    Code unchanged since last review; reusing verdict")
+    else:
+        review = _ask_grok(repo, number, title, author, profile, files, diff, pr)
+        if review is None:
+            return None
+        entry = {"review": review, "at": time.time(), "commented": False}
+        if diff and not review.get("raw"):  # don't pin failed fetches or parses
+            _review_cache.put(review_key, entry)
+
+    verdict = review.get("verdict", "?")
+    farming = review.get("bounty_farming_score", "?")
+    summary = review.get("summary", "")
+    log(f"    VERDICT: {verdict} | FARMING: {farming}/10")
+    log(f"    {summary}")
+
+    # Post comment for rejections/farming (once per reviewed revision)
+    comment = review.get("suggested_comment", "")
+    if comment and not dry_run and not entry.get("commented"):
+        farming_int = int(str(farming).replace("?", "0"))
+        if (verdict in ("reject", "request_changes") or farming_int >= 7) and review.get("confidence", 0) >= 0.6:
+            gh(["pr", "comment", str(number), "--repo", f"{OWNER}/{repo}",
+                "--body", f"**Grok Automated Review** (model: {GROK_MODEL})\n\n{comment}\n\n---\n*Automated review — maintainer will make final decision.*"],
+               capture=False)
+            entry["commented"] = True
+            log(f"    Posted review comment")
+
+    return review
+
+
+_JSON_FENCE_RE = re.compile(r"```json\s*(.*?)```", re.S)
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.S)
 
-    diff = get_pr_diff(repo, number)
-    files_raw = gh(["pr", "view", str(number), "--repo", f"{OWNER}/{repo}",
-                    "--json", "files", "--jq", ".files[].path"])
-    files = files_raw.split("\n") if files_raw else []
-    profile = gh(["api", f"users/{author}", "--jq",
-                  r'"\(.login) | created: \(.created_at) | repos: \(.public_repos) | followers: \(.followers)"'])
 
+def _parse_review(response):
+    """The verdict object from a Grok reply; raises ValueError if there is none.
+
+    Replies are normally bare JSON (json_mode); the fenced-block and
+    outermost-braces fallbacks cover a model that wraps it in prose anyway.
+    """
+    try:
+        review = _json_loads(response)
+        if isinstance(review, dict):
+            return review
+    except ValueError:
+        pass
+    match = _JSON_FENCE_RE.search(response) or _JSON_OBJECT_RE.search(response)
+    if match is None:
+        raise ValueError("no JSON object in response")
+    review = _json_loads(match.group(1) if match.re is _JSON_FENCE_RE else match.group(0))
+    if not isinstance(review, dict):
+        raise ValueError("response JSON is not an object")
+    return review
+
+
+def _ask_grok(repo, number, title, author, profile, files, diff, pr):
+    """Send one PR to Grok; the parsed verdict dict, or None if the call failed."""
     user_msg = f"""Review this PR for {OWNER}/{repo}:
 
 **PR #{number}**: {title}
@@ -338,65 +862,55 @@ def review_pr(repo, pr, dry_run=False):
 
 Analyze and return JSON verdict."""
 
-    print("    Asking Grok...")
+    log("    Asking Grok...")
     try:
         response = grok_chat([
             {"role": "system", "content": PR_SYSTEM_PROMPT},
             {"role": "user", "content": user_msg}
-        ])
+        ], json_mode=True)
     except Exception as e:
-        print(f"    ERROR: {e}")
+        log(f"    ERROR: {e}")
         return None
 
-    # Parse JSON from response
     try:
-        if "```json" in response:
-            json_str = response.split("```json")[1].split("```")[0]
-        elif "{" in response:
-            json_str = response[response.index("{"):response.rindex("}") + 1]
-        else:
-            json_str = response
-        review = json.loads(json_str)
-    except (json.JSONDecodeError, ValueError):
+        review = _parse_review(response)
+    except ValueError:
         review = {"verdict": "needs_maintainer", "confidence": 0.0,
                   "summary": "Could not parse Grok response", "raw": response[:300]}
-
-    verdict = review.get("verdict", "?")
-    farming = review.get("bounty_farming_score", "?")
-    summary = review.get("summary", "")
-    print(f"    VERDICT: {verdict} | FARMING: {farming}/10")
-    print(f"    {summary}")
-
-    # Post comment for rejections/farming
-    comment = review.get("suggested_comment", "")
-    if comment and not dry_run:
-        farming_int = int(str(farming).replace("?", "0"))
-        if (verdict in ("reject", "request_changes") or farming_int >= 7) and review.get("confidence", 0) >= 0.6:
-            gh(["pr", "comment", str(number), "--repo", f"{OWNER}/{repo}",
-                "--body", f"**Grok Automated Review** (model: {GROK_MODEL})\n\n{comment}\n\n---\n*Automated review — maintainer will make final decision.*"])
-            print(f"    Posted review comment")
-
     return review
 
 
-def scan_prs(repos=None, dry_run=False):
-    """Scan all open PRs across repos."""
+def scan_prs(repos=None, dry_run=False, use_cache=True):
+    """Scan all open PRs across repos.
+
+    Reviews are IO-bound (gh + Grok), so they run REVIEW_WORKERS at a time;
+    the pool size is also what rate-limits the Grok API.
+    """
     repos = repos or REPOS
-    results = {}
-    for repo in repos:
-        print(f"\n{'='*50}")
-        print(f"  {OWNER}/{repo}")
-        print(f"{'='*50}")
-        prs = get_open_prs(repo)
-        if not prs:
-            print("  No open PRs")
-            continue
-        print(f"  {len(prs)} open PR(s)")
-        for pr in prs:
-            review = review_pr(repo, pr, dry_run=dry_run)
+    with ThreadPoolExecutor(max_workers=REVIEW_WORKERS) as pool:
+        listings = list(pool.map(get_open_prs, repos))
+        jobs = []
+        for repo, prs in zip(repos, listings):
+            print(f"\n{'='*50}")
+            print(f"  {OWNER}/{repo}")
+            print(f"{'='*50}")
+            if not prs:
+                print("  No open PRs")
+                continue
+            print(f"  {len(prs)} open PR(s)")
+            jobs += [(repo, pr) for pr in prs]
+
+        futures = [pool.submit(review_pr, repo, pr, dry_run, use_cache) for repo, pr in jobs]
+        results = {}
+        for (repo, pr), future in zip(jobs, futures):
+            try:
+                review = future.result()
+            except Exception as e:
+                log(f"  ERROR reviewing {repo}#{pr['number']}: {e}")
+                continue
             if review:
                 results[f"{repo}#{pr['number']}"] = review
-            time.sleep(1)
+    save_gh_cache(repos, keep=[_pr_cache_key(repo, pr) for repo, pr in jobs])
 
     print(f"\n{'='*50}")
     print("SUMMARY")
@@ -420,6 +934,7 @@ def main():
     rev.add_argument("--repo", help="Specific repo")
     rev.add_argument("--pr", type=int, help="Specific PR number")
     rev.add_argument("--dry-run", action="store_true")
+    rev.add_argument("--no-cache", action="store_true", help="Re-fetch and re-review every PR")
 
     # video subcommand
     vid = sub.add_parser("video", help="Generate and upload a video")
@@ -452,11 +967,13 @@ def main():
     batch.add_argument("--runway-ratio", default=os.environ.get("RUNWAY_RATIO", "1280:720"))
     batch.add_argument("--runway-audio", action="store_true")
     batch.add_argument("--runway-image", help="Image path/URL for Runway image-to-video modes")
+    batch.add_argument("--workers", type=int, default=4, help="Pipelines to run at once")
     batch.add_argument("--dry-run", action="store_true")
 
     # all subcommand
     allcmd = sub.add_parser("all", help="Review PRs + generate videos")
     allcmd.add_argument("--dry-run", action="store_true")
+    allcmd.add_argument("--no-cache", action="store_true", help="Re-fetch and re-review every PR")
 
     # prompt subcommand — ask Grok to generate prompts for agents
     prompt_cmd = sub.add_parser("prompt", help="Ask Grok to write video prompts for an agent")
@@ -489,13 +1006,14 @@ def main():
             prs = get_open_prs(args.repo)
             pr = next((p for p in prs if p["number"] == args.pr), None)
             if pr:
-                review_pr(args.repo, pr, dry_run=args.dry_run)
+                review_pr(args.repo, pr, dry_run=args.dry_run, use_cache=not args.no_cache)
+                save_gh_cache()
             else:
                 print(f"PR #{args.pr} not found")
         elif args.repo:
-            scan_prs(repos=[args.repo], dry_run=args.dry_run)
+            scan_prs(repos=[args.repo], dry_run=args.dry_run, use_cache=not args.no_cache)
         else:
-            scan_prs(dry_run=args.dry_run)
+            scan_prs(dry_run=args.dry_run, use_cache=not args.no_cache)
 
     elif args.command == "video":
         video_pipeline(
@@ -518,16 +1036,23 @@ def main():
 
     elif args.command == "batch-video":
         # Parse "agent:prompt" pairs
+        jobs = []
         for spec in args.specs:
             if ":" not in spec:
                 print(f"  ERROR: Expected 'agent:prompt', got: {spec}")
                 continue
             agent, prompt = spec.split(":", 1)
-            title = prompt[:50].strip()
-            video_pipeline(
+            jobs.append((agent.strip(), prompt))
+
+        # Generation and upload are mostly waiting on the network, so the
+        # pipelines overlap well in threads. One agent failing no longer
+        # stops the rest of the batch.
+        def run_job(job):
+            agent, prompt = job
+            return video_pipeline(
                 prompt,
-                agent.strip(),
-                title,
+                agent,
+                prompt[:50].strip(),
                 duration=args.duration,
                 provider=args.provider,
                 no_fallback=args.no_fallback,
@@ -541,6 +1066,14 @@ def main():
                 dry_run=args.dry_run,
             )
 
+        with ThreadPoolExecutor(max_workers=max(1, min(args.workers, len(jobs)))) as pool:
+            futures = {pool.submit(run_job, job): job for job in jobs}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    log(f"  ERROR [{futures[future][0]}]: {e}")
+
     elif args.command == "prompt":
         # Ask Grok to generate creative video prompts for an agent
         agent_themes = {
@@ -561,7 +1094,7 @@ def main():
 
         try:
             if "[" in response:
-                prompts = json.loads(response[response.index("["):response.rindex("]") + 1])
+                prompts = _json_loads(response[response.index("["):response.rindex("]") + 1])
             else:
                 prompts = [response]
         except json.JSONDecodeError:
@@ -574,7 +1107,7 @@ def main():
 
     elif args.command == "all":
         print("=== Phase 1: PR Review ===")
-        scan_prs(dry_run=args.dry_run)
+        scan_prs(dry_run=args.dry_run, use_cache=not args.no_cache)
         print("\n=== Phase 2: Video Generation ===")
         print("Use 'grok_agent.py prompt --agent <name>' to generate prompts")
         print("Then 'grok_agent.py video \"<prompt>\" --agent <name> --title \"<title>\"'")
@@ -14,23 +14,47 @@ Usage:
 
     # Generate and upload to BoTTube
     python3 tools/grok_video.py "Retro computing" --upload --agent sophia-elya --title "Mining Day"
+
+    # Many prompts (one per line) in one process, sharing connections
+    python3 tools/grok_video.py --batch prompts.txt --upload --title "Mining Day" --results runs.jsonl
 """
 
 from __future__ import annotations
 
 import argparse
+import contextlib
+import functools
+import io
 import json
 import os
+import shutil
+import signal
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import requests
+from requests.adapters import HTTPAdapter
+
 # Allow imports from repo root when called as: python3 tools/grok_video.py ...
 REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
-from providers.router import generate_video
+from tools._video_prep import ffmpeg_encoders, probe_mp4  # noqa: E402
+
+
+def generate_video(**kwargs):
+    """providers.router.generate_video, imported on first use.
+
+    The router pulls in every provider module; --help, argument errors and
+    the key checks in main() do not need any of them.
+    """
+    from providers.router import generate_video as route
+
+    return route(**kwargs)
+
 
 GROK_API_KEY = os.environ.get("GROK_API_KEY", "")
 RUNWAY_API_KEY = os.environ.get("RUNWAYML_API_SECRET", "")
@@ -38,8 +62,39 @@ BOTTUBE_API_KEY = os.environ.get("BOTTUBE_API_KEY", "")
 BOTTUBE_URL = os.environ.get("BOTTUBE_URL", "https://bottube.ai")
 
 
-def prepare_for_bottube(video_path: str) -> str:
-    """Ensure video meets BoTTube constraints (720x720, <2MB, <=8s, H.264)."""
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Uploads reuse one keep-alive connection to BoTTube instead of a curl process
+# and a fresh TLS handshake each.
+SESSION = _build_session()
+
+MAX_UPLOAD_BYTES = 2 * 1024 * 1024
+# veryfast encodes about twice as fast as fast; at this size and length the
+# quality difference is not visible. If a busy clip comes out over the cap,
+# it is encoded once more at a higher CRF.
+PREP_CRFS = (28, 32)
+# CRF capped by a VBV rate: 8s at 1800k is ~1.8MB, so one pass usually lands
+# under the cap. No -fs: ffmpeg would cut the clip short at the limit and
+# still exit 0, hiding an oversized encode from the retry above.
+PREP_RATE_ARGS = ("-maxrate", "1800k", "-bufsize", "3600k")
+# Hardware H.264 encoders in preference order. They take a plain bitrate;
+# 1500k for 8s plus PREP_RATE_ARGS' cap stays under MAX_UPLOAD_BYTES.
+# Set GROK_VIDEO_HWENC=0 to force libx264.
+HW_ENCODERS = ("h264_videotoolbox", "h264_nvenc", "h264_qsv")
+HW_BITRATE = "1500k"
+_HW_FAILED = set()  # listed by ffmpeg but failed at runtime (no device/driver)
+# ffmpeg writes here first when it exists: +faststart rewrites the whole file
+# to move the moov atom forward, and on tmpfs that second pass stays in RAM.
+SCRATCH_DIR = Path("/dev/shm")
+
+
+def _ffprobe(video_path: str) -> dict:
     probe = subprocess.run(
         [
             "ffprobe",
@@ -56,13 +111,58 @@ def prepare_for_bottube(video_path: str) -> str:
     )
 
     info = json.loads(probe.stdout)
-    duration = float(info["format"]["duration"])
-    size = int(info["format"]["size"])
     stream = next((s for s in info["streams"] if s.get("codec_type") == "video"), info["streams"][0])
-    width = int(stream.get("width", 0))
-    height = int(stream.get("height", 0))
+    return {
+        "duration": float(info["format"]["duration"]),
+        "size": int(info["format"]["size"]),
+        "width": int(stream.get("width", 0)),
+        "height": int(stream.get("height", 0)),
+        "codec_name": stream.get("codec_name"),
+    }
+
+
+def probe_video(video_path: str) -> dict:
+    """Duration, size, width, height and codec_name of a clip.
+
+    Read in-process from the MP4 headers; ffprobe only runs for files that
+    parser cannot handle.
+    """
+    try:
+        return probe_mp4(video_path)
+    except (OSError, ValueError):
+        return _ffprobe(video_path)
+
+
+def _available_hw_encoders() -> tuple[str, ...]:
+    """Hardware encoders this ffmpeg build lists, in preference order."""
+    if os.environ.get("GROK_VIDEO_HWENC", "1") == "0":
+        return ()
+    listed = ffmpeg_encoders()
+    return tuple(name for name in HW_ENCODERS if name in listed)
+
+
+def _ffmpeg(args: list[str], check: bool = False) -> subprocess.CompletedProcess:
+    """Run ffmpeg with only errors on stderr; the tail is printed if check fails."""
+    try:
+        return subprocess.run(
+            ["ffmpeg", "-v", "error", *args],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            check=check,
+            timeout=120,
+        )
+    except subprocess.CalledProcessError as exc:
+        print(f"  ffmpeg failed:\n{(exc.stderr or b'').decode(errors='replace')[-2000:]}")
+        raise
+
 
-    needs_prep = duration > 8 or size > 2 * 1024 * 1024 or width > 720 or height > 720
+def prepare_for_bottube(video_path: str) -> str:
+    """Ensure video meets BoTTube constraints (720x720, <2MB, <=8s, H.264)."""
+    info = probe_video(video_path)
+    duration, size = info["duration"], info["size"]
+    width, height = info["width"], info["height"]
+
+    needs_prep = duration > 8 or size > MAX_UPLOAD_BYTES or width > 720 or height > 720
 
     if not needs_prep:
         print(
@@ -75,35 +175,128 @@ def prepare_for_bottube(video_path: str) -> str:
 
     input_path = Path(video_path)
     prepared = str(input_path.with_name(f"{input_path.stem}_bottube.mp4"))
-    subprocess.run(
-        [
-            "ffmpeg",
-            "-y",
-            "-i",
-            video_path,
-            "-t",
-            "8",
+    scratch = prepared
+    if SCRATCH_DIR.is_dir() and os.access(SCRATCH_DIR, os.W_OK):
+        scratch = str(SCRATCH_DIR / f"{os.urandom(4).hex()}_{Path(prepared).name}")
+
+    try:
+        copied = _encode_for_bottube(video_path, info, scratch)
+        if scratch != prepared:
+            shutil.move(scratch, prepared)
+    except BaseException:
+        # Never leave a partial or oversized encode behind, in scratch or in place.
+        if os.path.exists(scratch):
+            os.unlink(scratch)
+        raise
+
+    if copied:
+        print(f"  Trimmed without re-encoding: {prepared}")
+    else:
+        print(f"  Prepared: {prepared} ({os.path.getsize(prepared) / 1024 / 1024:.1f} MB)")
+    return prepared
+
+
+def _encode_for_bottube(video_path: str, info: dict, output: str) -> bool:
+    """Write a compliant copy of video_path to output; True if it was a stream copy."""
+    width, height = info["width"], info["height"]
+
+    # Only too long: cut it with a stream copy, which is far faster than a
+    # re-encode. Anything else (or a failed copy) is encoded.
+    if width <= 720 and height <= 720 and info["size"] <= MAX_UPLOAD_BYTES and info["codec_name"] == "h264":
+        copy = _ffmpeg(["-y", "-i", video_path, "-t", "8", "-c", "copy", "-an", "-movflags", "+faststart", output])
+        if copy.returncode == 0:
+            return True
+
+    # -t as an input option stops demuxing and decoding at 8s rather than
+    # decoding the tail only to drop it. Clips already within 720x720 skip
+    # the scale/pad filter (and its swscale pass) altogether; square ones
+    # only need a plain scale, with no pad stage.
+    geometry = []
+    if width == height and width > 720:
+        geometry = ["-vf", "scale=720:720"]
+    elif width > 720 or height > 720:
+        geometry = [
             "-vf",
             "scale='min(720,iw)':'min(720,ih)':force_original_aspect_ratio=decrease,pad=720:720:(ow-iw)/2:(oh-ih)/2",
-            "-c:v",
-            "libx264",
-            "-crf",
-            "28",
-            "-preset",
-            "fast",
-            "-an",
-            "-movflags",
-            "+faststart",
-            prepared,
-        ],
-        capture_output=True,
-        check=True,
-        timeout=120,
-    )
+        ]
+    head = ["-y", "-t", "8", "-i", video_path, *geometry]
+    tail = [*PREP_RATE_ARGS, "-an", "-movflags", "+faststart", output]
+
+    # A hardware encoder leaves the CPU to the next generation in --batch
+    # runs. If it fails (listed, but no device) or overshoots, use libx264.
+    hw = next((name for name in _available_hw_encoders() if name not in _HW_FAILED), None)
+    if hw:
+        run = _ffmpeg([*head, "-c:v", hw, "-b:v", HW_BITRATE, *tail])
+        if run.returncode != 0:
+            _HW_FAILED.add(hw)
+        elif os.path.getsize(output) <= MAX_UPLOAD_BYTES:
+            return False
+
+    for crf in PREP_CRFS:
+        _ffmpeg(
+            [
+                *head,
+                "-c:v",
+                "libx264",
+                "-crf",
+                str(crf),
+                "-preset",
+                "veryfast",
+                "-threads",
+                "0",
+                *tail,
+            ],
+            check=True,
+        )
+        if os.path.getsize(output) <= MAX_UPLOAD_BYTES:
+            return False
+    raise RuntimeError(f"Could not encode {video_path} under {MAX_UPLOAD_BYTES} bytes (CRFs {PREP_CRFS})")
 
-    new_size = os.path.getsize(prepared)
-    print(f"  Prepared: {prepared} ({new_size / 1024 / 1024:.1f} MB)")
-    return prepared
+
+class MultipartUpload:
+    """A multipart/form-data body that reads the file from disk while it is sent.
+
+    requests' files= builds the whole body in memory first; this object is
+    passed as data= instead and sent in blocks. Its length is known up front,
+    so the request carries a Content-Length rather than chunked encoding;
+    ``sent`` counts the bytes handed to the connection so far.
+    """
+
+    def __init__(self, fields: dict[str, str], file_field: str, path: str, mime: str = "video/mp4") -> None:
+        self.boundary = os.urandom(16).hex()
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        filename = Path(path).name.replace('"', "%22")
+        head = b"".join(self._part_header(name) + value.encode() + b"\r\n" for name, value in fields.items())
+        head += self._part_header(file_field, f'; filename="{filename}"\r\nContent-Type: {mime}')
+        tail = f"\r\n--{self.boundary}--\r\n".encode()
+        self._file = open(path, "rb")
+        self._parts = [io.BytesIO(head), self._file, io.BytesIO(tail)]
+        self._length = len(head) + os.fstat(self._file.fileno()).st_size + len(tail)
+        self.sent = 0
+
+    def _part_header(self, name: str, extra: str = "") -> bytes:
+        return f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"{extra}\r\n\r\n'.encode()
+
+    def __len__(self) -> int:
+        return self._length
+
+    def read(self, size: int = -1) -> bytes:
+        while self._parts:
+            chunk = self._parts[0].read(size)
+            if chunk:
+                self.sent += len(chunk)
+                return chunk
+            self._parts.pop(0)
+        return b""
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "MultipartUpload":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
 
 
 def upload_to_bottube(
@@ -123,33 +316,27 @@ def upload_to_bottube(
 
     print(f"  Uploading to BoTTube as {agent_slug}...")
 
-    cmd = [
-        "curl",
-        "-s",
-        "-X",
-        "POST",
-        f"{BOTTUBE_URL}/api/upload",
-        "-H",
-        f"X-API-Key: {BOTTUBE_API_KEY}",
-        "-F",
-        f"video=@{video_path}",
-        "-F",
-        f"title={title}",
-        "-F",
-        f"description={description}",
-        "-F",
-        f"tags={tags_str}",
-    ]
-
+    fields = {"title": title, "description": description, "tags": tags_str}
     if gen_method:
-        cmd.extend(["-F", f"gen_method={gen_method}"])
-
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=180)
+        fields["gen_method"] = gen_method
+
+    with MultipartUpload(fields, "video", video_path) as body:
+        result = SESSION.post(
+            f"{BOTTUBE_URL}/api/upload",
+            headers={
+                "X-API-Key": BOTTUBE_API_KEY,
+                "Content-Type": body.content_type,
+                "Content-Length": str(len(body)),
+            },
+            data=body,
+            timeout=180,
+        )
+        print(f"  Sent {body.sent / 1024 / 1024:.1f} of {len(body) / 1024 / 1024:.1f} MB")
 
     try:
-        resp = json.loads(result.stdout)
-    except json.JSONDecodeError as exc:
-        raise RuntimeError(f"Upload returned non-JSON response: {result.stdout[:200]}") from exc
+        resp = result.json()
+    except ValueError as exc:
+        raise RuntimeError(f"Upload returned non-JSON response: {result.text[:200]}") from exc
 
     if resp.get("error"):
         raise RuntimeError(f"Upload failed: {resp['error']}")
@@ -163,60 +350,42 @@ def upload_to_bottube(
     return str(video_id)
 
 
-def _split_tags(raw: str) -> list[str]:
-    return [tag.strip() for tag in raw.split(",") if tag.strip()]
-
-
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Generate videos with Grok/Runway and upload to BoTTube")
-    parser.add_argument("prompt", help="Text prompt for video generation")
-    parser.add_argument("--provider", default="auto", choices=["auto", "grok", "runway"], help="Video provider")
-    parser.add_argument("--duration", type=int, default=5, help="Requested duration in seconds")
-    parser.add_argument("--output", "-o", help="Output file path")
-    parser.add_argument("--upload", action="store_true", help="Upload to BoTTube after generation")
-    parser.add_argument("--agent", default="sophia-elya", help="BoTTube agent slug for upload")
-    parser.add_argument("--title", help="Video title (required for upload)")
-    parser.add_argument("--description", default="", help="Video description")
-    parser.add_argument("--tags", default="ai-generated", help="Comma-separated tags")
-    parser.add_argument("--no-fallback", action="store_true", help="Disable provider fallback")
-
-    # Grok provider tuning
-    parser.add_argument("--aspect-ratio", default="1:1", choices=["1:1", "16:9", "9:16"], help="Grok aspect ratio")
-    parser.add_argument("--resolution", default="720p", choices=["720p", "1080p"], help="Grok resolution")
-    parser.add_argument("--grok-model", default="grok-imagine-video", help="Grok model id")
+def _warm_connection() -> None:
+    """Open the pooled connection to BoTTube ahead of the upload; errors are left to the upload."""
+    try:
+        SESSION.head(f"{BOTTUBE_URL}/health", timeout=10)
+    except requests.RequestException:
+        pass
 
-    # Runway provider tuning
-    parser.add_argument("--runway-model", default=os.environ.get("RUNWAY_MODEL", "gen4.5"), help="Runway model id")
-    parser.add_argument("--runway-ratio", default=os.environ.get("RUNWAY_RATIO", "1280:720"), help="Runway aspect ratio")
-    parser.add_argument("--runway-audio", action="store_true", help="Request audio from Runway")
-    parser.add_argument("--runway-image", help="Image path/URL for Runway image-to-video modes")
 
-    args = parser.parse_args()
+def _cancel_on_sigint(signum, frame) -> None:
+    """Ctrl-C: stop provider polls and range-download workers, then interrupt main."""
+    from providers.utils import CANCEL
 
-    if args.upload and not args.title:
-        print("ERROR: --title is required with --upload")
-        sys.exit(1)
+    CANCEL.set()
+    raise KeyboardInterrupt
 
-    if args.provider == "grok" and not GROK_API_KEY:
-        print("ERROR: provider=grok requires GROK_API_KEY")
-        sys.exit(1)
 
-    if args.provider == "runway" and not RUNWAY_API_KEY:
-        print("ERROR: provider=runway requires RUNWAYML_API_SECRET")
-        sys.exit(1)
+def _split_tags(raw: str) -> list[str]:
+    return [tag.strip() for tag in raw.split(",") if tag.strip()]
 
-    if args.provider == "auto" and not (GROK_API_KEY or RUNWAY_API_KEY):
-        print("ERROR: provider=auto needs at least one key (GROK_API_KEY or RUNWAYML_API_SECRET)")
-        sys.exit(1)
 
-    print(f"Generating video ({args.provider}) for prompt: '{args.prompt[:70]}...'")
+def _run_prompt(
+    args: argparse.Namespace,
+    prompt: str,
+    title: str | None,
+    output: str | None,
+    pool: ThreadPoolExecutor,
+) -> dict:
+    """Generate one clip (and upload it with --upload); returns a result record."""
+    print(f"Generating video ({args.provider}) for prompt: '{prompt[:70]}...'")
 
     generation = generate_video(
-        prompt=args.prompt,
+        prompt=prompt,
         prefer=args.provider,
         fallback=not args.no_fallback,
         duration=args.duration,
-        output_path=args.output,
+        output_path=output,
         aspect_ratio=args.aspect_ratio,
         resolution=args.resolution,
         grok_model=args.grok_model,
@@ -237,24 +406,129 @@ def main() -> None:
         for key, value in generation.metadata.items():
             print(f"    - {key}: {value}")
 
+    result = {"prompt": prompt, "provider": generation.provider, "path": video_path}
     if args.upload:
+        # The TLS handshake to BoTTube happens while ffmpeg prepares the clip.
+        warm = pool.submit(_warm_connection)
         prepared = prepare_for_bottube(video_path)
+        warm.result()
         tags = _split_tags(args.tags)
         if "ai-generated" not in tags:
             tags.append("ai-generated")
         if generation.provider not in tags:
             tags.append(generation.provider)
 
-        upload_to_bottube(
+        result["video_id"] = upload_to_bottube(
             prepared,
-            args.title,
+            title,
             args.description,
             args.agent,
             tags,
             gen_method=generation.provider,
         )
+    return result
+
+
+def _read_prompts(source: str) -> list[str]:
+    """Non-blank lines of a file, or of stdin for "-"."""
+    if source == "-":
+        lines = sys.stdin.read().splitlines()
     else:
-        print("\nUse --upload --title 'Your title' to publish to BoTTube.")
+        lines = Path(source).read_text(encoding="utf-8").splitlines()
+    return [line.strip() for line in lines if line.strip()]
+
+
+def _run_batch(args: argparse.Namespace, pool: ThreadPoolExecutor) -> None:
+    """Run every prompt from --batch in this process, one JSONL record per prompt.
+
+    Clips are numbered: uploads are titled "<--title> #n" and, if --output
+    is given, saved in that directory as clip_NNN.mp4. A failed prompt is
+    recorded and the batch moves on. Progress goes to stderr, so stdout
+    carries nothing but the records when --results is not given.
+    """
+    prompts = _read_prompts(args.batch)
+    if args.output:
+        Path(args.output).mkdir(parents=True, exist_ok=True)
+    results = open(args.results, "a", encoding="utf-8") if args.results else sys.stdout
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            for n, prompt in enumerate(prompts, 1):
+                print(f"\n[{n}/{len(prompts)}]")
+                output = str(Path(args.output) / f"clip_{n:03d}.mp4") if args.output else None
+                title = f"{args.title} #{n}" if args.title else None
+                try:
+                    record = _run_prompt(args, prompt, title, output, pool)
+                except Exception as exc:
+                    print(f"  ERROR: {exc}")
+                    record = {"prompt": prompt, "error": str(exc)}
+                results.write(json.dumps(record) + "\n")
+                results.flush()
+    finally:
+        if results is not sys.stdout:
+            results.close()
+
+
+@functools.lru_cache(maxsize=None)
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Generate videos with Grok/Runway and upload to BoTTube")
+    parser.add_argument("prompt", nargs="?", help="Text prompt for video generation")
+    parser.add_argument("--batch", metavar="FILE", help="Generate one clip per line of FILE ('-' for stdin)")
+    parser.add_argument("--results", metavar="FILE", help="Append --batch results as JSONL (default: stdout)")
+    parser.add_argument("--provider", default="auto", choices=["auto", "grok", "runway"], help="Video provider")
+    parser.add_argument("--duration", type=int, default=5, help="Requested duration in seconds")
+    parser.add_argument("--output", "-o", help="Output file path (a directory with --batch)")
+    parser.add_argument("--upload", action="store_true", help="Upload to BoTTube after generation")
+    parser.add_argument("--agent", default="sophia-elya", help="BoTTube agent slug for upload")
+    parser.add_argument("--title", help="Video title (required for upload)")
+    parser.add_argument("--description", default="", help="Video description")
+    parser.add_argument("--tags", default="ai-generated", help="Comma-separated tags")
+    parser.add_argument("--no-fallback", action="store_true", help="Disable provider fallback")
+
+    # Grok provider tuning
+    parser.add_argument("--aspect-ratio", default="1:1", choices=["1:1", "16:9", "9:16"], help="Grok aspect ratio")
+    parser.add_argument("--resolution", default="720p", choices=["720p", "1080p"], help="Grok resolution")
+    parser.add_argument("--grok-model", default="grok-imagine-video", help="Grok model id")
+
+    # Runway provider tuning
+    parser.add_argument("--runway-model", default=os.environ.get("RUNWAY_MODEL", "gen4.5"), help="Runway model id")
+    parser.add_argument("--runway-ratio", default=os.environ.get("RUNWAY_RATIO", "1280:720"), help="Runway aspect ratio")
+    parser.add_argument("--runway-audio", action="store_true", help="Request audio from Runway")
+    parser.add_argument("--runway-image", help="Image path/URL for Runway image-to-video modes")
+    return parser
+
+
+def main() -> None:
+    parser = _build_parser()
+    args = parser.parse_args()
+
+    if bool(args.prompt) == bool(args.batch):
+        parser.error("give either a prompt or --batch FILE")
+
+    if args.upload and not args.title:
+        print("ERROR: --title is required with --upload")
+        sys.exit(1)
+
+    if args.provider == "grok" and not GROK_API_KEY:
+        print("ERROR: provider=grok requires GROK_API_KEY")
+        sys.exit(1)
+
+    if args.provider == "runway" and not RUNWAY_API_KEY:
+        print("ERROR: provider=runway requires RUNWAYML_API_SECRET")
+        sys.exit(1)
+
+    if args.provider == "auto" and not (GROK_API_KEY or RUNWAY_API_KEY):
+        print("ERROR: provider=auto needs at least one key (GROK_API_KEY or RUNWAYML_API_SECRET)")
+        sys.exit(1)
+
+    signal.signal(signal.SIGINT, _cancel_on_sigint)
+    # One process, one pooled session and one worker thread for every clip.
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        if args.batch:
+            _run_batch(args, pool)
+        else:
+            _run_prompt(args, args.prompt, args.title, args.output, pool)
+            if not args.upload:
+                print("\nUse --upload --title 'Your title' to publish to BoTTube.")
 
 
 if __name__ == "__main__":